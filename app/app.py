@@ -1,5 +1,6 @@
 # app/app.py
 import streamlit as st
+import time
 from pathlib import Path
 
 # Importando os módulos refatorados
@@ -64,8 +65,10 @@ def main():
     )
     
     # --- Carregamento e Processamento de Dados ---
+    inicio = time.perf_counter()
     df, all_data = load_and_merge_data()
     indices_scores = load_indices_scores()
+    tempo_principal = time.perf_counter() - inicio
 
     if df.empty:
         st.warning("O DataFrame principal está vazio. A aplicação não pode continuar.")
@@ -79,6 +82,16 @@ def main():
     # O módulo de layout de abas cuida da exibição de todo o conteúdo principal
     render_tabs(df, df_filtrado, all_data, ticker_foco)
 
+    render_load_timings(tempo_principal, getattr(all_data, 'tempos', {}))
+
+
+def render_load_timings(tempo_principal: float, tempos_apoio: dict):
+    """Mostra, no fim da sidebar, o tempo de carga dos dados usados nesta execução."""
+    with st.sidebar.expander("⏱️ Tempos de carregamento"):
+        st.caption(f"Ranking e índices: {tempo_principal * 1000:.0f} ms")
+        for nome, segundos in tempos_apoio.items():
+            st.caption(f"{nome}: {segundos * 1000:.0f} ms")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -783,33 +783,55 @@ def render_tab_dividendos(df: pd.DataFrame, all_data: dict, ticker_foco: str = N
     
 
 def render_tabs(df_unfiltered: pd.DataFrame, df_filtrado: pd.DataFrame, all_data: dict, ticker_foco: str = None):
-    """Cria e gerencia o conteúdo de todas as abas da aplicação."""
+    """
+    Cria e gerencia o conteúdo de todas as abas da aplicação.
+
+    Só a aba selecionada é renderizada (`on_change="rerun"`), então as tabelas
+    de apoio de `all_data` são carregadas apenas quando a aba que as usa é aberta.
+    Em versões do Streamlit sem abas com estado, todas as abas são renderizadas.
+    """
     from .calculadora import render_tab_calculadora
 
     tab_titles = [
         "🧭 Guia da Bússola", "🏆 Ranking", "🔬 Análise",
         "🔍 Dividendos", "💰 Calculadora", "🏗️ Setores", "⚖️ Recuperação Judicial"
     ]
-    tab_guia, tab_ranking, tab_analise, tab_dividendos, tab_calculadora, tab_setores, tab_rj = st.tabs(tab_titles)
-
-    with tab_guia:
-        render_tab_guia()
-
-    with tab_ranking:
-        render_tab_rank_geral(df_filtrado)
-        st.divider()
-        render_tab_rank_detalhado(df_filtrado, df_unfiltered)
-
-    with tab_analise:
-        render_tab_analise_individual(df_filtrado)
-    with tab_dividendos:
-        render_tab_dividendos(df_filtrado, all_data, ticker_foco)
-    with tab_calculadora:
-        render_tab_calculadora(all_data, ticker_foco)
-    with tab_setores:
-        render_tab_rank_setores(df_unfiltered, df_filtrado, all_data)
-    with tab_rj:
-        render_tab_recuperacao_judicial(all_data)
+    try:
+        abas = st.tabs(tab_titles, key="aba_ativa", on_change="rerun")
+        rastreia_aba = True
+    except TypeError:
+        # Versões do Streamlit sem abas com estado: todas as abas são renderizadas
+        abas = st.tabs(tab_titles)
+        rastreia_aba = False
+    tab_guia, tab_ranking, tab_analise, tab_dividendos, tab_calculadora, tab_setores, tab_rj = abas
+
+    def aberta(aba) -> bool:
+        # `.open` é None quando as abas não rastreiam estado: renderiza todas
+        return not rastreia_aba or aba.open is not False
+
+    if aberta(tab_guia):
+        with tab_guia:
+            render_tab_guia()
+    if aberta(tab_ranking):
+        with tab_ranking:
+            render_tab_rank_geral(df_filtrado)
+            st.divider()
+            render_tab_rank_detalhado(df_filtrado, df_unfiltered)
+    if aberta(tab_analise):
+        with tab_analise:
+            render_tab_analise_individual(df_filtrado)
+    if aberta(tab_dividendos):
+        with tab_dividendos:
+            render_tab_dividendos(df_filtrado, all_data, ticker_foco)
+    if aberta(tab_calculadora):
+        with tab_calculadora:
+            render_tab_calculadora(all_data, ticker_foco)
+    if aberta(tab_setores):
+        with tab_setores:
+            render_tab_rank_setores(df_unfiltered, df_filtrado, all_data)
+    if aberta(tab_rj):
+        with tab_rj:
+            render_tab_recuperacao_judicial(all_data)
 
 def render_tab_rank_setores(df_unfiltered: pd.DataFrame, df_filtrado: pd.DataFrame, all_data: dict):
     st.header("🏗️ Análise de Setores")
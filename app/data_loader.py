@@ -4,41 +4,130 @@ import pandas as pd
 import os
 from pathlib import Path
 from dotenv import load_dotenv
-from scoring import calculate_score_and_details, build_score_details_from_row, calculate_scores_in_parallel
+from scoring import calculate_scores_fallback
+from collections.abc import Mapping
 from datetime import datetime
+import threading
+import time
 import duckdb
+import pyarrow as pa
 
 # --- Configuração do Banco de Dados ---
 DB_PATH = "duckdb/banco_dw/dw.duckdb"
 
-@st.cache_resource
-def get_db_connection():
-    """Cria e gerencia uma conexão com o banco de dados DuckDB."""
+
+class TabelasArrow:
+    """
+    Tabelas do DW em formato Arrow, compartilhadas por todas as sessões do
+    processo. Cada tabela é lida do DuckDB uma única vez por versão do DW.
+    """
+
+    def __init__(self, caminho: str):
+        self.conexao = duckdb.connect(database=caminho, read_only=True)
+        self.tabelas: dict[str, pa.Table] = {}
+        self.lock = threading.Lock()
+
+    def obter(self, nome: str) -> pa.Table:
+        with self.lock:
+            if nome not in self.tabelas:
+                self.tabelas[nome] = self.conexao.table(nome).to_arrow_table()
+            return self.tabelas[nome]
+
+
+# Gravado por duckdb/carga/05-loader_datetime.py ao fim de cada carga
+LOADER_TIME_PATH = Path('duckdb/land_dw/loader_datetime.parquet')
+
+_versao_lida: dict = {'assinatura': None, 'versao': None}
+_versao_lock = threading.Lock()
+
+
+def dw_mtime() -> int:
+    """Data de modificação do arquivo do DW (versão usada quando a carga não gravou 'dw_versao')."""
+    try:
+        return os.stat(DB_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return 0
+
+
+def dw_version() -> int:
+    """
+    Geração atual do DW ('dw_versao' do loader_datetime.parquet).
+
+    Chamada a cada execução do script: custa um `os.stat`, e o parquet só é
+    relido quando o arquivo muda. Sem o arquivo (ou sem a coluna), usa a data
+    de modificação do dw.duckdb.
+    """
+    try:
+        info = os.stat(LOADER_TIME_PATH)
+    except FileNotFoundError:
+        return dw_mtime()
+    assinatura = (info.st_mtime_ns, info.st_size)
+    with _versao_lock:
+        if _versao_lida['assinatura'] != assinatura:
+            try:
+                versao = int(pd.read_parquet(LOADER_TIME_PATH, columns=['dw_versao'])['dw_versao'].iloc[0])
+            except Exception:
+                versao = None
+            _versao_lida.update(assinatura=assinatura, versao=versao)
+        versao = _versao_lida['versao']
+    return versao if versao is not None else dw_mtime()
+
+
+@st.cache_resource(max_entries=1)
+def get_tabelas_arrow(versao_dw: int) -> TabelasArrow | None:
+    """Cache de recursos do processo; uma nova versão do DW descarta a anterior."""
     try:
-        return duckdb.connect(database=DB_PATH, read_only=True)
+        return TabelasArrow(DB_PATH)
     except Exception as e:
         st.error(f"Falha ao conectar ao banco de dados DuckDB: {e}")
         return None
 
-@st.cache_data
+
+def get_db_connection():
+    """Conexão (somente leitura) com a versão atual do DW."""
+    tabelas = get_tabelas_arrow(dw_version())
+    return tabelas.conexao if tabelas else None
+
+
+def read_arrow_table(table_name: str) -> pa.Table | None:
+    """Retorna a tabela Arrow compartilhada, lendo-a do DW no primeiro acesso."""
+    tabelas = get_tabelas_arrow(dw_version())
+    if tabelas is None:
+        return None
+    try:
+        return tabelas.obter(table_name)
+    except Exception as e:
+        st.error(f"Erro ao ler a tabela '{table_name}': {e}")
+        return None
+
+
 def read_table_cached(table_name: str, **kwargs) -> pd.DataFrame:
-    """Lê uma tabela do DuckDB com cache para acelerar recarregamentos."""
-    conn = get_db_connection()
-    if conn:
-        try:
-            return conn.table(table_name).to_df()
-        except Exception as e:
-            st.error(f"Erro ao ler a tabela '{table_name}': {e}")
-            return pd.DataFrame()
-    return pd.DataFrame()
+    """
+    Lê uma tabela do DW como DataFrame a partir da tabela Arrow compartilhada.
+
+    Colunas numéricas sem nulos são views sem cópia (somente leitura) sobre os
+    buffers Arrow; operações que criam colunas novas funcionam normalmente.
+    """
+    tabela = read_arrow_table(table_name)
+    if tabela is None:
+        return pd.DataFrame()
+    return tabela.to_pandas(split_blocks=True)
 
-@st.cache_data(ttl=60)
 def get_last_update_time() -> str | None:
+    """
+    Retorna o timestamp de atualização mais recente da versão atual do DW.
+    """
+    return _last_update_time(dw_version())
+
+
+@st.cache_data
+def _last_update_time(versao_dw: int) -> str | None:
     """
     Lê os timestamps de atualização da pipeline e do loader, e retorna o mais recente.
+    Relido apenas quando a versão do DW muda.
     """
     pipeline_time_path = Path('duckdb/land_dw/pipeline_datetime.parquet')
-    loader_time_path = Path('duckdb/land_dw/loader_datetime.parquet')
+    loader_time_path = LOADER_TIME_PATH
     
     latest_time = None
 
@@ -110,153 +199,80 @@ def load_main_data() -> pd.DataFrame:
         st.error(f"Ocorreu um erro ao processar os dados da tabela 'indicadores': {e}")
         return pd.DataFrame()
 
-def load_and_merge_data() -> tuple[pd.DataFrame, dict]:
+# --- Tabelas de Apoio (gráficos e abas secundárias) ---
+TABELAS_APOIO = [
+    'dividendos_ano', 'dividendos_ano_resumo', 'todos_dividendos',
+    'dividend_yield', 'avaliacao_setor', 'precos_acoes', 'ciclo_mercado', 'rj'
+]
+
+
+def preparar_tabela_apoio(table_name: str) -> pd.DataFrame:
+    """Lê uma tabela de apoio e adiciona a coluna 'ticker_base' usada nos filtros das abas."""
+    data = read_table_cached(table_name)
+    if not data.empty:
+        if 'ticker' in data.columns:
+            data['ticker_base'] = data['ticker'].astype(str).str.upper().str.replace('.SA','', regex=False).str.strip()
+        if 'Ticker' in data.columns:
+             data['ticker_base'] = data['Ticker'].astype(str).str.upper().str.replace('.SA','', regex=False).str.strip()
+    return data
+
+
+class RegistroTabelas(Mapping):
     """
-    Orquestra o carregamento de todas as tabelas do DuckDB, realiza os merges,
-    calcula o score e retorna o DataFrame final e um dicionário com dados de apoio.
+    Dicionário preguiçoso das tabelas de apoio: cada tabela é lida e preparada
+    no primeiro acesso (ex.: `all_data.get('todos_dividendos')` na aba de
+    Dividendos), e o tempo gasto fica registrado em `tempos` (segundos).
     """
-    # --- Carrega DataFrame Principal ---
-    indic = read_table_cached('indicadores')
-    if indic.empty:
-        st.error("Tabela 'indicadores' não encontrada ou vazia. A aplicação não pode continuar.")
-        return pd.DataFrame(), {}
 
-    dy = read_table_cached('dividend_yield')
-    indic['ticker_base'] = indic['ticker'].astype(str).str.upper().str.replace('.SA','', regex=False).str.strip()
-    dy['ticker_base'] = dy['ticker'].astype(str).str.upper().str.replace('.SA','', regex=False).str.strip()
-    df = indic.merge(dy[['ticker_base','DY12m','DY5anos']], on='ticker_base', how='left')
-    df.rename(columns={
-        'empresa':'Empresa','logo':'Logo','perfil_acao':'Perfil da Ação',
-        'market_cap':'Market Cap','preco_atual':'Preço Atual','p_l':'P/L','p_vp':'P/VP',
-        'payout_ratio':'Payout Ratio (%)','crescimento_preco_5a':'Crescimento Preço (%)','roe':'ROE (%)',
-        'divida_total':'Dívida Total','divida_ebitda':'Dívida/EBITDA','sentimento_gauge':'Sentimento Gauge',
-        'DY12m':'DY (Taxa 12m, %)','DY5anos':'DY 5 Anos Média (%)',
-        'strong_buy': 'Strong Buy', 'buy': 'Buy', 'hold': 'Hold', 'sell': 'Sell', 'strong_sell': 'Strong Sell',
-        'beta':'Beta','current_ratio':'Current Ratio','liquidez_media_diaria':'Volume Médio Diário','fcf_yield':'FCF Yield'
-    }, inplace=True)
-    
-    # Cria coluna 'Setor (brapi)' a partir de 'subsetor_b3' mantendo ambas
-    if 'subsetor_b3' in df.columns:
-        df['Setor (brapi)'] = df['subsetor_b3']
-
-    # Converte todas as colunas numéricas necessárias
-    numeric_cols = [
-        'Preço Atual', 'P/L', 'P/VP', 'DY (Taxa 12m, %)', 'DY 5 Anos Média (%)', 
-        'Payout Ratio (%)', 'Crescimento Preço (%)', 'ROE (%)', 'Dívida Total', 
-        'Market Cap', 'Dívida/EBITDA', 'Sentimento Gauge', 'Strong Buy', 'Buy', 
-        'Hold', 'Sell', 'Strong Sell', 'Beta', 'Current Ratio', 'Volume Médio Diário', 
-        'FCF Yield', 'margem_seguranca_percent'
-    ]
-    for col in numeric_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-    
-    df['Ticker'] = df['ticker_base']
+    def __init__(self, nomes: list[str]):
+        self.nomes = list(nomes)
+        self.tabelas: dict[str, pd.DataFrame] = {}
+        self.tempos: dict[str, float] = {}
+
+    def __getitem__(self, nome: str) -> pd.DataFrame:
+        if nome not in self.nomes:
+            raise KeyError(nome)
+        if nome not in self.tabelas:
+            inicio = time.perf_counter()
+            self.tabelas[nome] = preparar_tabela_apoio(nome)
+            self.tempos[nome] = time.perf_counter() - inicio
+        return self.tabelas[nome]
+
+    def __iter__(self):
+        return iter(self.nomes)
+
+    def __len__(self) -> int:
+        return len(self.nomes)
 
+
+def load_and_merge_data() -> tuple[pd.DataFrame, Mapping]:
+    """
+    Carrega a tabela 'app_ranking' (já desnormalizada e calculada pela carga do
+    DuckDB, ver duckdb/carga/app_ranking.py) e retorna o DataFrame final e o
+    registro das tabelas de apoio, que só são lidas quando uma aba as usa.
+    """
+    # --- Carrega DataFrame Principal ---
+    df = read_table_cached('app_ranking')
     if df.empty:
+        st.error("Tabela 'app_ranking' não encontrada ou vazia. Execute a carga do DuckDB (duckdb/carga/loader.py).")
         return pd.DataFrame(), {}
 
-    # --- Cálculo de Dívida/Market Cap ---
-    if 'Dívida Total' in df.columns and 'Market Cap' in df.columns:
-        df['Dívida Total'] = pd.to_numeric(df['Dívida Total'], errors='coerce')
-        df['Market Cap'] = pd.to_numeric(df['Market Cap'], errors='coerce')
-        df['Dívida/Market Cap'] = df.apply(
-            lambda row: row['Dívida Total'] / row['Market Cap'] if row['Market Cap'] != 0 else 0,
-            axis=1
-        )
-
-    # --- Merge com Scores Externos ---
-    scores_df = read_table_cached('scores')
-    if not scores_df.empty:
-        # Normaliza o ticker da tabela scores
-        scores_df['ticker_base'] = scores_df['ticker'].astype(str).str.upper().str.replace('.SA', '', regex=False).str.strip()
-        df = df.merge(scores_df, left_on='Ticker', right_on='ticker_base', how='left', suffixes=('', '_scores'))
-        df['Score Total'] = pd.to_numeric(df['score_total'], errors='coerce').fillna(0)
-        df['Score Details'] = df.apply(build_score_details_from_row, axis=1)
+    if 'Score Total' in df.columns:
+        # Detalhes gravados pelo pipeline (data_engineer/regras_score.py); o DuckDB os devolve como arrays
+        df['Score Details'] = [list(d) for d in df['Score Details']]
     else:
         st.info("Tabela 'scores' não encontrada. Calculando score em tempo real.")
-        score_results = calculate_scores_in_parallel(df)
-        df['Score Total'] = [result[0] for result in score_results]
-        df['Score Details'] = [result[1] for result in score_results]
-
-
-    # --- Merge com Dados de Apoio ---
-    pt = read_table_cached('preco_teto')
-    if not pt.empty:
-        pt['ticker_base'] = pt['ticker'].astype(str).str.upper().str.replace('.SA', '', regex=False).str.strip()
-        df = df.merge(pt[['ticker_base', 'preco_teto_5anos', 'diferenca_percentual']], left_on='Ticker', right_on='ticker_base', how='left', suffixes=('', '_pt'))
-        df.rename(columns={'preco_teto_5anos': 'Preço Teto 5A', 'diferenca_percentual': 'Alvo'}, inplace=True)
-
-    # --- Merge com Preços de Ações (1M e 6M) ---
-    pa = read_table_cached('precos_acoes')
-    if not pa.empty:
-        if 'ticker' in pa.columns and 'Ticker' in df.columns:
-            pa['ticker_base'] = pa['ticker'].astype(str).str.upper().str.replace('.SA', '', regex=False).str.strip()
-
-            cols_to_merge = ['ticker_base', 'fechamento_atual', 'fechamento_1m_atras', 'fechamento_6m_atras']
-            pa_cols = [col for col in cols_to_merge if col in pa.columns]
-
-            df = df.merge(pa[pa_cols], left_on='Ticker', right_on='ticker_base', how='left', suffixes=('', '_pa'))
-
-            if 'fechamento_atual' in df.columns:
-                df['Preço Atual'] = df['fechamento_atual'].combine_first(df['Preço Atual'])
-                df.drop(columns=['fechamento_atual'], inplace=True)
-
-            df.rename(columns={
-                'fechamento_1m_atras': 'Preço 1M',
-                'fechamento_6m_atras': 'Preço 6M'
-            }, inplace=True)
-
-            # --- Cálculo da Valorização (1M e 6M) ---
-            for period in ['1M', '6M']:
-                price_col = f'Preço {period}'
-                val_col = f'Val {period}'
-                if price_col in df.columns and 'Preço Atual' in df.columns:
-                    df[price_col] = pd.to_numeric(df[price_col], errors='coerce')
-                    df['Preço Atual'] = pd.to_numeric(df['Preço Atual'], errors='coerce')
-                    df[val_col] = df.apply(
-                        lambda row: ((row['Preço Atual'] - row[price_col]) / row[price_col]) * 100 if row[price_col] and row[price_col] != 0 else 0,
-                        axis=1
-                    )
-    else:
+        score_results = calculate_scores_fallback(df)
+        df['Score Total'] = score_results['score_total'].to_numpy()
+        df['Score Details'] = score_results['score_detalhes'].to_numpy()
+
+    if 'Preço 1M' not in df.columns:
         st.warning("Tabela 'precos_acoes' não encontrada. As colunas 'Preço 1M' e 'Preço 6M' não serão exibidas.")
-    
-    # --- Merge com Avaliação de Setor ---
-    df_setor = read_table_cached('avaliacao_setor')
-    if not df_setor.empty:
-        if 'subsetor_b3' in df.columns and 'subsetor_b3' in df_setor.columns:
-            df_setor_scores = df_setor[['subsetor_b3', 'pontuacao_final']].drop_duplicates(subset=['subsetor_b3'])
-            df = df.merge(df_setor_scores, on='subsetor_b3', how='left')
-        else:
-            st.warning("Não foi possível fazer o merge da pontuação de subsetor. Coluna 'subsetor_b3' não encontrada.")
-    else:
-        st.warning("Tabela 'avaliacao_setor' não encontrada. A pontuação por subsetor não será carregada.")
-        df['pontuacao_final'] = 0
 
-    # --- Processa Coluna Ciclo de Mercado ---
-    if 'status_ciclo' in df.columns:
-        df.rename(columns={'status_ciclo': 'Status Ciclo'}, inplace=True)
-        df['Status Ciclo'].fillna('N/A', inplace=True)
-    else:
-        df['Status Ciclo'] = 'N/A'
-
-    # Limpa colunas auxiliares de merge
-    df.drop(columns=[col for col in df.columns if 'ticker_base' in str(col)], inplace=True, errors='ignore')
-
-    # --- Carrega datasets para gráficos ---
-    all_data = {}
-    optional_tables = [
-        'dividendos_ano', 'dividendos_ano_resumo', 'todos_dividendos',
-        'dividend_yield', 'avaliacao_setor', 'precos_acoes', 'ciclo_mercado', 'rj'
-    ]
-    for table_name in optional_tables:
-        data = read_table_cached(table_name)
-        if not data.empty:
-            if 'ticker' in data.columns:
-                data['ticker_base'] = data['ticker'].astype(str).str.upper().str.replace('.SA','', regex=False).str.strip()
-            if 'Ticker' in data.columns:
-                 data['ticker_base'] = data['Ticker'].astype(str).str.upper().str.replace('.SA','', regex=False).str.strip()
-        all_data[table_name] = data
+    all_data = RegistroTabelas(TABELAS_APOIO)
+    # Pequena e usada pelos filtros da sidebar em toda execução
+    if all_data['avaliacao_setor'].empty:
+        st.warning("Tabela 'avaliacao_setor' não encontrada. A pontuação por subsetor não será carregada.")
 
     return df, all_data
 
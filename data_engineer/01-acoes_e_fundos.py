@@ -4,12 +4,18 @@
     Versão 5.0 com salvamento em Parquet e output aprimorado.
     Agora usando yfinance em vez de brapi, filtrando apenas empresas brasileiras via sufixo .SA.
 """
-import yfinance as yf
 import pandas as pd
 from pathlib import Path
 import time
-import requests
+import metricas
 from common import save_to_parquet
+from fetcher import coletar_em_paralelo, resumir_latencias
+from providers import get_provider
+
+# --- Dependências no Pipeline (lidas pelo loader.py, ver dag.py) ---
+ENTRADAS = []
+SAIDAS = ["acoes_e_fundos", "tickers_nao_mapeados"]
+DADOS_EXTERNOS = True
 
 
 # --- MAPEAMENTO DE TICKERS REFINADO (VERSÃO FINAL) ---
@@ -251,7 +257,7 @@ TICKERS_A_REMOVER = [
     #"SNCI11", "WSEC11", "IRIM11", "RBIF11", "EGYR11", "RENV11", "RNR9L", "PPLA11",
 ]
 
-def mapear_setores_b3(df):
+def mapear_setores_b3(df, mapeamento: dict = MAPEAMENTO_COMPLETO_TICKERS):
     """
     Mapeia os tickers para o padrão B3 de Setor e Subsetor usando
     um dicionário completo e robusto.
@@ -259,8 +265,8 @@ def mapear_setores_b3(df):
     valor_padrao = ('Indefinido', 'Indefinido')
    
     # Gera as listas de setores e subsetores de forma explícita
-    setores = [MAPEAMENTO_COMPLETO_TICKERS.get(ticker, valor_padrao)[0] for ticker in df['ticker']]
-    subsetores = [MAPEAMENTO_COMPLETO_TICKERS.get(ticker, valor_padrao)[1] for ticker in df['ticker']]
+    setores = [mapeamento.get(ticker, valor_padrao)[0] for ticker in df['ticker']]
+    subsetores = [mapeamento.get(ticker, valor_padrao)[1] for ticker in df['ticker']]
    
     # Atribui as listas diretamente às novas colunas
     df['setor_b3'] = setores
@@ -268,23 +274,15 @@ def mapear_setores_b3(df):
    
     return df
 
-def extrair_dados_yfinance():
+def buscar_logos_brapi(provider=None) -> dict:
     """
-    Extrai, filtra e processa dados de ativos da B3 usando yfinance, mas busca o logo da API Brapi.
+    Busca os logos na API Brapi (`provider.get_logos()`) e completa os tickers sem logo via LOGO_MAPPING.
     """
-    print("Iniciando extração de dados...")
-    start_time = time.time()
-
-    # 1. Buscar logos da API Brapi
     print("Buscando logos da API Brapi...")
     logo_map = {}
     try:
-        response = requests.get("https://brapi.dev/api/quote/list", timeout=20)
-        response.raise_for_status()
-        brapi_data = response.json()
-        for stock in brapi_data.get('stocks', []):
-            if 'stock' in stock and 'logo' in stock:
-                logo_map[stock['stock']] = stock['logo']
+        with metricas.span('coleta', endpoint='logos'):
+            logo_map = dict((provider or get_provider()).get_logos())
         print(f"{len(logo_map)} logos encontrados.")
     except Exception as e:
         print(f"Não foi possível buscar logos da Brapi: {e}. Os logos ficarão em branco.")
@@ -327,19 +325,54 @@ def extrair_dados_yfinance():
     else:
         print("Nenhum logo novo precisou ser atribuído pelo mapeamento.")
 
+    return logo_map
+
+def extrair_dados_yfinance(provider=None, logo_map: dict | None = None,
+                           max_workers: int | None = None, requisicoes_por_segundo: float | None = None):
+    """
+    Extrai, filtra e processa dados de ativos da B3 usando yfinance, mas busca o logo da API Brapi.
+
+    As consultas `.info` são feitas em paralelo pelo motor de coleta (`fetcher.py`),
+    com número de workers e taxa de requisições configuráveis.
+
+    Args:
+        provider: Provedor de cotações (padrão: `get_provider()`). Qualquer objeto com
+            `get_info(ticker_yf)` e `get_logos()` pode ser usado, inclusive um provedor falso.
+        logo_map (dict): Mapa ticker -> logo. Se None, os logos são buscados na Brapi (`provider.get_logos()`).
+        max_workers (int): Número de consultas simultâneas.
+        requisicoes_por_segundo (float): Limite de taxa das consultas.
+    """
+    print("Iniciando extração de dados...")
+    start_time = time.time()
+    provider = provider or get_provider()
+
+    # 1. Buscar logos da API Brapi
+    if logo_map is None:
+        logo_map = buscar_logos_brapi(provider)
+
     try:
         # 2. Processar tickers com yfinance
-        tickers = [ticker for ticker in MAPEAMENTO_COMPLETO_TICKERS.keys() if ticker not in TICKERS_A_REMOVER]
+        # O provedor sintético traz o próprio universo de tickers (ver providers.py)
+        mapeamento = getattr(provider, 'mapeamento_b3', None) or MAPEAMENTO_COMPLETO_TICKERS
+        tickers = [ticker for ticker in mapeamento.keys() if ticker not in TICKERS_A_REMOVER]
 
         dados = []
         tickers_nao_mapeados = set() # Set to collect all tickers not added to acoes_e_fundos
 
         print("Processando tickers com yfinance...")
-        for ticker in tickers:
-            ticker_yf = f"{ticker}.SA"
+        resultados = coletar_em_paralelo(
+            tickers,
+            lambda ticker: provider.get_info(f"{ticker}.SA"),
+            max_workers=max_workers,
+            requisicoes_por_segundo=requisicoes_por_segundo,
+            descricao="Consultando .info",
+        )
+        for resultado in resultados:
+            ticker = resultado.chave
             try:
-                yf_ticker = yf.Ticker(ticker_yf)
-                info = yf_ticker.info
+                if not resultado.ok:
+                    raise resultado.erro
+                info = resultado.valor
 
                 empresa = info.get('longName') or info.get('shortName') or f"{ticker} - Não Especificado"
                 setor_gl = info.get('sector', 'Indefinido')
@@ -359,12 +392,12 @@ def extrair_dados_yfinance():
                     'setor_gl': setor_gl,
                     'tipo': tipo
                 })
-
-                time.sleep(0.1)
             except Exception as e:
                 print(f"⚠️ Erro ao processar {ticker} com yfinance: {e}")
                 tickers_nao_mapeados.add(ticker) # Add to non-mapped list
                 continue
+
+        resumir_latencias(resultados)
         
         if not dados:
             print("❌ Nenhum ativo encontrado via yfinance.")
@@ -378,7 +411,8 @@ def extrair_dados_yfinance():
         df_ativos = pd.DataFrame(dados)
 
         # 3. Mapear setores
-        df_ativos = mapear_setores_b3(df_ativos)
+        with metricas.span('transformacao'):
+            df_ativos = mapear_setores_b3(df_ativos, mapeamento)
 
         # Adicionar tickers com setor indefinido aos não mapeados
         indefinidos = df_ativos[df_ativos['setor_b3'] == 'Indefinido']['ticker'].tolist()
@@ -414,5 +448,10 @@ def extrair_dados_yfinance():
         print(f"ERRO: Ocorreu um erro inesperado no processamento principal: {e}")
         return None
 
-if __name__ == "__main__":
+def main():
+    """Ponto de entrada usado pelo loader.py."""
     extrair_dados_yfinance()
+
+
+if __name__ == "__main__":
+    main()
@@ -7,81 +7,178 @@ dos últimos 7 anos para uma lista de tickers da B3.
 
 Etapas do Processo:
 1.  Lê os tickers do arquivo Parquet gerado anteriormente.
-2.  Para cada ticker, consulta a API do Yahoo Finance.
-3.  Filtra os dividendos para manter apenas os dos últimos 7 anos.
-4.  Normaliza as datas e consolida os dados.
-5.  Salva o resultado final em formato Parquet.
-6.  Exibe o progresso e informa sobre tickers com erros.
+2.  Lê o histórico já consolidado na camada trusted ('todos_dividendos') e
+    identifica a última data ex conhecida de cada ticker (modo incremental).
+3.  Para cada ticker, consulta a API do Yahoo Finance apenas a partir dessa
+    data; tickers sem histórico são buscados por completo.
+4.  Filtra os dividendos para manter apenas os dos últimos 7 anos.
+5.  Normaliza as datas e consolida os dados.
+6.  Salva o histórico completo ('todos_dividendos') e apenas os eventos novos
+    ('todos_dividendos_novos') em formato Parquet. Na recarga completa, grava
+    em vez do delta o marcador 'todos_dividendos_recarga.json', que faz a
+    carga (02-carga_incremental.py) reescrever todas as partições.
+7.  Exibe o progresso e informa sobre tickers com erros.
+
+Uso:
+    python 02-dividendos.py                  # incremental (padrão)
+    python 02-dividendos.py --full-refresh   # recarrega o histórico completo
 """
+import json
+import os
+import sys
 import warnings
-from pathlib import Path
 
 import pandas as pd
-import yfinance as yf
-from tqdm.auto import tqdm
 
 # Importa as utilidades comuns do pipeline
-from common import get_tickers, save_to_parquet
+from common import LAND_DW_DIR, TRUSTED_DW_DIR, get_tickers, save_to_parquet
+from fetcher import coletar_em_paralelo
+from providers import get_provider
 
 # Ignora avisos de FutureWarning para manter o output limpo
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
-# --- Leitura e Preparação dos Tickers ---
-tickers = get_tickers()
-
-# --- Definição do Período de Busca ---
-# Define o intervalo de 7 anos a partir da data atual
-start_date = (pd.Timestamp.now() - pd.DateOffset(years=7)).strftime('%Y-%m-%d')
-end_date = pd.Timestamp.now().strftime('%Y-%m-%d')
-print(f"Buscando dividendos de {start_date} a {end_date}.")
-
-# Lista para armazenar os dataframes de dividendos de cada ativo
-todos_dividendos = []
-erros = []
-
-# Itera sobre a lista de tickers com uma barra de progresso
-for ticker in tqdm(tickers, desc="Coletando dividendos (7 anos)"):
-    ticker_yf = f"{ticker}.SA"
-    try:
-        # Obtém a série temporal de dividendos diretamente para o período
-        dividendos = yf.Ticker(ticker_yf).dividends
-
-        # Processamento e filtro dos dados
-        if not dividendos.empty:
-            df_div = dividendos.reset_index()
-            
-            if len(df_div.columns) == 2:
-                df_div.columns = ['data', 'valor']
-            else:
-                print(f"Formato inesperado de dividendos para {ticker_yf}: {df_div.columns}")
-                continue
-
-            df_div['data'] = pd.to_datetime(df_div['data']).dt.tz_localize(None)
-            df_div['ticker'] = ticker  # Adiciona o ticker original (sem .SA)
-            
-            # Filtra os dividendos para o período de 7 anos definido
-            df_div = df_div[(df_div['data'] >= start_date) & (df_div['data'] <= end_date)]
-
-            if not df_div.empty:
-                todos_dividendos.append(df_div)
-            
-    except Exception as e:
-        erros.append((ticker, e))
-
-# --- Consolidação e Salvamento dos Dados ---
-if todos_dividendos:
-    print("\nConsolidando dados...")
-    # Concatena a lista de dataframes em um único dataframe final
-    df_final = pd.concat(todos_dividendos, ignore_index=True)
-    
-    # Salva o resultado em um arquivo Parquet
-    save_to_parquet(df_final, "todos_dividendos")
-    
-    print(f"{len(df_final)} registros de dividendos processados.")
-else:
-    print("Nenhum dividendo encontrado para os tickers e período informados.")
-    
-if erros:
-    print("\n--- Tickers com Erro ---")
-    for ticker_err, erro_msg in erros:
-        print(f"{ticker_err}: {erro_msg}")
\ No newline at end of file
+# --- Dependências no Pipeline (lidas pelo loader.py, ver dag.py) ---
+ENTRADAS = ["acoes_e_fundos"]
+SAIDAS = ["todos_dividendos", "todos_dividendos_novos"]
+DADOS_EXTERNOS = True
+
+# Força a recarga completa (também via variável de ambiente BUSSOLA_DIVIDENDOS_FULL=1)
+FULL_REFRESH = '--full-refresh' in sys.argv or os.environ.get('BUSSOLA_DIVIDENDOS_FULL') == '1'
+
+# Lido (e removido) pela carga incremental, que então substitui todas as partições
+MARCADOR_RECARGA = LAND_DW_DIR / "todos_dividendos_recarga.json"
+
+
+def carregar_historico_existente(start_date: str) -> pd.DataFrame:
+    """
+    Lê o histórico de dividendos da camada trusted, restrito à janela de 7 anos.
+    O histórico fica particionado por ano (trusted_dw/todos_dividendos/ano=YYYY/),
+    e só as partições da janela são lidas; o arquivo único antigo ainda é aceito.
+    Retorna um DataFrame vazio se o histórico não existir.
+    """
+    particoes_path = TRUSTED_DW_DIR / "todos_dividendos"
+    trusted_path = TRUSTED_DW_DIR / "todos_dividendos.parquet"
+    if particoes_path.is_dir():
+        historico = pd.read_parquet(
+            particoes_path, columns=['data', 'valor', 'ticker'],
+            filters=[('ano', '>=', pd.Timestamp(start_date).year)],
+        )
+    elif trusted_path.exists():
+        historico = pd.read_parquet(trusted_path, columns=['data', 'valor', 'ticker'])
+    else:
+        print(f"Histórico '{particoes_path.name}' não encontrado na trusted. Executando carga completa.")
+        return pd.DataFrame(columns=['data', 'valor', 'ticker'])
+
+    historico['data'] = pd.to_datetime(historico['data']).astype('datetime64[ns]')
+    return historico[historico['data'] >= start_date]
+
+
+def normalizar_dividendos(dividendos: pd.Series, ticker: str) -> pd.DataFrame | None:
+    """Converte a série do yfinance no formato (data, valor, ticker)."""
+    if dividendos is None or dividendos.empty:
+        return None
+    df_div = dividendos.reset_index()
+
+    if len(df_div.columns) != 2:
+        print(f"Formato inesperado de dividendos para {ticker}.SA: {df_div.columns}")
+        return None
+
+    df_div.columns = ['data', 'valor']
+    df_div['data'] = pd.to_datetime(df_div['data']).dt.tz_localize(None).astype('datetime64[ns]')
+    df_div['ticker'] = ticker  # Adiciona o ticker original (sem .SA)
+    return df_div
+
+
+def coletar_dividendos(provider, ticker: str, ultima: pd.Timestamp | None,
+                       start_date: str, end_date: str) -> pd.DataFrame | None:
+    """Busca apenas os eventos posteriores à última data ex conhecida do ticker."""
+    inicio = (ultima + pd.Timedelta(days=1)).strftime('%Y-%m-%d') if ultima is not None else None
+    df_div = normalizar_dividendos(provider.get_dividends(f"{ticker}.SA", start=inicio), ticker)
+    if df_div is None:
+        return None
+
+    # Filtra os dividendos para o período de 7 anos e descarta eventos já conhecidos
+    df_div = df_div[(df_div['data'] >= start_date) & (df_div['data'] <= end_date)]
+    if ultima is not None:
+        df_div = df_div[df_div['data'] > ultima]
+    return df_div if not df_div.empty else None
+
+
+def main():
+    """Coleta (de forma incremental) e salva o histórico de dividendos dos tickers."""
+    # --- Leitura e Preparação dos Tickers ---
+    tickers = get_tickers()
+    provider = get_provider()
+
+    # --- Definição do Período de Busca ---
+    # Define o intervalo de 7 anos a partir da data atual
+    start_date = (pd.Timestamp.now() - pd.DateOffset(years=7)).strftime('%Y-%m-%d')
+    end_date = pd.Timestamp.now().strftime('%Y-%m-%d')
+    print(f"Buscando dividendos de {start_date} a {end_date}.")
+
+    # --- Histórico Existente (Modo Incremental) ---
+    if FULL_REFRESH:
+        print("Modo: recarga completa (--full-refresh).")
+        historico = pd.DataFrame(columns=['data', 'valor', 'ticker'])
+    else:
+        historico = carregar_historico_existente(start_date)
+        historico = historico[historico['ticker'].isin(tickers)]
+        print(f"Modo: incremental ({historico['ticker'].nunique()} tickers com histórico).")
+
+    ultima_data = historico.groupby('ticker')['data'].max().to_dict()
+
+    # Itera sobre a lista de tickers com uma barra de progresso
+    resultados = coletar_em_paralelo(
+        tickers,
+        lambda ticker: coletar_dividendos(provider, ticker, ultima_data.get(ticker), start_date, end_date),
+        descricao="Coletando dividendos (7 anos)",
+    )
+    novos_dividendos = [r.valor for r in resultados if r.ok and r.valor is not None]
+    erros = [(r.chave, r.erro) for r in resultados if not r.ok]
+
+    # --- Consolidação e Salvamento dos Dados ---
+    df_novos = (
+        pd.concat(novos_dividendos, ignore_index=True)
+        if novos_dividendos else pd.DataFrame(columns=['data', 'valor', 'ticker'])
+    )
+    partes = [df for df in (historico, df_novos) if not df.empty]
+
+    if partes:
+        print("\nConsolidando dados...")
+        # Concatena o histórico com os eventos novos, mantendo a ordem dos tickers e das datas
+        df_final = pd.concat(partes, ignore_index=True)
+        ordem_tickers = {ticker: i for i, ticker in enumerate(tickers)}
+        df_final = (
+            df_final.assign(_ordem=df_final['ticker'].map(ordem_tickers))
+            .sort_values(['_ordem', 'data'], kind='stable')
+            .drop(columns='_ordem')
+            .reset_index(drop=True)
+        )
+
+        # Salva o resultado em um arquivo Parquet
+        save_to_parquet(df_final, "todos_dividendos")
+
+        # Os eventos novos alimentam o merge incremental da carga (02-carga_incremental.py).
+        # Na recarga completa o delta é removido e o marcador faz a carga reescrever todos os anos.
+        delta_path = LAND_DW_DIR / "todos_dividendos_novos.parquet"
+        if FULL_REFRESH:
+            delta_path.unlink(missing_ok=True)
+            MARCADOR_RECARGA.write_text(
+                json.dumps({'gerado_em': pd.Timestamp.now().isoformat(), 'linhas': len(df_final)}), encoding='utf-8'
+            )
+        else:
+            save_to_parquet(df_novos, "todos_dividendos_novos")
+
+        print(f"{len(df_final)} registros de dividendos processados ({len(df_novos)} novos).")
+    else:
+        print("Nenhum dividendo encontrado para os tickers e período informados.")
+
+    if erros:
+        print("\n--- Tickers com Erro ---")
+        for ticker_err, erro_msg in erros:
+            print(f"{ticker_err}: {erro_msg}")
+
+
+if __name__ == "__main__":
+    main()
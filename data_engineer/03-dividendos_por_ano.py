@@ -18,32 +18,43 @@ import pandas as pd
 from pathlib import Path
 
 # Importa as utilidades comuns do pipeline
-from common import LAND_DW_DIR, save_to_parquet
+from common import LAND_DW_DIR, ler_artefato, save_to_parquet
+
+# --- Dependências no Pipeline (lidas pelo loader.py, ver dag.py) ---
+ENTRADAS = ["todos_dividendos"]
+SAIDAS = ["dividendos_ano"]
 
 # --- Configuração de Caminhos ---
 input_path = LAND_DW_DIR / 'todos_dividendos.parquet'
 
-# --- Leitura e Processamento dos Dados ---
-print(f"Lendo: {input_path.name}")
-try:
-    df = pd.read_parquet(input_path)
-except FileNotFoundError:
-    print(f"Erro: Arquivo não encontrado: '{input_path}'.")
-    print("Execute '02-dividendos.py' antes de continuar.")
-    exit()
 
+def main():
+    """Agrega o histórico de dividendos por ticker e ano."""
+    # --- Leitura e Processamento dos Dados ---
+    print(f"Lendo: {input_path.name}")
+    try:
+        df = ler_artefato("todos_dividendos")
+    except FileNotFoundError:
+        print(f"Erro: Arquivo não encontrado: '{input_path}'.")
+        print("Execute '02-dividendos.py' antes de continuar.")
+        return
+
+
+    # Converte a coluna 'data' para o formato datetime e extrai o ano
+    print("Agregando dividendos por ano...")
+    df['data'] = pd.to_datetime(df['data'])
+    df['ano'] = df['data'].dt.year
+
+    # Renomeia a coluna de valor para clareza
+    df = df.rename(columns={'valor': 'dividendo'})
 
-# Converte a coluna 'data' para o formato datetime e extrai o ano
-print("Agregando dividendos por ano...")
-df['data'] = pd.to_datetime(df['data'])
-df['ano'] = df['data'].dt.year
+    # Agrupa por 'ano' e 'ticker' e soma os dividendos anuais
+    soma_por_ano_ticker = df.groupby(['ano', 'ticker'])['dividendo'].sum().reset_index()
 
-# Renomeia a coluna de valor para clareza
-df = df.rename(columns={'valor': 'dividendo'})
+    # --- Salvamento do Resultado ---
+    save_to_parquet(soma_por_ano_ticker, 'dividendos_ano')
+    print(f"Agregação anual concluída.")
 
-# Agrupa por 'ano' e 'ticker' e soma os dividendos anuais
-soma_por_ano_ticker = df.groupby(['ano', 'ticker'])['dividendo'].sum().reset_index()
 
-# --- Salvamento do Resultado ---
-save_to_parquet(soma_por_ano_ticker, 'dividendos_ano')
-print(f"Agregação anual concluída.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,9 @@
 """
 >> Script para Coleta de Preços Históricos de Ações
 
-Este script busca os preços de fechamento ajustados de uma lista de tickers
-da B3, utilizando a biblioteca yfinance, e gera dois arquivos de saída em Parquet:
+Este script atualiza o armazém de histórico diário (OHLCV, ver ohlcv.py) com
+os preços ajustados de uma lista de tickers da B3, utilizando a biblioteca
+yfinance, e gera a partir dele dois arquivos de saída em Parquet:
 
 1.  `precos_acoes_completo.parquet`: Contém o preço de fechamento do último dia
     de cada ano para os últimos 7 anos.
@@ -12,22 +13,93 @@ da B3, utilizando a biblioteca yfinance, e gera dois arquivos de saída em Parqu
 Etapas do Processo:
 - Lê a lista de tickers do arquivo Parquet.
 - Adiciona o sufixo '.SA' aos tickers para consulta no yfinance.
-- Baixa o histórico de preços dos últimos 7 anos.
+- Atualiza o armazém OHLCV de forma incremental (só os pregões novos) e lê
+  dele os fechamentos dos últimos 7 anos.
 - Processa os dados para extrair os preços de fechamento anuais e o atual/mensal.
-- Salva os dois DataFrames resultantes em arquivos Parquet.
+- Salva os dois DataFrames resultantes em arquivos Parquet, além da cobertura
+  do armazém (`ohlcv_cobertura`), lida pelas etapas que usam o histórico.
 """
 
+import numpy as np
 import pandas as pd
-import yfinance as yf
 from datetime import date
 import warnings
-from pathlib import Path
-from tqdm.auto import tqdm
+import metricas
 from common import get_tickers, save_to_parquet
+from ohlcv import OHLCVStore
+from providers import get_provider
 
 # Ignora avisos de FutureWarning para manter o output limpo
 warnings.simplefilter(action='ignore', category=FutureWarning)
 
+# --- Dependências no Pipeline (lidas pelo loader.py, ver dag.py) ---
+ENTRADAS = ["acoes_e_fundos"]
+SAIDAS = ["precos_acoes_completo", "precos_acoes", "ohlcv_cobertura"]
+DADOS_EXTERNOS = True
+
+
+def processar_fechamentos(df_closes: pd.DataFrame, lista_tickers: list, hoje: date,
+                          anos_anteriores: int = 7) -> tuple[pd.DataFrame, pd.DataFrame] | tuple[None, None]:
+    """
+    Extrai os preços anuais e o resumo atual/1M/6M da matriz de fechamentos
+    (datas x tickers '.SA') com operações sobre o DataFrame inteiro.
+
+    O último fechamento de cada ano vem de um agrupamento anual com `last()`
+    (que ignora NaN) e os preços de 1 e 6 meses atrás de um as-of vetorizado
+    (forward-fill + busca binária na data de referência), equivalente a
+    `Series.asof` por ticker.
+
+    Args:
+        df_closes (pd.DataFrame): Fechamentos ajustados, uma coluna por ticker '.SA'.
+        lista_tickers (list): Tickers sem sufixo, na ordem de saída.
+        hoje (date): Data de referência.
+        anos_anteriores (int): O número de anos a serem analisados no histórico.
+
+    Returns:
+        tuple: (df_completo, df_resumido) ou (None, None) se nenhum ticker tiver dados.
+    """
+    tickers_sa = [f"{t.upper()}.SA" for t in lista_tickers]
+    # Tickers ausentes no download viram colunas vazias e são descartados abaixo
+    closes = df_closes.reindex(columns=tickers_sa)
+    com_dados = closes.notna().any().to_numpy()
+    for ticker in np.asarray(lista_tickers, dtype=object)[~com_dados]:
+        print(f"Nenhum dado para {ticker}. Pulando.")
+    if not com_dados.any():
+        return None, None
+
+    closes = closes.loc[:, com_dados]
+    tickers = np.asarray(lista_tickers, dtype=object)[com_dados]
+
+    # As-of vetorizado: após o forward-fill, a linha da última data <= referência
+    # contém o último valor válido de cada ticker
+    preenchido = closes.ffill().to_numpy()
+    fechamento_atual = preenchido[-1]
+
+    def _asof(referencia: pd.Timestamp) -> np.ndarray:
+        pos = closes.index.searchsorted(referencia, side='right') - 1
+        return preenchido[pos] if pos >= 0 else np.full(len(tickers), np.nan)
+
+    data_ref = pd.to_datetime(hoje)
+    df_resumido = pd.DataFrame({
+        'ticker': tickers,
+        'fechamento_atual': fechamento_atual,
+        'fechamento_1m_atras': _asof(data_ref - pd.DateOffset(months=1)),
+        'fechamento_6m_atras': _asof(data_ref - pd.DateOffset(months=6)),
+    })
+
+    # Último fechamento válido de cada ano (anos sem pregão ficam NaN)
+    anos = [hoje.year - (j + 1) for j in range(anos_anteriores)]
+    fechamentos_anuais = closes.groupby(closes.index.year).last().reindex(anos).to_numpy()
+
+    # Uma linha para o ano corrente (preço atual) seguida dos anos anteriores, por ticker
+    valores = np.column_stack([fechamento_atual, fechamentos_anuais.T])
+    df_completo = pd.DataFrame({
+        'ticker': np.repeat(tickers, len(anos) + 1),
+        'ano': np.tile(np.array([hoje.year] + anos, dtype='int64'), len(tickers)),
+        'fechamento': valores.ravel(),
+    })
+    return df_completo, df_resumido
+
 def gerar_tabela_comparativa_precos(lista_tickers: list, anos_anteriores: int = 7) -> tuple[pd.DataFrame, pd.DataFrame] | tuple[None, None]:
     """
     Busca o preço de fechamento ajustado para uma lista de tickers e gera duas tabelas:
@@ -47,69 +119,34 @@ def gerar_tabela_comparativa_precos(lista_tickers: list, anos_anteriores: int =
         hoje = date.today()
         ano_inicio = hoje.year - anos_anteriores
 
-        # Define as datas de referência para 1 e 6 meses atrás
-        data_1_mes_atras = pd.to_datetime(hoje) - pd.DateOffset(months=1)
-        data_6_meses_atras = pd.to_datetime(hoje) - pd.DateOffset(months=6)
-
-        print(f"Baixando dados para {len(tickers_sa)} ativos...")
-        # Baixa os dados de uma vez para otimizar as requisições
-        hist = yf.download(tickers_sa, start=f"{ano_inicio}-01-01", end=hoje, auto_adjust=True, progress=False)
-
-        if hist.empty:
-            print("Nenhum dado histórico retornado pelo yfinance.")
+        print(f"Atualizando o histórico diário de {len(tickers_sa)} ativos...")
+        # Baixa em lote só os pregões que ainda não estão no armazém
+        store = OHLCVStore()
+        with metricas.span('coleta', tickers=len(tickers_sa)):
+            resumo = store.atualizar(tickers_sa, inicio=f"{ano_inicio}-01-01", provider=get_provider())
+        print(f"Armazém OHLCV: {len(resumo['incrementais'])} incrementais, {len(resumo['completos'])} novos, "
+              f"{len(resumo['refeitos'])} reajustados por proventos, {len(resumo['sem_dados'])} sem dados.")
+
+        # Fechamentos até ontem, como no download com `end=hoje`
+        closes = store.fechamentos(tickers_sa, inicio=f"{ano_inicio}-01-01", fim=hoje)
+        if closes.empty:
+            print("Nenhum dado histórico no armazém OHLCV.")
             return None, None
 
-        df_closes = hist['Close']
-        lista_completa, lista_resumida = [], []
-
-        # Itera sobre os tickers para processar os preços
-        for ticker, ticker_sa in tqdm(list(zip(lista_tickers, tickers_sa)), desc="Processando preços por ticker"):
-            col = df_closes.get(ticker_sa)
-            if col is None or col.dropna().empty:
-                print(f"Nenhum dado para {ticker}. Pulando.")
-                continue
-
-            # Preço de fechamento mais recente
-            fechamento_atual = col.dropna().iloc[-1]
-
-            # Busca os preços de 1 e 6 meses atrás usando .asof()
-            fechamento_1M_atras = col.asof(data_1_mes_atras)
-            fechamento_6M_atras = col.asof(data_6_meses_atras)
-
-            # Adiciona os novos campos ao dicionário da lista resumida
-            lista_resumida.append({
-                'ticker': ticker,
-                'fechamento_atual': fechamento_atual,
-                'fechamento_1m_atras': fechamento_1M_atras,
-                'fechamento_6m_atras': fechamento_6M_atras
-            })
-            
-            lista_completa.append({'ticker': ticker, 'ano': hoje.year, 'fechamento': fechamento_atual})
-
-            # Preços de fechamento dos anos anteriores
-            for j in range(anos_anteriores):
-                ano_alvo = hoje.year - (j + 1)
-                try:
-                    fechamento_ano = df_closes.loc[str(ano_alvo), ticker_sa].dropna().iloc[-1]
-                except (KeyError, IndexError):
-                    fechamento_ano = None
-                lista_completa.append({'ticker': ticker, 'ano': ano_alvo, 'fechamento': fechamento_ano})
-
-        if not lista_completa:
+        with metricas.span('transformacao'):
+            df_completo, df_resumido = processar_fechamentos(closes, lista_tickers, hoje, anos_anteriores)
+        if df_completo is None:
             print("Nenhum resultado processado.")
             return None, None
-
-        # Cria os DataFrames a partir das listas
-        df_completo = pd.DataFrame(lista_completa)
-        df_resumido = pd.DataFrame(lista_resumida) # Não setar o index aqui
         return df_completo, df_resumido
 
     except Exception as e:
         print(f"Erro inesperado: {e}")
         return None, None
 
-# --- Bloco de Execução Principal ---
-if __name__ == "__main__":
+
+def main():
+    """Coleta os preços e salva as tabelas completa (anual) e resumida."""
     print("Iniciando coleta de preços...")
     ativos_alvo = get_tickers()
 
@@ -130,6 +167,9 @@ if __name__ == "__main__":
             tabela_resumida['fechamento_6m_atras'] = tabela_resumida['fechamento_6m_atras'].round(2)
             save_to_parquet(tabela_resumida, "precos_acoes")
 
+            # Janela do histórico diário disponível para as etapas seguintes
+            save_to_parquet(OHLCVStore().cobertura(), "ohlcv_cobertura")
+
             print(f"\nOK Coleta de preços concluída:")
             print(f"   - Ativos: {len(tabela_resumida)}")
             print(f"   - Período: {anos_para_analise} anos")
@@ -138,4 +178,9 @@ if __name__ == "__main__":
         else:
             print("\nERRO Falha ao gerar tabelas de preços.")
     else:
-        print("\nAVISO Nenhum ativo para processar. Verifique a execução de '01-acoes_e_fundos.py'.")
\ No newline at end of file
+        print("\nAVISO Nenhum ativo para processar. Verifique a execução de '01-acoes_e_fundos.py'.")
+
+
+# --- Bloco de Execução Principal ---
+if __name__ == "__main__":
+    main()
@@ -6,25 +6,35 @@ Script para Coleta de Indicadores Financeiros via yfinance + ta
 Indicadores Coletados:
 - Fundamentais: Preço Atual, P/L, P/VP, ROE, Payout, Crescimento 5a, Dívida, EBITDA, Dívida/EBITDA, Perfil da Ação
 - Sentimento de Mercado (recomendações)
-- Técnicos (somente 1 ano, via ta): RSI(14), MACD(hist) e Volume (último)
+- Técnicos (somente 1 ano): RSI(14), MACD(hist) e Volume (último)
 
+Cada ticker é consultado uma única vez (`.info` e recomendações), em
+paralelo. O histórico de 5 anos vem do armazém OHLCV atualizado pela etapa
+05 (ver ohlcv.py), lido de uma vez para todos os tickers, sem acessar a rede.
+Crescimento, recorte de 1 ano, técnicos e ciclo de mercado são calculados
+para todos os tickers de uma vez sobre a matriz de preços (ver tecnicos.py,
+com as mesmas definições do `ta`).
 """
 
+import numpy as np
 import pandas as pd
-import yfinance as yf
-from tqdm.auto import tqdm
 import random
-import time
 from pathlib import Path
-from common import LAND_DW_DIR, save_to_parquet
+import metricas
+from common import LAND_DW_DIR, ler_artefato, save_to_parquet
+from fetcher import coletar_em_paralelo, resumir_latencias
+from ohlcv import OHLCVStore
+from providers import get_provider
+from tecnicos import calcular_tecnicos, classificar_ciclo, recortar_anos
 
-# Indicadores técnicos via ta
-from ta.momentum import RSIIndicator
-from ta.trend import MACD
+# --- Dependências no Pipeline (lidas pelo loader.py, ver dag.py) ---
+ENTRADAS = ["acoes_e_fundos", "ohlcv_cobertura"]
+SAIDAS = ["indicadores", "ciclo_mercado"]
+DADOS_EXTERNOS = True
 
 # --- Configurações ---
 CAMINHO_ARQUIVO_ENTRADA = LAND_DW_DIR / "acoes_e_fundos.parquet"
-PERIODO_PADRAO_HIST = "1y"
+ANOS_HIST_COMPLETO = 5
 
 # --- Frases por ciclo de mercado ---
 frases_por_ciclo = {
@@ -50,13 +60,11 @@ frases_por_ciclo = {
 
 # --- Funções de Classificação e Cálculo ---
 
-def get_pl_ratio(ticker: str) -> str:
+def get_pl_ratio(info: dict) -> str:
     """
-    Obtém o índice P/L (Preço/Lucro) via yfinance (TTM).
+    Obtém o índice P/L (Preço/Lucro) TTM a partir do `.info` já coletado.
     """
     try:
-        stock = yf.Ticker(f"{ticker}.SA")
-        info = stock.info
         pl_ratio = info.get('trailingPE')
         if pl_ratio is not None and pl_ratio > 0:
             return f"{pl_ratio:.2f}"
@@ -77,10 +85,9 @@ def classify_stock_profile(price: float, market_cap: float) -> str:
         return "Small Cap"
     return "Micro Cap"
 
-def get_market_sentiment(ticker_obj: yf.Ticker) -> dict:
+def get_market_sentiment(recommendations: pd.DataFrame | None) -> dict:
     sentiment_data = {'sentimento_gauge': 50.0, 'strong_buy': 0, 'buy': 0, 'hold': 0, 'sell': 0, 'strong_sell': 0}
     try:
-        recommendations = ticker_obj.recommendations_summary
         if recommendations is None or recommendations.empty:
             return sentiment_data
         latest_rec = recommendations.iloc[-1]
@@ -98,94 +105,74 @@ def get_market_sentiment(ticker_obj: yf.Ticker) -> dict:
         pass
     return sentiment_data
 
-def compute_indicadores_ta(hist: pd.DataFrame) -> dict:
-    out = {"rsi_14_1y": None, "macd_diff_1y": None, "volume_1y": None}
-    if hist is None or hist.empty:
-        return out
-    close = hist.get("Close")
-    volume = hist.get("Volume")
-    try:
-        if close is not None and not close.dropna().empty and len(close.dropna()) >= 15:
-            rsi_series = RSIIndicator(close=close, window=14, fillna=False).rsi()
-            val = rsi_series.iloc[-1]
-            out["rsi_14_1y"] = float(val) if pd.notna(val) else None
-    except Exception:
-        pass
-    try:
-        if close is not None and not close.dropna().empty and len(close.dropna()) >= (26 + 9):
-            macd = MACD(close=close, window_slow=26, window_fast=12, window_sign=9, fillna=False)
-            diff = macd.macd_diff().iloc[-1]
-            out["macd_diff_1y"] = float(diff) if pd.notna(diff) else None
-    except Exception:
-        pass
-    try:
-        if volume is not None and not volume.dropna().empty:
-            out["volume_1y"] = float(volume.iloc[-1]) if pd.notna(volume.iloc[-1]) else None
-    except Exception:
-        pass
-    return out
+def calcular_tecnicos_historico(closes_5y: pd.DataFrame, volumes_5y: pd.DataFrame) -> pd.DataFrame:
+    """
+    Crescimento do preço em 5 anos e técnicos do último ano (RSI(14), MACD(hist)
+    e último volume) de todos os tickers (colunas das matrizes) de uma vez.
+    O recorte de 1 ano é feito a partir da última data de cada ticker, como
+    em `history(period="1y")`.
+    """
+    colunas_saida = ['crescimento_preco_5a', 'rsi_14_1y', 'macd_diff_1y', 'volume_1y']
+    if closes_5y.empty:
+        return pd.DataFrame(columns=colunas_saida, index=closes_5y.columns, dtype='float64')
+    valores = closes_5y.to_numpy(dtype='float64')
+    valido = ~np.isnan(valores)
+    colunas = np.arange(valores.shape[1])
+    primeiro = valores[np.argmax(valido, axis=0), colunas]
+    ultimo = valores[len(valores) - 1 - np.argmax(valido[::-1], axis=0), colunas]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crescimento = np.where((valido.sum(axis=0) > 1) & (primeiro > 0), (ultimo / primeiro - 1) * 100, np.nan)
+    # As recorrências só percorrem as datas do último ano de algum ticker
+    tecnicos = calcular_tecnicos(recortar_anos(closes_5y, 1).dropna(how='all'), volumes_5y)
+    return pd.DataFrame({
+        'crescimento_preco_5a': crescimento,
+        'rsi_14_1y': tecnicos['rsi'].to_numpy(),
+        'macd_diff_1y': tecnicos['macd'].to_numpy(),
+        'volume_1y': tecnicos['volume'].to_numpy(),
+    }, index=closes_5y.columns)
 
-def classificar_indicador_tecnico(valor: float, lim_baixo: float, lim_alto: float, tipo: str) -> str:
-    if pd.isna(valor):
-        return "N/A"
-    v = float(valor)
-    if tipo == "RSI":
-        if v < lim_baixo: return "Baixo"
-        elif v > lim_alto: return "Alto"
-        else: return "Medio"
-    elif tipo == "MACD":
-        if v < lim_baixo: return "Baixa"
-        elif v > lim_alto: return "Alta"
-        else: return "Neutra"
-    elif tipo == "Volume":
-        if v < lim_baixo: return "Fraco"
-        elif v > lim_alto: return "Forte"
-        else: return "Normal"
-    return "N/A"
-
-def classificar_ciclo_mercado(score: float) -> str:
-    if pd.isna(score): return "Neutro / Transição"
-    if score <= 30: return "Pânico / Fundo"
-    elif score <= 60: return "Neutro / Transição"
-    else: return "Euforia / Topo"
-
-def calcular_dados_ciclo(rsi_val, macd_val, vol_val, vol_mean) -> dict:
-    rsi_status = classificar_indicador_tecnico(rsi_val, 30, 70, "RSI")
-    macd_status = classificar_indicador_tecnico(macd_val, -0.5, 0.5, "MACD")
-    vol_status = classificar_indicador_tecnico(vol_val, vol_mean * 0.8, vol_mean * 1.2, "Volume")
-    score_total = 0
-    for cls in (rsi_status, macd_status, vol_status):
-        if any(key in str(cls) for key in ["Baixo", "Fraco"]): score_total += 10
-        elif any(key in str(cls) for key in ["Medio", "Normal"]): score_total += 33
-        elif any(key in str(cls) for key in ["Alto", "Forte"]): score_total += 100
-    score_medio = round(score_total / 3)
-    ciclo = classificar_ciclo_mercado(score_medio)
-    frase = random.choice(frases_por_ciclo[ciclo])
-    return {
-        "ciclo_de_mercado": ciclo,
-        "status_ciclo": frase["status"],
-        "frase_ciclo": f"“{frase['frase']}” — {frase['autor']}"
-    }
+def calcular_ciclos(tecnicos: pd.DataFrame, vol_mean: float) -> pd.DataFrame:
+    """Ciclo de mercado, status e frase de cada ticker (linhas de `tecnicos`)."""
+    ciclos = classificar_ciclo(tecnicos['rsi_14_1y'], tecnicos['macd_diff_1y'], tecnicos['volume_1y'], vol_mean)
+    frases = [random.choice(frases_por_ciclo[ciclo]) for ciclo in ciclos['ciclo_de_mercado']]
+    return pd.DataFrame({
+        "ciclo_de_mercado": ciclos['ciclo_de_mercado'].to_numpy(),
+        "status_ciclo": [frase["status"] for frase in frases],
+        "frase_ciclo": [f"“{frase['frase']}” — {frase['autor']}" for frase in frases],
+    }, index=tecnicos.index)
+
+def sem_nan(valores: dict) -> dict:
+    """Troca NaN por None, como nos valores ausentes do cálculo por ticker."""
+    return {chave: (None if pd.isna(valor) else float(valor)) for chave, valor in valores.items()}
 
 NOME_EMPRESA_MANUAL = {
     "BRST3": "Brisanet Serviços de Telecomunicações S.A"
 }
 
-def fetch_stock_data(ticker_base: str, metadata: dict, vol_mean: float, p_l_externo: str | None) -> dict | None:
+def fetch_stock_data(ticker_base: str, provider) -> dict | None:
+    """
+    Faz a coleta remota de um ticker em uma única passada: `.info` e o resumo
+    de recomendações. Os fundamentais são derivados depois, a partir deste
+    payload; o histórico vem do armazém OHLCV.
+    """
     ticker_yf = f"{ticker_base}.SA"
-    stock = yf.Ticker(ticker_yf)
     try:
-        info = stock.info
+        info = provider.get_info(ticker_yf)
     except Exception:
         return None
     if not info:
         return None
-    hist_5y = stock.history(period="5y")
-    growth_price = None
-    if not hist_5y.empty and len(hist_5y["Close"]) > 1 and hist_5y["Close"].iloc[0] > 0:
-        growth_price = ((hist_5y["Close"].iloc[-1] / hist_5y["Close"].iloc[0]) - 1) * 100
-    hist_1y = stock.history(period=PERIODO_PADRAO_HIST)
-    tecnicos = compute_indicadores_ta(hist_1y)
+    try:
+        recommendations = provider.get_recommendations(ticker_yf)
+    except Exception:
+        recommendations = None
+    return {"info": info, "recommendations": recommendations}
+
+def calcular_indicadores(ticker_base: str, metadata: dict, payload: dict, tecnicos: dict, dados_ciclo: dict) -> dict:
+    """Calcula os fundamentais a partir do payload coletado e junta técnicos e ciclo de mercado."""
+    info = payload["info"]
+    tecnicos = sem_nan(tecnicos)
+    growth_price = tecnicos.pop("crescimento_preco_5a")
     current_price = info.get("currentPrice")
     market_cap = info.get("marketCap", metadata.get("market_cap", 0))
 
@@ -215,7 +202,6 @@ def fetch_stock_data(ticker_base: str, metadata: dict, vol_mean: float, p_l_exte
             margem_seguranca_percent = round(margem_seguranca * 100, 2)
         except (ValueError, TypeError):
             pass
-    dados_ciclo = calcular_dados_ciclo(tecnicos.get('rsi_14_1y'), tecnicos.get('macd_diff_1y'), tecnicos.get('volume_1y'), vol_mean)
     resultado = {
         "ticker": ticker_base,
         "empresa": empresa,
@@ -224,7 +210,7 @@ def fetch_stock_data(ticker_base: str, metadata: dict, vol_mean: float, p_l_exte
         "market_cap": market_cap,
         "logo": metadata.get("logo"),
         "preco_atual": current_price,
-        "p_l": p_l_externo,
+        "p_l": get_pl_ratio(info),
         "p_vp": info.get("priceToBook"),
         "payout_ratio": payout_ratio * 100 if payout_ratio else None,
         "crescimento_preco_5a": growth_price,
@@ -240,7 +226,7 @@ def fetch_stock_data(ticker_base: str, metadata: dict, vol_mean: float, p_l_exte
         "lpa": lpa,
         "vpa": vpa,
         "margem_seguranca_percent": margem_seguranca_percent,
-        **get_market_sentiment(stock),
+        **get_market_sentiment(payload["recommendations"]),
         **tecnicos,
     }
     resultado.update(dados_ciclo)
@@ -254,56 +240,63 @@ def main():
     print("Coleta de Indicadores Financeiros")
     print("="*80)
 
-    if not CAMINHO_ARQUIVO_ENTRADA.exists():
+    print(f"Lendo tickers de: {CAMINHO_ARQUIVO_ENTRADA.name}")
+    try:
+        df_input = ler_artefato("acoes_e_fundos")
+    except FileNotFoundError:
         print(f"Erro: Arquivo de entrada não encontrado: {CAMINHO_ARQUIVO_ENTRADA}")
         print("Execute '01-acoes_e_fundos.py' antes de continuar.")
         return
 
-    print(f"Lendo tickers de: {CAMINHO_ARQUIVO_ENTRADA.name}")
-    df_input = pd.read_parquet(CAMINHO_ARQUIVO_ENTRADA)
     df_input["ticker_norm"] = df_input["ticker"].str.strip().str.upper()
     metadata_map = df_input.set_index("ticker_norm").to_dict(orient="index")
     total_tickers = len(metadata_map)
     print(f"{total_tickers} tickers encontrados.")
 
-    print("\nColetando P/L para todos os tickers...")
-    pl_map = {}
-    with tqdm(total=total_tickers, desc="P/L", bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]") as pbar:
-        for ticker_base in metadata_map.keys():
-            pl_map[ticker_base] = get_pl_ratio(ticker_base)
-            pbar.update(1)
-            time.sleep(0.1)
-    print("P/L coletado.")
-
-    print("\nCalculando média de volume...")
-    all_volumes = []
-    for ticker_base in metadata_map.keys():
-        try:
-            hist_1y = yf.Ticker(f"{ticker_base}.SA").history(period=PERIODO_PADRAO_HIST)
-            if not hist_1y.empty and 'Volume' in hist_1y.columns:
-                all_volumes.append(hist_1y['Volume'].iloc[-1])
-        except Exception:
-            continue
-    vol_mean = pd.Series(all_volumes).mean() if all_volumes else 0
-    print("Média de volume calculada.")
-
-    print("\nColetando indicadores fundamentalistas e técnicos...")
+    print(f"\nCalculando técnicos do histórico de {ANOS_HIST_COMPLETO} anos (armazém OHLCV)...")
+    tickers_base = list(metadata_map.keys())
+    inicio_hist = pd.Timestamp.today().normalize() - pd.DateOffset(years=ANOS_HIST_COMPLETO)
+    with metricas.span('transformacao', calculo='tecnicos'):
+        matrizes = OHLCVStore().matrizes([f"{t}.SA" for t in tickers_base], ['close', 'volume'], inicio=inicio_hist)
+        tecnicos = calcular_tecnicos_historico(matrizes['close'], matrizes['volume'])
+    tecnicos.index = [ticker.removesuffix('.SA') for ticker in tecnicos.index]
+    tecnicos = tecnicos.reindex(tickers_base)
+    print(f"Histórico disponível para {tecnicos['volume_1y'].notna().sum()} de {total_tickers} tickers.")
+
+    print("\nColetando .info e recomendações em uma única passada...")
+    provider = get_provider()
+    coletas = coletar_em_paralelo(
+        tickers_base,
+        lambda ticker_base: fetch_stock_data(ticker_base, provider),
+        descricao="Coleta",
+    )
+    resumir_latencias(coletas)
+
+    # A média de volume depende de todos os tickers coletados, por isso é
+    # calculada depois da coleta e antes da classificação do ciclo de mercado.
+    coletados = [coleta.chave for coleta in coletas if coleta.ok and coleta.valor]
+    volumes = tecnicos.loc[coletados, 'volume_1y'].dropna()
+    vol_mean = volumes.mean() if not volumes.empty else 0
+    ciclos = calcular_ciclos(tecnicos.loc[coletados], vol_mean)
+    print("Média de volume e ciclos de mercado calculados.")
+
+    print("\nCalculando indicadores fundamentalistas...")
     resultados = []
     erros = []
-    with tqdm(total=total_tickers, desc="Indicadores", bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}]") as pbar:
-        for ticker_base, meta in metadata_map.items():
-            try:
-                p_l_externo = pl_map.get(ticker_base)
-                dados = fetch_stock_data(ticker_base, meta, vol_mean, p_l_externo)
-                if dados:
-                    resultados.append(dados)
-                else:
-                    erros.append((ticker_base, "Dados não retornados pelo fetcher"))
-            except Exception as e:
-                erros.append((ticker_base, str(e).replace('\n', ' ')))
-            finally:
-                pbar.update(1)
-                time.sleep(0.2)
+    for coleta in coletas:
+        ticker_base = coleta.chave
+        try:
+            if not coleta.ok:
+                raise coleta.erro
+            if coleta.valor:
+                resultados.append(calcular_indicadores(
+                    ticker_base, metadata_map[ticker_base], coleta.valor,
+                    tecnicos.loc[ticker_base].to_dict(), ciclos.loc[ticker_base].to_dict(),
+                ))
+            else:
+                erros.append((ticker_base, "Dados não retornados pelo fetcher"))
+        except Exception as e:
+            erros.append((ticker_base, str(e).replace('\n', ' ')))
 
     print("\n" + "="*80)
     print("Resumo da Execução")
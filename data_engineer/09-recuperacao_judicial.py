@@ -11,6 +11,10 @@ import pandas as pd
 from pathlib import Path
 from common import save_to_parquet
 
+# --- Dependências no Pipeline (lidas pelo loader.py, ver dag.py) ---
+ENTRADAS = []
+SAIDAS = ["rj"]
+
 # Critérios de inclusão:
 # - A empresa entrou em recuperação judicial ou extrajudicial formalmente reconhecida.
 # - Inclui empresas que concluíram o processo, estão em RJ ativa, ou faliram.
@@ -115,15 +119,6 @@ empresas_recuperadas = [
     {"nome": "Abyara Planejamento Imobiliário S.A.", "ticker": None, "setor": "Incorporação e Construção", "data_entrada_rj": "2024-04-01", "data_saida_rj": None, "data_falencia": None}
 ]
 
-df_rj = pd.DataFrame(empresas_recuperadas)
-
-# --- INÍCIO DA SEÇÃO PARA CÁLCULO DA DURAÇÃO ---
-
-# Converte as colunas de data para o formato datetime, tratando erros como 'NaT' (Not a Time)
-df_rj['data_entrada_rj'] = pd.to_datetime(df_rj['data_entrada_rj'], errors='coerce')
-df_rj['data_saida_rj'] = pd.to_datetime(df_rj['data_saida_rj'], errors='coerce')
-df_rj['data_falencia'] = pd.to_datetime(df_rj['data_falencia'], errors='coerce')
-
 def calcular_duracao(row):
     """
     Calcula a duração do processo de RJ.
@@ -157,16 +152,32 @@ def calcular_duracao(row):
     else:
         return 'Em Andamento'
 
-# Aplica a função para criar a nova coluna 'duracao_rj'
-df_rj['duracao_rj'] = df_rj.apply(calcular_duracao, axis=1)
 
-# --- FIM DA SEÇÃO DE CÁLCULO ---
+def main():
+    """Monta a tabela de recuperações judiciais e calcula a duração de cada processo."""
+    df_rj = pd.DataFrame(empresas_recuperadas)
+
+    # --- INÍCIO DA SEÇÃO PARA CÁLCULO DA DURAÇÃO ---
+
+    # Converte as colunas de data para o formato datetime, tratando erros como 'NaT' (Not a Time)
+    df_rj['data_entrada_rj'] = pd.to_datetime(df_rj['data_entrada_rj'], errors='coerce')
+    df_rj['data_saida_rj'] = pd.to_datetime(df_rj['data_saida_rj'], errors='coerce')
+    df_rj['data_falencia'] = pd.to_datetime(df_rj['data_falencia'], errors='coerce')
+
+    # Aplica a função para criar a nova coluna 'duracao_rj'
+    df_rj['duracao_rj'] = df_rj.apply(calcular_duracao, axis=1)
+
+    # --- FIM DA SEÇÃO DE CÁLCULO ---
+
+    # --- Salvamento ---
+    save_to_parquet(df_rj, "rj")
+
+    print(f"Dados de recuperação judicial processados.")
 
-# --- Salvamento ---
-save_to_parquet(df_rj, "rj")
+    # Imprime as 5 primeiras linhas para verificação
+    print("\nAmostra dos dados:")
+    print(df_rj[['nome', 'setor', 'data_entrada_rj', 'duracao_rj']].head().to_string())
 
-print(f"Dados de recuperação judicial processados.")
 
-# Imprime as 5 primeiras linhas para verificação
-print("\nAmostra dos dados:")
-print(df_rj[['nome', 'setor', 'data_entrada_rj', 'duracao_rj']].head().to_string())
\ No newline at end of file
+if __name__ == "__main__":
+    main()
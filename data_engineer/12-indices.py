@@ -5,15 +5,29 @@
 - Busca os valores de fechamento anual dos principais índices (via ETFs) nos últimos 5 anos.
 - Calcula indicadores técnicos (RSI, MACD, Volume).
 - Gera um arquivo Parquet consolidado.
+
+Todos os índices vêm de um único download em lote (`provider.download`); os
+fechamentos de fim de ano e os indicadores técnicos são calculados de uma vez
+para todos eles. A lista de índices pode ser trocada pela variável de ambiente
+BUSSOLA_INDICES ("BOVA11.SA=iShares Ibovespa,SMAL11.SA=Small Caps,...").
 """
-import yfinance as yf
+import os
 import pandas as pd
 from datetime import datetime
-from ta.momentum import RSIIndicator
-from ta.trend import MACD
+import metricas
 from common import save_to_parquet
+from ohlcv import separar_por_ticker
+from providers import get_provider
+from tecnicos import MINIMO_MACD, calcular_tecnicos
+
+# --- Dependências no Pipeline (lidas pelo loader.py, ver dag.py) ---
+ENTRADAS = []
+SAIDAS = ["indices"]
+DADOS_EXTERNOS = True
 
-indices = {
+ANOS_HISTORICO = 5
+
+INDICES_PADRAO = {
     "BOVA11.SA": "iShares Ibovespa",
     "SMAL11.SA": "Small Caps",
     "FIND11.SA": "Financeiro (ETF)",
@@ -21,74 +35,129 @@ indices = {
     "DIVO11.SA": "Dividendos"
 }
 
-def compute_indicadores_tecnicos(hist: pd.DataFrame) -> dict:
-    """Calcula RSI, MACD e Volume para um histórico de dados."""
-    indicadores = {'rsi': None, 'macd': None, 'volume': None}
-    if hist.empty or len(hist) < 35:
-        return indicadores
-
-    close = hist['Close']
-    indicadores['rsi'] = RSIIndicator(close=close, window=14).rsi().iloc[-1]
-    indicadores['macd'] = MACD(close=close, window_slow=26, window_fast=12, window_sign=9).macd_diff().iloc[-1]
-    indicadores['volume'] = hist['Volume'].iloc[-1] if 'Volume' in hist.columns and not hist['Volume'].empty else None
-    
-    return {k: round(v, 2) if v is not None else None for k, v in indicadores.items()}
-
-def get_annual_closing(index_code, index_name):
-    ticker = yf.Ticker(index_code)
-    hist = ticker.history(period="5y", auto_adjust=True)
-    if hist.empty:
-        return pd.DataFrame()
-   
-    hist.reset_index(inplace=True)
-    hist['year'] = pd.to_datetime(hist['Date']).dt.year
-    
-    tecnicos = compute_indicadores_tecnicos(hist)
-    annual = pd.DataFrame()
+
+def carregar_indices(config: str | None = None) -> dict[str, str]:
+    """
+    Índices a coletar ({código: nome}). `config` (ou BUSSOLA_INDICES) lista
+    pares "CÓDIGO=Nome" separados por vírgula; sem nome, usa o código sem '.SA'.
+    """
+    config = config if config is not None else os.environ.get("BUSSOLA_INDICES", "")
+    if not config.strip():
+        return dict(INDICES_PADRAO)
+    indices = {}
+    for item in config.split(","):
+        codigo, _, nome = item.partition("=")
+        codigo = codigo.strip().upper()
+        if codigo:
+            indices[codigo] = nome.strip() or codigo.removesuffix(".SA")
+    return indices
+
+
+indices = carregar_indices()
+
+
+def baixar_historicos(codigos: list[str], provider) -> pd.DataFrame:
+    """
+    Histórico de todos os índices em um único download, no formato longo:
+    colunas 'codigo', 'Date', 'Close' e 'Volume', ordenado por código e data.
+    """
+    hist = provider.download(codigos, period=f"{ANOS_HISTORICO}y", auto_adjust=True, progress=False)
+    partes = []
+    for codigo, df in separar_por_ticker(hist, codigos).items():
+        df = df.dropna(subset=['Close'])
+        if df.empty:
+            continue
+        datas = pd.DatetimeIndex(df.index)
+        partes.append(pd.DataFrame({
+            'codigo': codigo,
+            'Date': datas.tz_localize(None) if datas.tz is not None else datas,
+            'Close': df['Close'].to_numpy(),
+            'Volume': df['Volume'].to_numpy() if 'Volume' in df.columns else None,
+        }))
+    if not partes:
+        return pd.DataFrame({'codigo': pd.Series(dtype=object), 'Date': pd.Series(dtype='datetime64[ns]'),
+                             'Close': pd.Series(dtype=float), 'Volume': pd.Series(dtype=float)})
+    return pd.concat(partes, ignore_index=True).sort_values(['codigo', 'Date'], kind='stable', ignore_index=True)
+
+
+def compute_indicadores_tecnicos(historicos: pd.DataFrame) -> pd.DataFrame:
+    """
+    RSI, MACD e último volume de cada índice (uma linha por código), calculados
+    sobre a matriz datas x índices. Índices com menos de `MINIMO_MACD` pregões
+    ficam sem indicadores.
+    """
+    closes = historicos.pivot(index='Date', columns='codigo', values='Close')
+    tecnicos = calcular_tecnicos(closes)[['rsi', 'macd', 'pregoes']]
+    tecnicos['volume'] = historicos.groupby('codigo')['Volume'].last()
+    suficientes = tecnicos.pop('pregoes') >= MINIMO_MACD
+    tecnicos = tecnicos.where(suficientes, other=None)
+    tecnicos[['rsi', 'macd']] = tecnicos[['rsi', 'macd']].astype('float64').round(2)
+    if suficientes.all():
+        tecnicos['volume'] = tecnicos['volume'].astype(historicos['Volume'].dtype)
+    return tecnicos
+
+
+def get_annual_closing(historicos: pd.DataFrame, tecnicos: pd.DataFrame, indices: dict[str, str]) -> pd.DataFrame:
+    """Último pregão de cada ano (nos últimos 5 anos) de cada índice, com os indicadores técnicos."""
     current_year = datetime.now().year
-    
-    for year in range(current_year - 4, current_year + 1):
-        year_data = hist[hist['year'] == year]
-        if not year_data.empty:
-            last_day = year_data[year_data['Date'] == year_data['Date'].max()]
-            if not last_day.empty:
-                last_day = last_day.copy()
-                last_day.loc[:, 'index'] = index_name
-                for key, value in tecnicos.items():
-                    last_day.loc[:, key] = value
-                
-                cols_to_keep = ['year', 'index', 'Close', 'rsi', 'macd', 'volume']
-                annual = pd.concat([annual, last_day[[c for c in cols_to_keep if c in last_day.columns]]], ignore_index=True)
-    
-    return annual[annual['year'] >= current_year - 5]
-
-def get_and_save_indices():
-    try:
-        all_data = pd.DataFrame()
-        print("Coletando dados dos índices da B3...\n")
+    anos = historicos['Date'].dt.year
+    recentes = historicos[anos.between(current_year - ANOS_HISTORICO + 1, current_year)].assign(year=anos)
+    fim_de_ano = recentes[recentes['Date'] == recentes.groupby(['codigo', 'year'])['Date'].transform('max')]
+
+    annual = fim_de_ano.merge(tecnicos, left_on='codigo', right_index=True, how='left')
+    annual['index'] = annual['codigo'].map(indices)
+    # Ordem da lista de índices e, em cada índice, dos anos
+    ordem = annual['codigo'].map({codigo: posicao for posicao, codigo in enumerate(indices)})
+    annual = annual.assign(_ordem=ordem).sort_values(['_ordem', 'year'], kind='stable', ignore_index=True)
+    return annual[['codigo', 'year', 'index', 'Close', 'rsi', 'macd', 'volume']]
+
+
+def coletar_indices(indices: dict[str, str], provider) -> pd.DataFrame:
+    """Tabela 'indices': fechamento de fim de ano e indicadores técnicos de cada índice."""
+    with metricas.span('coleta', indices=len(indices)):
+        historicos = baixar_historicos(list(indices), provider)
+    if historicos.empty:
         for code, name in indices.items():
-            print(f"  - {name} ({code})...")
-            df = get_annual_closing(code, name)
-            if df.empty:
-                print(f"    Dados não encontrados para {name}.")
-            else:
-                anos = df['year'].nunique()
-                if anos < 5:
-                    print(f"    Apenas {anos} anos disponíveis para {name}.")
-                else:
-                    print(f"    Dados de {name} coletados.")
-                all_data = pd.concat([all_data, df], ignore_index=True)
-                
+            print(f"  - {name} ({code}): dados não encontrados.")
+        return pd.DataFrame()
+    with metricas.span('transformacao'):
+        # Indicadores sobre todo o histórico baixado; fechamentos só dos últimos anos
+        tecnicos = compute_indicadores_tecnicos(historicos)
+        all_data = get_annual_closing(historicos, tecnicos, indices)
+
+    anos_por_indice = all_data.groupby('codigo')['year'].nunique()
+    for code, name in indices.items():
+        anos = anos_por_indice.get(code, 0)
+        if anos == 0:
+            print(f"  - {name} ({code}): dados não encontrados.")
+        elif anos < ANOS_HISTORICO:
+            print(f"  - {name} ({code}): apenas {anos} anos disponíveis.")
+        else:
+            print(f"  - {name} ({code}): dados coletados.")
+
+    all_data = all_data.drop(columns='codigo')
+    all_data.columns = [col.lower() for col in all_data.columns]
+    all_data['close'] = all_data['close'].round(2)
+    return all_data
+
+
+def get_and_save_indices(indices: dict[str, str] = indices, provider=None):
+    try:
+        print(f"Coletando dados dos índices da B3 ({len(indices)} em um único download)...\n")
+        all_data = coletar_indices(indices, provider or get_provider())
         if not all_data.empty:
-            all_data.columns = [col.lower() for col in all_data.columns]
-            all_data['close'] = all_data['close'].round(2)
             save_to_parquet(all_data, "indices")
             print(f"\nColeta de dados de índices concluída.")
         else:
             print("\nNenhum dado retornado para os índices.")
-   
+
     except Exception as e:
         print(f"\nErro inesperado: {e}")
 
+def main():
+    """Ponto de entrada usado pelo loader.py."""
+    get_and_save_indices()
+
+
 if __name__ == "__main__":
-    get_and_save_indices()
\ No newline at end of file
+    main()
@@ -1,7 +1,8 @@
 from datetime import datetime, timedelta, timezone
-import os
 import pandas as pd
 
+from common import save_to_parquet
+
 def get_utc_minus_3_time():
     """Retorna a data e hora atual no fuso horário UTC-3."""
     return datetime.now(timezone.utc) - timedelta(hours=3)
@@ -9,20 +10,13 @@ def get_utc_minus_3_time():
 def main():
     """
     Cria um arquivo parquet contendo a data e hora da última atualização da pipeline.
-    O arquivo é salvo no diretório 'duckdb/land_dw/'.
+    O arquivo é salvo no diretório 'duckdb/land_dw/' da raiz do projeto.
     """
-    output_dir = os.path.join('duckdb', 'land_dw')
-    os.makedirs(output_dir, exist_ok=True)
-    
-    output_path = os.path.join(output_dir, 'pipeline_datetime.parquet')
-    
     now_utc_minus_3 = get_utc_minus_3_time()
     
     df = pd.DataFrame([{'pipeline_datetime': now_utc_minus_3}])
     
-    df.to_parquet(output_path, index=False)
-    
-    print(f"Arquivo de data de atualização da pipeline salvo em: {output_path}")
+    save_to_parquet(df, 'pipeline_datetime')
 
 if __name__ == "__main__":
     main()
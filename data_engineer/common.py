@@ -6,12 +6,45 @@ Este arquivo centraliza constantes e funções utilitárias que são
 compartilhadas entre os diversos scripts do pipeline.
 """
 
+import atexit
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from pathlib import Path
+from typing import Any, Callable
+
 import pandas as pd
 
+import metricas
+
 # Define o diretório base 'data' para leitura dos arquivos
 DATA_DIR = Path(__file__).resolve().parent.parent / 'data'
 LAND_DW_DIR = Path(__file__).resolve().parent.parent / 'duckdb' / 'land_dw'
+TRUSTED_DW_DIR = Path(__file__).resolve().parent.parent / 'duckdb' / 'trusted_dw'
+
+# --- Cache de Respostas dos Provedores ---
+CACHE_PATH = Path(__file__).resolve().parent.parent / '.cache' / 'provider_cache.sqlite'
+
+# Tempo de vida (em segundos) das respostas, por endpoint. Os dados mudam no máximo uma vez por dia.
+CACHE_TTL_POR_ENDPOINT = {
+    'info': 12 * 3600,
+    'history': 12 * 3600,
+    'download': 12 * 3600,
+    'dividends': 24 * 3600,
+    'recommendations': 24 * 3600,
+    'logos': 24 * 3600,
+}
+CACHE_TTL_PADRAO = 12 * 3600
+CACHE_TAMANHO_MAXIMO = int(os.environ.get('BUSSOLA_CACHE_MAX_MB', '512')) * 1024 * 1024
+
+# Modo offline: as respostas são servidas apenas a partir do cache, sem acesso à rede.
+OFFLINE = '--offline' in sys.argv or os.environ.get('BUSSOLA_OFFLINE') == '1'
 
 def get_tickers() -> list:
     """
@@ -23,7 +56,7 @@ def get_tickers() -> list:
     parquet_path = LAND_DW_DIR / "acoes_e_fundos.parquet"
 
     try:
-        df = pd.read_parquet(parquet_path)
+        df = ler_artefato("acoes_e_fundos")
         if 'ticker' not in df.columns:
             print(f"Erro: A coluna 'ticker' não foi encontrada em {parquet_path}.")
             return []
@@ -59,13 +92,47 @@ def save_to_parquet(df: pd.DataFrame, file_name: str):
     LAND_DW_DIR.mkdir(parents=True, exist_ok=True)
     
     output_path = LAND_DW_DIR / f"{file_name}.parquet"
+
+    # Modo em processo: o DataFrame fica em memória e o Parquet é gravado em segundo plano
+    if _ARTEFATOS is not None:
+        _ARTEFATOS.salvar(file_name, df, output_path)
+        print(f"Arquivo salvo: {output_path.name}")
+        return
     
     try:
-        df.to_parquet(output_path, index=False)
+        _gravar_parquet(df, output_path)
         print(f"Arquivo salvo: {output_path.name}")
     except Exception as e:
         print(f"Erro ao salvar {output_path.name}: {e}")
 
+def _gravar_parquet(df: pd.DataFrame, caminho: Path, contexto: tuple | None = None) -> None:
+    """Grava o Parquet em um span 'gravacao', com as linhas e os bytes gravados (ver metricas.py)."""
+    with metricas.herdar(metricas.contexto() if contexto is None else contexto), \
+            metricas.span('gravacao', artefato=caminho.stem):
+        df.to_parquet(caminho, index=False)
+        metricas.contar('linhas_saida', len(df))
+        metricas.contar('bytes', caminho.stat().st_size)
+
+def ler_artefato(file_name: str) -> pd.DataFrame:
+    """
+    Lê um artefato da land_dw. No modo em processo do `loader.py`, devolve uma
+    cópia do DataFrame mantido em memória, sem decodificar o Parquet.
+
+    Args:
+        file_name (str): O nome do arquivo (sem a extensão).
+
+    Raises:
+        FileNotFoundError: Se o artefato não estiver em memória nem em disco.
+    """
+    if _ARTEFATOS is not None:
+        df = _ARTEFATOS.obter(file_name)
+        if df is not None:
+            metricas.contar('linhas_entrada', len(df))
+            return df
+    df = pd.read_parquet(LAND_DW_DIR / f"{file_name}.parquet")
+    metricas.contar('linhas_entrada', len(df))
+    return df
+
 def tratar_dados_para_json(df):
     """
     Prepara um DataFrame para ser salvo em JSON, tratando NaNs e Timestamps.
@@ -92,4 +159,203 @@ def tratar_dados_para_json(df):
     # Substitui todos os NaNs restantes por None
     df = df.where(pd.notnull(df), None)
 
-    return df
\ No newline at end of file
+    return df
+
+
+class ArtifactStore:
+    """
+    Armazena em memória os DataFrames produzidos pelas etapas executadas no
+    mesmo processo e grava os Parquets de forma assíncrona.
+
+    `salvar` e `obter` trabalham com cópias, de modo que uma etapa não enxerga
+    alterações feitas por outra. `flush` aguarda todas as gravações pendentes.
+    """
+
+    def __init__(self, max_workers: int = 2):
+        self._frames: dict[str, pd.DataFrame] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='parquet')
+        self._gravacoes: list[tuple[Path, Future]] = []
+        self._ultima_gravacao: dict[str, Future] = {}
+
+    def salvar(self, nome: str, df: pd.DataFrame, caminho: Path) -> None:
+        copia = df.copy()
+        with self._lock:
+            self._frames[nome] = copia
+            # A gravação em segundo plano fica no span de quem salvou (etapa/sub-etapa)
+            futuro = self._executor.submit(_gravar_parquet, copia, caminho, metricas.contexto())
+            self._gravacoes.append((caminho, futuro))
+            self._ultima_gravacao[nome] = futuro
+
+    def aguardar(self, nome: str) -> None:
+        """Bloqueia até que a última gravação do artefato termine (erros ficam para `flush`)."""
+        with self._lock:
+            futuro = self._ultima_gravacao.get(nome)
+        if futuro is not None:
+            wait([futuro])
+
+    def obter(self, nome: str) -> pd.DataFrame | None:
+        with self._lock:
+            df = self._frames.get(nome)
+        return df.copy() if df is not None else None
+
+    def flush(self) -> list[tuple[Path, Exception]]:
+        """Aguarda as gravações pendentes e retorna as que falharam."""
+        with self._lock:
+            pendentes, self._gravacoes = self._gravacoes, []
+        erros = []
+        for caminho, futuro in pendentes:
+            try:
+                futuro.result()
+            except Exception as e:
+                erros.append((caminho, e))
+        return erros
+
+
+_ARTEFATOS: ArtifactStore | None = None
+
+
+def ativar_artefatos_em_memoria() -> ArtifactStore:
+    """Ativa o armazenamento em memória usado por `save_to_parquet` e `ler_artefato`."""
+    global _ARTEFATOS
+    if _ARTEFATOS is None:
+        _ARTEFATOS = ArtifactStore()
+    return _ARTEFATOS
+
+
+class CacheOfflineMiss(LookupError):
+    """Levantada em modo offline quando a resposta não está no cache."""
+
+
+class ProviderCache:
+    """
+    Cache persistente (SQLite) das respostas brutas dos provedores de cotações.
+
+    Cada entrada é identificada por endpoint, ticker e parâmetros da chamada e
+    expira conforme o TTL do endpoint. Quando o tamanho total ultrapassa o
+    limite, as entradas acessadas há mais tempo são removidas.
+    """
+
+    def __init__(self, caminho: Path = CACHE_PATH, ttls: dict | None = None,
+                 tamanho_maximo: int = CACHE_TAMANHO_MAXIMO, offline: bool = OFFLINE):
+        self.caminho = Path(caminho)
+        self.ttls = CACHE_TTL_POR_ENDPOINT if ttls is None else ttls
+        self.tamanho_maximo = tamanho_maximo
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.caminho, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS respostas (
+                chave TEXT PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                ticker TEXT NOT NULL,
+                params TEXT NOT NULL,
+                criado_em REAL NOT NULL,
+                acessado_em REAL NOT NULL,
+                tamanho INTEGER NOT NULL,
+                valor BLOB NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def _chave(endpoint: str, ticker: str, params: dict) -> tuple[str, str]:
+        params_json = json.dumps(params, sort_keys=True, default=str)
+        chave = hashlib.sha256(f"{endpoint}|{ticker}|{params_json}".encode('utf-8')).hexdigest()
+        return chave, params_json
+
+    def get_or_fetch(self, endpoint: str, ticker: str, params: dict, fetch: Callable[[], Any]) -> Any:
+        """
+        Retorna a resposta em cache, se válida; caso contrário executa `fetch`
+        e armazena o resultado. Respostas vazias não são armazenadas.
+        """
+        chave, params_json = self._chave(endpoint, ticker, params)
+        agora = time.time()
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT criado_em, valor FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()
+            if linha is not None:
+                criado_em, valor = linha
+                if self.offline or agora - criado_em <= self.ttls.get(endpoint, CACHE_TTL_PADRAO):
+                    self._conn.execute("UPDATE respostas SET acessado_em = ? WHERE chave = ?", (agora, chave))
+                    self._conn.commit()
+                    self.hits += 1
+                    metricas.contar('cache_hits')
+                    return pickle.loads(valor)
+
+        if self.offline:
+            raise CacheOfflineMiss(f"Modo offline: '{endpoint}' de {ticker} não está no cache.")
+
+        self.misses += 1
+        resultado = fetch()
+        if _resposta_vazia(resultado):
+            return resultado
+
+        valor = pickle.dumps(resultado, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO respostas VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (chave, endpoint, ticker, params_json, agora, agora, len(valor), valor),
+            )
+            self._conn.commit()
+            self._evict()
+        return resultado
+
+    def _evict(self) -> None:
+        """Remove as entradas menos recentemente acessadas até respeitar o tamanho máximo."""
+        total = self._conn.execute("SELECT COALESCE(SUM(tamanho), 0) FROM respostas").fetchone()[0]
+        if total <= self.tamanho_maximo:
+            return
+        alvo = total - int(self.tamanho_maximo * 0.9)
+        removidos = 0
+        for chave, tamanho in self._conn.execute(
+            "SELECT chave, tamanho FROM respostas ORDER BY acessado_em ASC"
+        ).fetchall():
+            if removidos >= alvo:
+                break
+            self._conn.execute("DELETE FROM respostas WHERE chave = ?", (chave,))
+            removidos += tamanho
+        self._conn.commit()
+
+    def limpar(self) -> None:
+        """Apaga todas as entradas do cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM respostas")
+            self._conn.commit()
+
+    def resumo(self) -> str:
+        return f"Cache de cotações: {self.hits} hits, {self.misses} misses{' (offline)' if self.offline else ''}."
+
+
+def _resposta_vazia(resultado: Any) -> bool:
+    if resultado is None:
+        return True
+    if isinstance(resultado, (pd.DataFrame, pd.Series)):
+        return resultado.empty
+    if isinstance(resultado, dict):
+        return not resultado
+    return False
+
+
+_cache: ProviderCache | None = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> ProviderCache | None:
+    """
+    Retorna o cache compartilhado do processo, ou None se desativado
+    (variável de ambiente BUSSOLA_CACHE=0).
+    """
+    global _cache
+    if os.environ.get('BUSSOLA_CACHE') == '0' and not OFFLINE:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ProviderCache()
+            atexit.register(lambda: print(_cache.resumo()) if _cache.hits or _cache.misses else None)
+    return _cache
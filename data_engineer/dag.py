@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Grafo de dependências das etapas do pipeline.
+
+Cada script `NN-*.py` declara, no nível do módulo, os artefatos da land_dw
+que lê e grava (nomes sem a extensão '.parquet'):
+
+    ENTRADAS = ["precos_acoes", "dividendos_ano_resumo"]
+    SAIDAS = ["dividend_yield"]
+
+Etapas que buscam dados fora da land_dw (APIs, camada trusted) também
+declaram `DADOS_EXTERNOS = True`, o que impede que sejam puladas quando
+suas entradas não mudam (ver `manifesto.py`).
+
+As declarações são lidas com `ast`, sem importar o script. Uma etapa sem
+declarações funciona como barreira: espera todas as anteriores e todas as
+seguintes esperam por ela (ex.: '13-pipeline_datetime.py').
+"""
+
+import ast
+from dataclasses import dataclass, field
+from pathlib import Path
+
+
+@dataclass
+class Etapa:
+    """Uma etapa (script) do pipeline e seus artefatos declarados."""
+    script: Path
+    entradas: list[str] | None = None
+    saidas: list[str] | None = None
+    externa: bool = False
+    dependencias: set[str] = field(default_factory=set)
+
+    @property
+    def nome(self) -> str:
+        return self.script.name
+
+    @property
+    def barreira(self) -> bool:
+        return self.entradas is None and self.saidas is None
+
+
+def ler_declaracoes(script: Path) -> tuple[list[str] | None, list[str] | None, bool]:
+    """Lê as listas literais `ENTRADAS` e `SAIDAS` e o `DADOS_EXTERNOS` do script, se existirem."""
+    arvore = ast.parse(script.read_text(encoding='utf-8'), filename=str(script))
+    declaracoes = {}
+    for no in arvore.body:
+        if isinstance(no, ast.Assign) and len(no.targets) == 1 and isinstance(no.targets[0], ast.Name):
+            nome = no.targets[0].id
+            if nome in ('ENTRADAS', 'SAIDAS'):
+                try:
+                    declaracoes[nome] = list(ast.literal_eval(no.value))
+                except ValueError:
+                    raise ValueError(f"{script.name}: '{nome}' deve ser uma lista literal de nomes de artefatos.")
+            elif nome == 'DADOS_EXTERNOS':
+                declaracoes[nome] = bool(ast.literal_eval(no.value))
+    externa = declaracoes.pop('DADOS_EXTERNOS', False)
+    if not declaracoes:
+        return None, None, externa
+    return declaracoes.get('ENTRADAS', []), declaracoes.get('SAIDAS', []), externa
+
+
+def montar_grafo(scripts: list[Path]) -> dict[str, Etapa]:
+    """
+    Monta o grafo a partir dos scripts em ordem de nome de arquivo.
+
+    Uma etapa depende de uma anterior quando lê algo que ela grava, grava algo
+    que ela lê ou grava o mesmo artefato. Assim, o resultado de qualquer ordem
+    de execução compatível com o grafo é o mesmo da execução sequencial.
+    """
+    etapas: dict[str, Etapa] = {}
+    for script in scripts:
+        entradas, saidas, externa = ler_declaracoes(script)
+        atual = Etapa(script, entradas, saidas, externa)
+        for anterior in etapas.values():
+            if atual.barreira or anterior.barreira:
+                atual.dependencias.add(anterior.nome)
+                continue
+            leituras, escritas = set(atual.entradas), set(atual.saidas)
+            if (leituras & set(anterior.saidas)) or (escritas & set(anterior.entradas)) or (escritas & set(anterior.saidas)):
+                atual.dependencias.add(anterior.nome)
+        etapas[atual.nome] = atual
+    return etapas
+
+
+def caminho_critico(etapas: dict[str, Etapa], duracoes: dict[str, float]) -> tuple[list[str], float]:
+    """
+    Retorna a cadeia de dependências de maior duração total (o caminho
+    crítico) e essa duração, considerando apenas etapas com duração medida.
+    """
+    melhor: dict[str, tuple[float, list[str]]] = {}
+    for nome, etapa in etapas.items():  # já em ordem topológica (ordem de nome)
+        if nome not in duracoes:
+            continue
+        anteriores = [melhor[d] for d in etapa.dependencias if d in melhor]
+        base_tempo, base_caminho = max(anteriores, key=lambda x: x[0], default=(0.0, []))
+        melhor[nome] = (base_tempo + duracoes[nome], base_caminho + [nome])
+    if not melhor:
+        return [], 0.0
+    tempo, caminho = max(melhor.values(), key=lambda x: x[0])
+    return caminho, tempo
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de coleta concorrente para o pipeline de engenharia de dados.
+
+Executa chamadas de rede (ex.: `yf.Ticker(...).info`) em um pool de threads
+com número de workers configurável e um limitador de taxa do tipo
+*token bucket*, preservando a ordem de entrada e medindo a latência de
+cada chamada individualmente.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from tqdm.auto import tqdm
+
+import metricas
+
+# --- Configurações Padrão (podem ser sobrescritas por variáveis de ambiente) ---
+MAX_WORKERS_PADRAO = int(os.environ.get("BUSSOLA_MAX_WORKERS", "8"))
+REQUISICOES_POR_SEGUNDO_PADRAO = float(os.environ.get("BUSSOLA_REQUISICOES_POR_SEGUNDO", "10"))
+
+
+class TokenBucket:
+    """
+    Limitador de taxa thread-safe.
+
+    Acumula até `capacidade` fichas, repostas continuamente a `taxa` fichas
+    por segundo. Cada chamada a `acquire()` consome uma ficha, bloqueando
+    até que haja uma disponível. Uma taxa <= 0 desativa o limite.
+    """
+
+    def __init__(self, taxa: float, capacidade: float | None = None):
+        self.taxa = taxa
+        self.capacidade = capacidade if capacidade is not None else max(1.0, taxa)
+        self._fichas = self.capacidade
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.taxa <= 0:
+            return
+        while True:
+            with self._lock:
+                agora = time.monotonic()
+                self._fichas = min(self.capacidade, self._fichas + (agora - self._ultimo) * self.taxa)
+                self._ultimo = agora
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                espera = (1 - self._fichas) / self.taxa
+            time.sleep(espera)
+
+
+@dataclass
+class ResultadoColeta:
+    """Resultado de uma chamada individual do motor de coleta."""
+    chave: Any
+    valor: Any = None
+    erro: Exception | None = None
+    latencia: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.erro is None
+
+
+def coletar_em_paralelo(
+    chaves: Iterable,
+    funcao: Callable[[Any], Any],
+    max_workers: int | None = None,
+    requisicoes_por_segundo: float | None = None,
+    descricao: str | None = None,
+) -> list[ResultadoColeta]:
+    """
+    Aplica `funcao` a cada chave em um pool de threads com limite de taxa.
+
+    Exceções levantadas por `funcao` são capturadas e devolvidas no campo
+    `erro` do resultado, de modo que uma falha isolada não interrompe a coleta.
+    A coleta é registrada como um span 'coleta' (ver metricas.py), que recebe as
+    chamadas de rede e os acertos de cache contados pelas threads de trabalho.
+
+    Args:
+        chaves (Iterable): Itens a processar (ex.: tickers).
+        funcao (Callable): Função executada para cada chave.
+        max_workers (int): Número de threads simultâneas.
+        requisicoes_por_segundo (float): Taxa máxima de início de chamadas.
+        descricao (str): Texto da barra de progresso. Se None, a barra é omitida.
+
+    Returns:
+        list[ResultadoColeta]: Resultados na mesma ordem das chaves de entrada.
+    """
+    chaves = list(chaves)
+    max_workers = max_workers or MAX_WORKERS_PADRAO
+    taxa = REQUISICOES_POR_SEGUNDO_PADRAO if requisicoes_por_segundo is None else requisicoes_por_segundo
+    limitador = TokenBucket(taxa)
+
+    def _executar(chave, contexto: tuple) -> ResultadoColeta:
+        limitador.acquire()
+        inicio = time.perf_counter()
+        try:
+            with metricas.herdar(contexto):
+                valor = funcao(chave)
+            return ResultadoColeta(chave, valor=valor, latencia=time.perf_counter() - inicio)
+        except Exception as e:
+            return ResultadoColeta(chave, erro=e, latencia=time.perf_counter() - inicio)
+
+    resultados: list[ResultadoColeta | None] = [None] * len(chaves)
+    with metricas.span('coleta', chaves=len(chaves)) as span:
+        contexto = metricas.contexto()
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futuros = {executor.submit(_executar, chave, contexto): i for i, chave in enumerate(chaves)}
+            with tqdm(total=len(chaves), desc=descricao, disable=descricao is None) as pbar:
+                for futuro in as_completed(futuros):
+                    resultados[futuros[futuro]] = futuro.result()
+                    pbar.update(1)
+        span.atributos['falhas'] = sum(1 for r in resultados if not r.ok)
+    return resultados
+
+
+def resumir_latencias(resultados: list[ResultadoColeta], top: int = 5) -> None:
+    """Exibe estatísticas de latência (p50, p95, máx.) e as chaves mais lentas."""
+    if not resultados:
+        return
+    ordenados = sorted(resultados, key=lambda r: r.latencia)
+    latencias = [r.latencia for r in ordenados]
+
+    def _percentil(p: float) -> float:
+        return latencias[min(len(latencias) - 1, int(round(p * (len(latencias) - 1))))]
+
+    falhas = sum(1 for r in resultados if not r.ok)
+    print(
+        f"Latência por ticker: p50={_percentil(0.50):.2f}s | p95={_percentil(0.95):.2f}s | "
+        f"máx={latencias[-1]:.2f}s | chamadas={len(resultados)} | falhas={falhas}"
+    )
+    for r in reversed(ordenados[-top:]):
+        print(f"    - {r.chave}: {r.latencia:.2f}s{'' if r.ok else ' (erro)'}")
@@ -2,17 +2,56 @@
 """
 >> Script Orquestrador para Pipeline de Dados
 
-Executa os scripts de engenharia de dados em ordem, monitorando o tempo e o status.
+Executa os scripts de engenharia de dados monitorando o tempo e o status.
+
+As etapas declaram os artefatos que leem e gravam (ver `dag.py`); etapas
+independentes (ex.: dividendos, preços, indicadores, RJ e índices) rodam em
+paralelo, cada uma em seu próprio processo. Ao primeiro erro, nenhuma nova
+etapa é iniciada e as que estão em execução são encerradas.
+
+No modo `--em-processo`, as etapas são importadas e executadas como funções
+(`main()`) no próprio processo do loader: os DataFrames passam de uma etapa
+para outra pela memória (ver `ArtifactStore` em `common.py`) e os Parquets
+da land_dw são gravados em segundo plano, evitando releituras e o custo de
+iniciar Python/pandas/yfinance a cada etapa.
+
+Etapas cujas entradas e código não mudaram desde a última execução são
+puladas e mantêm a saída anterior (ver `manifesto.py`).
+
+Cada etapa registra um span 'etapa' (duração e status) no arquivo de métricas
+da execução, junto com os spans de coleta, transformação e gravação emitidos
+pela própria etapa (ver `metricas.py`).
+
+Uso:
+    python loader.py                 # paralelo (BUSSOLA_PIPELINE_WORKERS, padrão 4)
+    python loader.py --sequencial    # uma etapa por vez, em ordem de nome
+    python loader.py --em-processo   # etapas no mesmo processo, com handoff em memória
+    python loader.py --forcar        # executa todas as etapas, mesmo com entradas inalteradas
+    python loader.py --offline       # usa apenas o cache de cotações
 """
 
+import importlib
+import io
+import os
 import re
 import sys
 import time
 import subprocess
+import threading
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime
 from typing import List
 
+import metricas
+from dag import Etapa, caminho_critico, montar_grafo
+from manifesto import LAND_DW_DIR, Manifesto, hash_arquivo
+
+# Número máximo de etapas executadas simultaneamente
+MAX_ETAPAS_PARALELAS = int(os.environ.get("BUSSOLA_PIPELINE_WORKERS", "4"))
+
 
 def encontrar_scripts_ordenados(base_dir: Path) -> List[Path]:
     """Encontra e ordena os scripts a serem executados."""
@@ -29,6 +68,162 @@ def formatar_tempo(segundos: float) -> str:
         return f"{minutos}m {seg:02d}s"
     return f"{seg}s"
 
+
+@dataclass
+class ResultadoEtapa:
+    """Resultado da execução de uma etapa."""
+    nome: str
+    returncode: int
+    inicio: float
+    duracao: float
+    stderr: str = ""
+
+
+class ExecutorEtapas:
+    """Executa etapas em subprocessos, permitindo encerrar as que estão em andamento."""
+
+    def __init__(self, base_dir: Path):
+        self.base_dir = base_dir
+        self._processos: dict[str, subprocess.Popen] = {}
+        self._lock = threading.Lock()
+        self._cancelado = False
+
+    def executar(self, etapa: Etapa, t0: float) -> ResultadoEtapa:
+        inicio = time.perf_counter()
+        with metricas.span('etapa', etapa=etapa.nome, modo='subprocesso') as span:
+            with self._lock:
+                if self._cancelado:
+                    span.status = 'cancelada'
+                    return ResultadoEtapa(etapa.nome, -1, inicio - t0, 0.0, "Cancelada.")
+                processo = subprocess.Popen(
+                    [sys.executable, "-u", str(etapa.script)],
+                    cwd=self.base_dir,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    encoding='utf-8',
+                    errors='surrogateescape',
+                    # O processo da etapa registra os próprios spans sob este nome
+                    env={**os.environ, 'BUSSOLA_ETAPA': etapa.nome},
+                )
+                self._processos[etapa.nome] = processo
+            _, stderr = processo.communicate()
+            with self._lock:
+                self._processos.pop(etapa.nome, None)
+            span.status = 'ok' if processo.returncode == 0 else 'erro'
+            span.atributos['returncode'] = processo.returncode
+        return ResultadoEtapa(etapa.nome, processo.returncode, inicio - t0, time.perf_counter() - inicio, stderr or "")
+
+    def cancelar(self) -> list[str]:
+        """Impede novas execuções e encerra os processos ativos. Retorna os nomes encerrados."""
+        with self._lock:
+            self._cancelado = True
+            ativos = list(self._processos.items())
+        for _, processo in ativos:
+            processo.terminate()
+        return [nome for nome, _ in ativos]
+
+
+class _SaidaPorThread(io.TextIOBase):
+    """Encaminha o que cada thread escreve para o buffer da etapa que ela executa."""
+
+    def __init__(self, original):
+        self.original = original
+        self._local = threading.local()
+
+    def capturar(self, buffer: io.StringIO | None) -> None:
+        self._local.buffer = buffer
+
+    def write(self, texto: str) -> int:
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer if buffer is not None else self.original).write(texto)
+
+    def flush(self) -> None:
+        self.original.flush()
+
+
+class ExecutorEmProcesso:
+    """
+    Executa etapas importando o módulo e chamando `main()` no processo atual.
+
+    A saída de cada etapa é capturada (como no modo com subprocessos) e o
+    stderr/traceback é devolvido em caso de erro. Etapas já em execução não
+    podem ser interrompidas; `cancelar` apenas impede que novas comecem.
+    """
+
+    def __init__(self):
+        self._cancelado = False
+        self._stdout = _SaidaPorThread(sys.stdout)
+        self._stderr = _SaidaPorThread(sys.stderr)
+        sys.stdout, sys.stderr = self._stdout, self._stderr
+
+    def restaurar_saidas(self) -> None:
+        sys.stdout, sys.stderr = self._stdout.original, self._stderr.original
+
+    def executar(self, etapa: Etapa, t0: float) -> ResultadoEtapa:
+        inicio = time.perf_counter()
+        if self._cancelado:
+            return ResultadoEtapa(etapa.nome, -1, inicio - t0, 0.0, "Cancelada.")
+        saida, erros = io.StringIO(), io.StringIO()
+        self._stdout.capturar(saida)
+        self._stderr.capturar(erros)
+        returncode = 0
+        with metricas.span('etapa', etapa=etapa.nome, modo='em_processo') as span:
+            try:
+                modulo = importlib.import_module(etapa.script.stem)
+                if hasattr(modulo, 'main'):
+                    modulo.main()
+            except SystemExit as e:
+                returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception:
+                erros.write(traceback.format_exc())
+                returncode = 1
+            finally:
+                self._stdout.capturar(None)
+                self._stderr.capturar(None)
+            span.status = 'ok' if returncode == 0 else 'erro'
+            span.atributos['returncode'] = returncode
+        return ResultadoEtapa(etapa.nome, returncode, inicio - t0, time.perf_counter() - inicio, erros.getvalue())
+
+    def cancelar(self) -> list[str]:
+        self._cancelado = True
+        return []
+
+
+def registrar_ignorada(nome: str, motivo: str) -> None:
+    """Registra nas métricas uma etapa que não foi executada."""
+    with metricas.span('etapa', etapa=nome, motivo=motivo) as span:
+        span.status = 'ignorada'
+
+
+def imprimir_erro(resultado: ResultadoEtapa) -> None:
+    print(f"   (Código de erro: {resultado.returncode})")
+    if resultado.stderr:
+        print("-" * 15 + " Detalhes do Erro " + "-" * 15)
+        for line in resultado.stderr.strip().split('\n'):
+            print(f"    > {line}")
+        print("-" * (30 + len(" Detalhes do Erro ")))
+
+
+def imprimir_relatorio(etapas: dict[str, Etapa], resultados: dict[str, ResultadoEtapa], duracao_total: float) -> None:
+    """Exibe a linha do tempo de cada etapa e o caminho crítico da execução."""
+    if not resultados:
+        return
+    print("-" * 60)
+    print(">> Relatório de tempo por etapa")
+    for nome in etapas:
+        r = resultados.get(nome)
+        if r is None:
+            continue
+        status = "OK" if r.returncode == 0 else ("PARADA" if r.returncode < 0 else "ERRO")
+        print(f"   {status:<6} {nome:<32} | início +{r.inicio:7.1f}s | duração {r.duracao:7.1f}s")
+
+    duracoes = {nome: r.duracao for nome, r in resultados.items()}
+    caminho, tempo_critico = caminho_critico(etapas, duracoes)
+    soma = sum(duracoes.values())
+    print(f"   Soma das etapas: {soma:.1f}s | Tempo real: {duracao_total:.1f}s")
+    print(f"   Caminho crítico ({tempo_critico:.1f}s): {' -> '.join(caminho)}")
+
+
 def main() -> int:
     """Orquestra a execução de todo o pipeline de dados."""
     base_dir = Path(__file__).resolve().parent
@@ -41,6 +236,19 @@ def main() -> int:
     print("=" * 60)
     print(">> Iniciando Pipeline de Dados de Engenharia")
     print("=" * 60)
+    # Mesmo identificador de execução para o loader e os subprocessos das etapas
+    print(f"INFO: Métricas da execução em {metricas.arquivo_metricas(metricas.run_id())}")
+
+    # Modo offline: os scripts usam apenas as respostas já armazenadas no cache de cotações
+    if "--offline" in sys.argv:
+        os.environ["BUSSOLA_OFFLINE"] = "1"
+        print("INFO: Modo offline ativo (dados servidos apenas do cache).")
+
+    max_paralelas = 1 if "--sequencial" in sys.argv else max(1, MAX_ETAPAS_PARALELAS)
+    em_processo = "--em-processo" in sys.argv or os.environ.get("BUSSOLA_EM_PROCESSO") == "1"
+    etapas = montar_grafo(scripts_para_executar)
+    modo = "no mesmo processo" if em_processo else "em subprocessos"
+    print(f"INFO: {len(etapas)} etapas {modo}, até {max_paralelas} em paralelo.")
 
     # Obtém o dia da semana atual (0 = Segunda-feira, 1 = Terça, ..., 6 = Domingo)
     hoje_dia_semana = datetime.today().weekday()
@@ -48,56 +256,99 @@ def main() -> int:
     print(f"INFO: Hoje é {dias_semana[hoje_dia_semana]}.")
     print("-" * 60)
 
-
     tempo_inicio_total = time.perf_counter()
     falha = False
     interrupcao_manual = False
 
-    for script in scripts_para_executar:
-        print(f">> Executando: {script.name}...", end='', flush=True)
+    pendentes = list(etapas)
+    concluidas: set[str] = set()
+    resultados: dict[str, ResultadoEtapa] = {}
+    if em_processo:
+        from common import ativar_artefatos_em_memoria
+        artefatos = ativar_artefatos_em_memoria()
+        executor_etapas = ExecutorEmProcesso()
+    else:
+        executor_etapas = ExecutorEtapas(base_dir)
 
-        # Condição: Executar '01-acoes_e_fundos.py' apenas na segunda-feira (weekday() == 0)
-        if script.name == "01-acoes_e_fundos.py" and hoje_dia_semana != 0:
-            print('\r' + ' ' * 80 + '\r', end='') # Limpa a linha
-            print(f"INFO {script.name:<45} | Status: Ignorado (não é segunda-feira)")
-            continue
+    # Manifesto de hashes: etapas com entradas e código inalterados são puladas
+    manifesto = Manifesto()
+    usar_manifesto = "--forcar" not in sys.argv
+    impressoes: dict[str, dict] = {}
 
-        tempo_inicio_script = time.perf_counter()
+    def hashes_artefatos(nomes: list[str]) -> dict[str, str | None]:
+        if em_processo:
+            for artefato in nomes:
+                artefatos.aguardar(artefato)
+        return {artefato: hash_arquivo(LAND_DW_DIR / f"{artefato}.parquet") for artefato in nomes}
 
+    with ThreadPoolExecutor(max_workers=max_paralelas) as pool:
+        em_execucao = {}
         try:
-            processo = subprocess.run(
-                [sys.executable, "-u", str(script)],
-                cwd=base_dir,
-                capture_output=True,
-                encoding='utf-8',
-                errors='surrogateescape'
-            )
+            while pendentes or em_execucao:
+                # Dispara, em ordem de nome, as etapas cujas dependências já terminaram
+                for nome in list(pendentes):
+                    if falha or len(em_execucao) >= max_paralelas:
+                        break
+                    etapa = etapas[nome]
+                    if not etapa.dependencias <= concluidas:
+                        continue
+                    pendentes.remove(nome)
+
+                    # Condição: Executar '01-acoes_e_fundos.py' apenas na segunda-feira (weekday() == 0)
+                    if nome == "01-acoes_e_fundos.py" and hoje_dia_semana != 0:
+                        print(f"INFO {nome:<45} | Status: Ignorado (não é segunda-feira)")
+                        registrar_ignorada(nome, "não é segunda-feira")
+                        concluidas.add(nome)
+                        continue
+
+                    if not etapa.barreira and not etapa.externa:
+                        impressoes[nome] = Manifesto.impressao(etapa.script, hashes_artefatos(etapa.entradas))
+                        if usar_manifesto and manifesto.pode_pular(nome, impressoes[nome], hashes_artefatos(etapa.saidas)):
+                            print(f"INFO {nome:<45} | Status: Ignorado (entradas inalteradas)")
+                            registrar_ignorada(nome, "entradas inalteradas")
+                            concluidas.add(nome)
+                            continue
+
+                    print(f">> Iniciando: {nome}", flush=True)
+                    em_execucao[pool.submit(executor_etapas.executar, etapa, tempo_inicio_total)] = nome
+
+                if not em_execucao:
+                    break
+
+                finalizadas, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                for futuro in finalizadas:
+                    nome = em_execucao.pop(futuro)
+                    resultado = futuro.result()
+                    resultados[nome] = resultado
+                    if resultado.returncode == 0:
+                        concluidas.add(nome)
+                        if nome in impressoes:
+                            manifesto.registrar(nome, impressoes[nome], hashes_artefatos(etapas[nome].saidas))
+                        print(f"OK {nome:<45} | Duração: {formatar_tempo(resultado.duracao)}")
+                    elif not falha:
+                        print(f"ERRO {nome:<45} | Duração: {formatar_tempo(resultado.duracao)}")
+                        imprimir_erro(resultado)
+                        falha = True
+                        # Fail fast: encerra as etapas que ainda estão rodando
+                        for encerrada in executor_etapas.cancelar():
+                            print(f"AVISO Etapa encerrada devido ao erro: {encerrada}")
         except KeyboardInterrupt:
-            print('\r' + ' ' * 80 + '\r', end='')
-            print(f"AVISO  Execução interrompida pelo usuário no script: {script.name}")
+            executor_etapas.cancelar()
+            print(f"AVISO  Execução interrompida pelo usuário (etapas em execução: {', '.join(em_execucao.values()) or '-'})")
             interrupcao_manual = True
             falha = True
-            break
-
-        duracao_script = time.perf_counter() - tempo_inicio_script
-        
-        print('\r' + ' ' * 80 + '\r', end='')
-
-        if processo.returncode == 0:
-            print(f"OK {script.name:<45} | Duração: {formatar_tempo(duracao_script)}")
-        else:
-            print(f"ERRO {script.name:<45} | Duração: {formatar_tempo(duracao_script)}")
-            print(f"   (Código de erro: {processo.returncode})")
-            if processo.stderr:
-                print("-" * 15 + " Detalhes do Erro " + "-" * 15)
-                for line in processo.stderr.strip().split('\n'):
-                    print(f"    > {line}")
-                print("-" * (30 + len(" Detalhes do Erro ")))
+
+    if em_processo:
+        executor_etapas.restaurar_saidas()
+        # Garante que todos os Parquets da land_dw foram gravados antes de encerrar
+        for caminho, erro in artefatos.flush():
+            print(f"ERRO Falha ao gravar {caminho.name}: {erro}")
             falha = True
-            break
+    manifesto.salvar()
 
     duracao_total = time.perf_counter() - tempo_inicio_total
-    
+    imprimir_relatorio(etapas, resultados, duracao_total)
+
     print("-" * 60)
     if interrupcao_manual:
         print(f"PARADA Pipeline interrompido manualmente em {formatar_tempo(duracao_total)}.")
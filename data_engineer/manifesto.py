@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Manifesto de hashes de conteúdo dos artefatos da land_dw.
+
+Para cada etapa executada com sucesso, o loader registra a "impressão" das
+suas entradas (hash do próprio script, dos módulos locais de que ele
+depende, direta ou indiretamente, e de cada artefato lido) e o hash de
+cada artefato gravado. Na execução seguinte, uma etapa cuja impressão não
+mudou e cujas saídas continuam intactas em disco é pulada, mantendo a saída
+anterior (ex.: fins de semana e feriados, quando os preços não mudam).
+
+Etapas que buscam dados externos (`DADOS_EXTERNOS = True`) sempre executam.
+"""
+
+import ast
+import hashlib
+import json
+import os
+from pathlib import Path
+
+LAND_DW_DIR = Path(__file__).resolve().parent.parent / 'duckdb' / 'land_dw'
+MANIFESTO_PATH = LAND_DW_DIR / '_manifest.json'
+
+
+def hash_arquivo(caminho: Path) -> str | None:
+    """Retorna o SHA-256 do conteúdo do arquivo, ou None se ele não existir."""
+    if not caminho.exists():
+        return None
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def _importados(script: Path) -> set[str]:
+    """Nomes de primeiro nível importados pelo script (imports absolutos)."""
+    arvore = ast.parse(script.read_text(encoding='utf-8'), filename=str(script))
+    nomes = set()
+    for no in ast.walk(arvore):
+        if isinstance(no, ast.Import):
+            nomes.update(alias.name.split('.')[0] for alias in no.names)
+        elif isinstance(no, ast.ImportFrom) and no.module and not no.level:
+            nomes.add(no.module.split('.')[0])
+    return nomes
+
+
+def modulos_locais(script: Path) -> list[Path]:
+    """
+    Módulos da mesma pasta de que o script depende, direta ou indiretamente
+    (ex.: 'regras_score.py' e o que ele importa), em ordem de nome.
+    """
+    visitados: set[Path] = set()
+    pendentes = [script]
+    while pendentes:
+        atual = pendentes.pop()
+        for nome in _importados(atual):
+            modulo = script.parent / f"{nome}.py"
+            if modulo.exists() and modulo != script and modulo not in visitados:
+                visitados.add(modulo)
+                pendentes.append(modulo)
+    return sorted(visitados)
+
+
+class Manifesto:
+    """Registro persistente (JSON) das impressões de entrada e saída de cada etapa."""
+
+    def __init__(self, caminho: Path = MANIFESTO_PATH):
+        self.caminho = caminho
+        try:
+            self.dados = json.loads(caminho.read_text(encoding='utf-8'))
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.dados = {}
+        self.dados.setdefault('etapas', {})
+
+    @staticmethod
+    def impressao(script: Path, hashes_entradas: dict[str, str | None]) -> dict:
+        return {
+            'codigo': hash_arquivo(script),
+            'modulos': {m.name: hash_arquivo(m) for m in modulos_locais(script)},
+            'entradas': dict(sorted(hashes_entradas.items())),
+        }
+
+    def pode_pular(self, nome: str, impressao: dict, hashes_saidas: dict[str, str | None]) -> bool:
+        """
+        Indica se a etapa pode ser pulada: mesma impressão da última execução
+        bem-sucedida e saídas em disco idênticas às gravadas naquela execução.
+        """
+        registro = self.dados['etapas'].get(nome)
+        if not registro or registro.get('impressao') != impressao:
+            return False
+        saidas_registradas = registro.get('saidas', {})
+        return bool(saidas_registradas) and all(
+            hashes_saidas.get(artefato) == hash_ for artefato, hash_ in saidas_registradas.items()
+        )
+
+    def registrar(self, nome: str, impressao: dict, hashes_saidas: dict[str, str | None]) -> None:
+        self.dados['etapas'][nome] = {
+            'impressao': impressao,
+            'saidas': {artefato: h for artefato, h in sorted(hashes_saidas.items()) if h is not None},
+        }
+
+    def salvar(self) -> None:
+        """Grava o manifesto de forma atômica (arquivo temporário + rename)."""
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = self.caminho.with_suffix('.json.tmp')
+        temporario.write_text(json.dumps(self.dados, indent=2, ensure_ascii=False), encoding='utf-8')
+        os.replace(temporario, self.caminho)
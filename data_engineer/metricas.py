@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+"""
+Métricas estruturadas (spans) das etapas do pipeline.
+
+Cada etapa e sub-etapa (coleta, transformação, gravação) registra um *span*
+com início, duração, status e contadores: linhas lidas e gravadas, bytes
+gravados, chamadas de rede, acertos do cache de cotações e novas tentativas.
+Os spans são gravados como linhas JSON em `logs/metricas/<run_id>.jsonl`, um
+arquivo por execução, compartilhado por todos os processos dela: o `run.py`
+define BUSSOLA_RUN_ID e os loaders e etapas herdam a variável.
+
+Os contadores são exclusivos: cada `contar` vai para o span mais interno
+aberto na thread (threads de coleta herdam o contexto de quem as criou, ver
+`contexto`/`herdar`). Em uma etapa executada como subprocesso, o span
+'processo' (aberto ao importar este módulo) recebe o que foi contado fora dos
+sub-spans. `resumir_execucao` agrega o arquivo nas tabelas 'pipeline_runs' e
+'pipeline_step_metrics' gravadas pelo `run.py`.
+
+Os spans só são gravados dentro de uma execução (BUSSOLA_RUN_ID definida
+pelo `run.py` ou pelo `loader.py`); etapas e benchmarks executados
+isoladamente não geram arquivos. BUSSOLA_METRICAS=0 desativa a gravação.
+Este módulo usa apenas a biblioteca padrão (pandas só em `resumir_execucao`),
+para poder ser importado pelos loaders sem custo.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+METRICAS_DIR = Path(__file__).resolve().parent.parent / 'logs' / 'metricas'
+ATIVO = os.environ.get('BUSSOLA_METRICAS') != '0'
+
+CONTADORES = ('linhas_entrada', 'linhas_saida', 'bytes', 'chamadas_rede', 'cache_hits', 'retries')
+
+_local = threading.local()
+_lock = threading.Lock()
+
+
+def run_id() -> str:
+    """
+    Identificador da execução (BUSSOLA_RUN_ID). Se ainda não existir, é criado
+    e exportado, de modo que os subprocessos usem o mesmo arquivo de métricas.
+    """
+    atual = os.environ.get('BUSSOLA_RUN_ID')
+    if not atual:
+        atual = f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+        os.environ['BUSSOLA_RUN_ID'] = atual
+    return atual
+
+
+def arquivo_metricas(id_execucao: str | None = None) -> Path:
+    """Arquivo JSONL com os spans de uma execução."""
+    return METRICAS_DIR / f"{id_execucao or run_id()}.jsonl"
+
+
+class Span:
+    """Um trecho medido do pipeline. `status` pode ser alterado por quem o abriu."""
+
+    def __init__(self, nome: str, etapa: str | None, pai: 'Span | None', atributos: dict):
+        self.id = uuid.uuid4().hex[:16]
+        self.nome = nome
+        self.etapa = etapa
+        self.pai = pai.id if pai is not None else None
+        self.atributos = atributos
+        self.status = 'ok'
+        self.erro: str | None = None
+        self.contadores = dict.fromkeys(CONTADORES, 0)
+        self.inicio = datetime.now()
+        self._t0 = time.perf_counter()
+
+    def registro(self) -> dict:
+        return {
+            'run_id': run_id(), 'span_id': self.id, 'pai': self.pai, 'etapa': self.etapa, 'span': self.nome,
+            'inicio': self.inicio.isoformat(timespec='milliseconds'),
+            'segundos': round(time.perf_counter() - self._t0, 6), 'status': self.status, 'erro': self.erro,
+            'pid': os.getpid(), **self.contadores, 'atributos': self.atributos,
+        }
+
+
+def _pilha() -> tuple:
+    return getattr(_local, 'pilha', ())
+
+
+def _gravar(span: Span) -> None:
+    if not ATIVO or not os.environ.get('BUSSOLA_RUN_ID'):
+        return
+    registro = span.registro()
+    linha = json.dumps(registro, ensure_ascii=False, default=str) + '\n'
+    caminho = arquivo_metricas(registro['run_id'])
+    with _lock:
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        # Linhas curtas em modo append: processos diferentes não intercalam o conteúdo
+        with open(caminho, 'a', encoding='utf-8') as f:
+            f.write(linha)
+
+
+@contextmanager
+def span(nome: str, etapa: str | None = None, **atributos):
+    """
+    Mede o bloco e grava o span ao sair. A etapa, se omitida, é herdada do
+    span pai ou de BUSSOLA_ETAPA. Uma exceção marca o span como 'erro'.
+    """
+    pilha = _pilha()
+    pai = pilha[-1] if pilha else None
+    etapa = etapa or (pai.etapa if pai is not None else os.environ.get('BUSSOLA_ETAPA'))
+    atual = Span(nome, etapa, pai, atributos)
+    _local.pilha = pilha + (atual,)
+    try:
+        yield atual
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            atual.status, atual.erro = 'erro', f"SystemExit: {e.code}"
+        raise
+    except BaseException as e:
+        atual.status, atual.erro = 'erro', f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _local.pilha = pilha
+        _gravar(atual)
+
+
+def contar(nome: str, n: int = 1) -> None:
+    """Soma `n` ao contador `nome` do span mais interno aberto nesta thread."""
+    pilha = _pilha()
+    if pilha and n:
+        with _lock:
+            pilha[-1].contadores[nome] += int(n)
+
+
+def contexto() -> tuple:
+    """Spans abertos na thread atual, para repassar a threads de trabalho."""
+    return _pilha()
+
+
+@contextmanager
+def herdar(pilha: tuple):
+    """Executa o bloco (em outra thread) dentro dos spans de `contexto()`."""
+    anterior = _pilha()
+    _local.pilha = pilha
+    try:
+        yield
+    finally:
+        _local.pilha = anterior
+
+
+def _abrir_span_processo() -> None:
+    """Etapa em subprocesso (BUSSOLA_ETAPA definida pelo loader): span raiz do processo."""
+    etapa = os.environ.get('BUSSOLA_ETAPA')
+    if not etapa or _pilha():
+        return
+    raiz = Span('processo', etapa, None, {})
+    _local.pilha = (raiz,)
+    atexit.register(_gravar, raiz)
+
+
+_abrir_span_processo()
+
+
+# --- Agregação (run.py) ---
+
+def ler_spans(id_execucao: str):
+    """DataFrame com os spans de uma execução (vazio se não houver arquivo)."""
+    import pandas as pd
+
+    caminho = arquivo_metricas(id_execucao)
+    if not caminho.exists():
+        return pd.DataFrame(columns=['run_id', 'span_id', 'pai', 'etapa', 'span', 'inicio', 'segundos',
+                                     'status', 'erro', 'pid', *CONTADORES, 'atributos'])
+    with open(caminho, encoding='utf-8') as f:
+        registros = [json.loads(linha) for linha in f if linha.strip()]
+    spans = pd.DataFrame(registros)
+    spans['inicio'] = pd.to_datetime(spans['inicio'])
+    return spans
+
+
+def resumir_execucao(id_execucao: str, inicio: datetime | None = None, duracao_s: float | None = None,
+                     codigo_saida: int | None = None):
+    """
+    Agrega os spans de uma execução em duas tabelas:
+
+    - 'pipeline_step_metrics': uma linha por etapa e tipo de span, com número
+      de ocorrências, duração somada, erros e contadores. A linha span='etapa'
+      traz a duração da etapa e o total dos contadores de todos os seus spans;
+    - 'pipeline_runs': uma linha com a duração e o status da execução e os
+      totais dos contadores.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: (pipeline_runs, pipeline_step_metrics)
+    """
+    import pandas as pd
+
+    spans = ler_spans(id_execucao)
+    contadores = list(CONTADORES)
+    spans[contadores] = spans[contadores].fillna(0).astype('int64')
+    spans['etapa'] = spans['etapa'].fillna('-')
+
+    # Sem o span 'etapa' do loader (script executado diretamente), o do processo faz as vezes dele
+    com_etapa = set(spans.loc[spans['span'] == 'etapa', 'etapa'])
+    spans.loc[(spans['span'] == 'processo') & ~spans['etapa'].isin(com_etapa), 'span'] = 'etapa'
+
+    totais = spans.groupby('etapa')[contadores].sum()
+    spans = spans[spans['span'] != 'processo']
+    etapas = (
+        spans.assign(erros=(spans['status'] == 'erro').astype('int64'))
+        .groupby(['etapa', 'span'], sort=False)
+        .agg(inicio=('inicio', 'min'), ocorrencias=('span_id', 'size'), duracao_s=('segundos', 'sum'),
+             erros=('erros', 'sum'), status=('status', 'last'), **{c: (c, 'sum') for c in contadores})
+        .reset_index()
+    )
+    linhas_etapa = etapas['span'] == 'etapa'
+    etapas.loc[linhas_etapa, contadores] = totais.loc[etapas.loc[linhas_etapa, 'etapa'], contadores].to_numpy()
+    etapas.loc[~linhas_etapa, 'status'] = etapas.loc[~linhas_etapa, 'erros'].map(lambda e: 'erro' if e else 'ok')
+    # Etapas na ordem em que começaram e, em cada uma, a linha 'etapa' e os spans na ordem de início
+    ordem = etapas.groupby('etapa')['inicio'].transform('min')
+    etapas = (
+        etapas.assign(_ordem=ordem, _sub=etapas['span'] != 'etapa')
+        .sort_values(['_ordem', 'etapa', '_sub', 'inicio'], kind='stable', ignore_index=True)
+        .drop(columns=['_ordem', '_sub'])
+    )
+    etapas.insert(0, 'run_id', id_execucao)
+    etapas['duracao_s'] = etapas['duracao_s'].round(3)
+
+    resumo_etapas = etapas[etapas['span'] == 'etapa']
+    if inicio is None and not spans.empty:
+        inicio = spans['inicio'].min().to_pydatetime()
+    if duracao_s is None and not spans.empty:
+        fim = (spans['inicio'] + pd.to_timedelta(spans['segundos'], unit='s')).max()
+        duracao_s = (fim - spans['inicio'].min()).total_seconds()
+    if codigo_saida is None:
+        codigo_saida = int((resumo_etapas['status'] == 'erro').any())
+    runs = pd.DataFrame([{
+        'run_id': id_execucao,
+        'inicio': pd.Timestamp(inicio) if inicio is not None else pd.NaT,
+        'duracao_s': round(duracao_s, 3) if duracao_s is not None else None,
+        'codigo_saida': codigo_saida,
+        'status': 'ok' if codigo_saida == 0 else 'erro',
+        'etapas_executadas': int(resumo_etapas['status'].isin(['ok', 'erro']).sum()),
+        'etapas_com_erro': int((resumo_etapas['status'] == 'erro').sum()),
+        'etapas_ignoradas': int((resumo_etapas['status'] == 'ignorada').sum()),
+        **{c: int(totais[c].sum()) for c in contadores},
+    }])
+    return runs, etapas
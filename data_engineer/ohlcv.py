@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+"""
+Armazém colunar do histórico diário (OHLCV) dos ativos.
+
+O histórico de cada ticker fica em Parquet (zstd), particionado por ticker e
+ano no formato hive e ordenado por data:
+
+    duckdb/ohlcv/ticker=PETR4.SA/ano=2024/dados.parquet
+
+Um índice (`_indice.parquet`) guarda a janela e a última data armazenada de
+cada ticker. A atualização é incremental: downloads em lote (até
+`TAMANHO_LOTE` tickers por requisição) buscam só os pregões a partir da menor
+última data armazenada do lote, e cada ticker grava apenas as partições dos
+anos que mudaram. Cada lote é normalizado e gravado antes do próximo ser
+baixado, de modo que a memória não cresce com o número de tickers. Os preços são ajustados
+(`auto_adjust`), como os do yfinance; como um novo dividendo ou desdobramento
+reajusta todo o histórico anterior, os tickers com um evento no trecho novo
+têm o histórico inteiro baixado de novo.
+
+As etapas que precisam de histórico leem daqui em vez de consultar a rede.
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+OHLCV_DIR = Path(__file__).resolve().parent.parent / 'duckdb' / 'ohlcv'
+ARQUIVO_PARTICAO = 'dados.parquet'
+ARQUIVO_INDICE = '_indice.parquet'  # o prefixo '_' o exclui da leitura do dataset
+COMPRESSAO = 'zstd'
+# Tickers por requisição de download (BUSSOLA_OHLCV_LOTE)
+TAMANHO_LOTE = int(os.environ.get('BUSSOLA_OHLCV_LOTE', '200'))
+
+# Colunas do yfinance -> colunas armazenadas
+COLUNAS = {
+    'Open': 'open', 'High': 'high', 'Low': 'low', 'Close': 'close', 'Volume': 'volume',
+    'Dividends': 'dividendos', 'Stock Splits': 'desdobramentos',
+}
+COLUNAS_YF = {armazenada: original for original, armazenada in COLUNAS.items()}
+COLUNAS_INDICE = ['ticker', 'inicio_janela', 'primeira_data', 'ultima_data', 'pregoes']
+
+
+def normalizar_historico(hist: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converte um histórico no formato do yfinance (índice de datas, colunas
+    'Open', 'Close', ...) para o formato armazenado: coluna 'data' sem fuso,
+    uma linha por pregão com fechamento e ordenado por data.
+    """
+    if hist is None or hist.empty or 'Close' not in hist.columns:
+        return pd.DataFrame(columns=['data', *COLUNAS.values()])
+    df = hist[[c for c in COLUNAS if c in hist.columns]].rename(columns=COLUNAS)
+    indice = pd.DatetimeIndex(hist.index)
+    if indice.tz is not None:
+        indice = indice.tz_localize(None)
+    df.insert(0, 'data', indice.normalize())
+    df = df[df['close'].notna()].reset_index(drop=True)
+    for coluna in COLUNAS.values():
+        if coluna not in df.columns:
+            df[coluna] = 0.0
+    df['volume'] = df['volume'].fillna(0).astype('int64')
+    df[['dividendos', 'desdobramentos']] = df[['dividendos', 'desdobramentos']].fillna(0.0)
+    return df.drop_duplicates('data', keep='last').sort_values('data', ignore_index=True)
+
+
+def separar_por_ticker(hist: pd.DataFrame, tickers: list[str]) -> dict[str, pd.DataFrame]:
+    """Separa o retorno de `yf.download` (colunas (campo, ticker)) em um histórico por ticker."""
+    if hist is None or hist.empty:
+        return {}
+    if not isinstance(hist.columns, pd.MultiIndex):
+        return {tickers[0]: hist} if len(tickers) == 1 else {}
+    nivel = 1 if set(tickers) & set(hist.columns.get_level_values(1)) else 0
+    disponiveis = set(hist.columns.get_level_values(nivel))
+    return {t: hist.xs(t, axis=1, level=nivel) for t in tickers if t in disponiveis}
+
+
+class OHLCVStore:
+    """Leitura e atualização incremental do armazém de histórico diário."""
+
+    def __init__(self, diretorio: Path = OHLCV_DIR):
+        self.diretorio = Path(diretorio)
+        self._indice: dict[str, dict] | None = None
+
+    # --- Índice ---
+
+    @property
+    def indice(self) -> dict[str, dict]:
+        """{ticker: {'inicio_janela', 'primeira_data', 'ultima_data', 'pregoes'}}"""
+        if self._indice is None:
+            caminho = self.diretorio / ARQUIVO_INDICE
+            if caminho.exists():
+                df = pd.read_parquet(caminho)
+                self._indice = df.set_index('ticker').to_dict(orient='index')
+            else:
+                self._indice = {}
+        return self._indice
+
+    def _salvar_indice(self) -> None:
+        df = pd.DataFrame(
+            [{'ticker': t, **registro} for t, registro in sorted(self.indice.items())], columns=COLUNAS_INDICE
+        )
+        self._gravar_arquivo(df, self.diretorio / ARQUIVO_INDICE)
+
+    def cobertura(self, tickers: list[str] | None = None) -> pd.DataFrame:
+        """Janela armazenada de cada ticker (primeira/última data e número de pregões)."""
+        df = pd.DataFrame([{'ticker': t, **r} for t, r in self.indice.items()], columns=COLUNAS_INDICE)
+        if tickers is not None:
+            df = df[df['ticker'].isin(tickers)]
+        return df.sort_values('ticker', ignore_index=True)
+
+    # --- Escrita ---
+
+    def _caminho(self, ticker: str, ano: int) -> Path:
+        return self.diretorio / f'ticker={ticker}' / f'ano={ano}' / ARQUIVO_PARTICAO
+
+    @staticmethod
+    def _gravar_arquivo(df: pd.DataFrame, destino: Path) -> None:
+        """Grava em um temporário oculto (ignorado pelos leitores) e troca com `os.replace`."""
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        temporario = destino.with_name(f'.{destino.name}.tmp')
+        df.to_parquet(temporario, index=False, compression=COMPRESSAO)
+        os.replace(temporario, destino)
+
+    def gravar(self, ticker: str, df: pd.DataFrame, substituir: bool = False,
+               inicio_janela: pd.Timestamp | None = None) -> list[int]:
+        """
+        Grava o histórico normalizado de um ticker. Por padrão, faz o merge com
+        as partições existentes (linhas novas prevalecem na mesma data) e
+        reescreve só os anos presentes em `df`; com `substituir`, apaga o
+        histórico anterior do ticker. Retorna os anos gravados.
+        """
+        if df.empty:
+            return []
+        if substituir:
+            shutil.rmtree(self.diretorio / f'ticker={ticker}', ignore_errors=True)
+        anos = []
+        for ano, linhas in df.groupby(df['data'].dt.year, sort=True):
+            destino = self._caminho(ticker, int(ano))
+            if not substituir and destino.exists():
+                linhas = pd.concat([pd.read_parquet(destino), linhas], ignore_index=True)
+                linhas = linhas.drop_duplicates('data', keep='last').sort_values('data', ignore_index=True)
+            self._gravar_arquivo(linhas, destino)
+            anos.append(int(ano))
+
+        anterior = None if substituir else self.indice.get(ticker)
+        primeira, ultima = df['data'].iloc[0], df['data'].iloc[-1]
+        if anterior is not None:
+            inicio_janela = inicio_janela if inicio_janela is not None else anterior['inicio_janela']
+            primeira, ultima = min(anterior['primeira_data'], primeira), max(anterior['ultima_data'], ultima)
+        self.indice[ticker] = {
+            'inicio_janela': inicio_janela if inicio_janela is not None else primeira,
+            'primeira_data': primeira,
+            'ultima_data': ultima,
+            'pregoes': self._contar_pregoes(ticker),
+        }
+        return anos
+
+    def _contar_pregoes(self, ticker: str) -> int:
+        arquivos = sorted((self.diretorio / f'ticker={ticker}').glob(f'ano=*/{ARQUIVO_PARTICAO}'))
+        return sum(pq.ParquetFile(arquivo).metadata.num_rows for arquivo in arquivos)
+
+    # --- Atualização ---
+
+    @staticmethod
+    def _baixar(provider, tickers: list[str], inicio: pd.Timestamp) -> dict[str, pd.DataFrame]:
+        """Um download em lote; em caso de falha, segue com o que já está armazenado."""
+        try:
+            hist = provider.download(
+                tickers, start=inicio.strftime('%Y-%m-%d'), auto_adjust=True, actions=True, progress=False
+            )
+        except Exception as e:
+            print(f"Falha ao baixar o histórico de {len(tickers)} tickers desde {inicio.date()}: {e}")
+            return {}
+        return {t: normalizar_historico(h) for t, h in separar_por_ticker(hist, tickers).items()}
+
+    @staticmethod
+    def _lotes(tickers: list[str]):
+        tamanho = max(1, TAMANHO_LOTE)
+        for i in range(0, len(tickers), tamanho):
+            yield tickers[i:i + tamanho]
+
+    def atualizar(self, tickers: list[str], inicio, provider) -> dict[str, list[str]]:
+        """
+        Atualiza o armazém para os tickers informados (símbolos do yfinance).
+
+        Tickers já armazenados com janela a partir de `inicio` recebem só os
+        pregões desde a sua última data (que é baixada de novo, pois pode ter
+        sido gravada com o pregão em andamento). Tickers novos, com janela
+        menor que a pedida ou com dividendo/desdobramento no trecho novo têm o
+        histórico completo baixado desde `inicio`. Retorna os tickers de cada caso.
+        """
+        inicio = pd.Timestamp(inicio)
+        incrementais = [
+            t for t in tickers if t in self.indice and self.indice[t]['inicio_janela'] <= inicio
+        ]
+        completos = [t for t in tickers if t not in set(incrementais)]
+        resumo = {'incrementais': [], 'refeitos': [], 'completos': [], 'sem_dados': []}
+
+        # Ordena os incrementais pela última data, para que cada lote baixe o menor trecho possível
+        for lote in self._lotes(sorted(incrementais, key=lambda t: self.indice[t]['ultima_data'])):
+            ultimas = {t: self.indice[t]['ultima_data'] for t in lote}
+            novos = self._baixar(provider, lote, min(ultimas.values()))
+            for ticker in lote:
+                delta = novos.pop(ticker, None)
+                if delta is None:
+                    continue
+                delta = delta[delta['data'] >= ultimas[ticker]]
+                posteriores = delta[delta['data'] > ultimas[ticker]]
+                if (posteriores[['dividendos', 'desdobramentos']] != 0).any().any():
+                    resumo['refeitos'].append(ticker)
+                elif self.gravar(ticker, delta):
+                    resumo['incrementais'].append(ticker)
+
+        pendentes = completos + resumo['refeitos']
+        for lote in self._lotes(pendentes):
+            historicos = self._baixar(provider, lote, inicio)
+            for ticker in lote:
+                df = historicos.pop(ticker, None)
+                if df is None or df.empty:
+                    resumo['sem_dados'].append(ticker)
+                    continue
+                self.gravar(ticker, df, substituir=True, inicio_janela=inicio)
+                if ticker in completos:
+                    resumo['completos'].append(ticker)
+
+        self._salvar_indice()
+        return resumo
+
+    # --- Leitura ---
+
+    def _arquivos(self, tickers: list[str], inicio: pd.Timestamp | None) -> list[str]:
+        """Partições dos tickers a partir do ano de `inicio`, localizadas pelo índice (sem varrer o diretório)."""
+        arquivos = []
+        for ticker in tickers:
+            registro = self.indice.get(ticker)
+            if registro is None:
+                continue
+            primeiro_ano = registro['primeira_data'].year
+            if inicio is not None:
+                primeiro_ano = max(primeiro_ano, inicio.year)
+            for ano in range(primeiro_ano, registro['ultima_data'].year + 1):
+                caminho = self._caminho(ticker, ano)
+                if caminho.exists():
+                    arquivos.append(str(caminho))
+        return arquivos
+
+    def ler(self, tickers: list[str], inicio=None, fim=None, colunas: list[str] | None = None) -> pd.DataFrame:
+        """
+        Lê o histórico armazenado em formato longo (ticker, data, colunas),
+        com `inicio` <= data < `fim`, agrupado por ticker (na ordem pedida) e
+        ordenado por data. Só as partições dos anos pedidos são lidas.
+        """
+        inicio = pd.Timestamp(inicio) if inicio is not None else None
+        colunas = list(colunas) if colunas is not None else list(COLUNAS.values())
+        arquivos = self._arquivos(list(tickers), inicio)
+        if not arquivos:
+            return pd.DataFrame(columns=['ticker', 'data', *colunas])
+        dataset = ds.dataset(
+            arquivos, format='parquet', partitioning='hive', partition_base_dir=str(self.diretorio)
+        )
+        # O recorte por data é feito na tabela já lida: com partições pequenas, filtrar no scan custa mais
+        tabela = dataset.to_table(columns=['ticker', 'data', *colunas])
+        mascara = None
+        if inicio is not None:
+            mascara = pc.greater_equal(tabela['data'], pa.scalar(inicio, type=tabela.schema.field('data').type))
+        if fim is not None:
+            limite = pc.less(tabela['data'], pa.scalar(pd.Timestamp(fim), type=tabela.schema.field('data').type))
+            mascara = limite if mascara is None else pc.and_(mascara, limite)
+        if mascara is not None:
+            tabela = tabela.filter(mascara)
+        return tabela.to_pandas()
+
+    def matrizes(self, tickers: list[str], colunas: list[str], inicio=None, fim=None) -> dict[str, pd.DataFrame]:
+        """Uma matriz (datas x tickers) por coluna pedida, lidas em uma única passada."""
+        df = self.ler(tickers, inicio, fim, colunas=colunas)
+        resultado = {}
+        for coluna in colunas:
+            matriz = df.pivot(index='data', columns='ticker', values=coluna).sort_index()
+            matriz.index.name = 'Date'
+            matriz.columns.name = 'Ticker'
+            resultado[coluna] = matriz
+        return resultado
+
+    def fechamentos(self, tickers: list[str], inicio=None, fim=None) -> pd.DataFrame:
+        """Matriz de fechamentos ajustados (datas x tickers), como `yf.download(...)['Close']`."""
+        return self.matrizes(tickers, ['close'], inicio, fim)['close']
+
+    def historicos(self, tickers: list[str], inicio=None, fim=None) -> dict[str, pd.DataFrame]:
+        """Histórico de cada ticker no formato de `Ticker.history()` (índice 'Date', colunas 'Open', ...)."""
+        df = self.ler(tickers, inicio, fim)
+        if df.empty:
+            return {}
+        valores = df.drop(columns='ticker').set_index('data').rename(columns=COLUNAS_YF)
+        valores.index.name = 'Date'
+        # As linhas já vêm agrupadas por ticker: cada histórico é uma fatia contígua
+        rotulos = df['ticker'].to_numpy()
+        inicios = np.flatnonzero(np.r_[True, rotulos[1:] != rotulos[:-1]])
+        fins = np.r_[inicios[1:], len(rotulos)]
+        if len(set(rotulos[inicios])) != len(inicios):
+            return {t: valores[rotulos == t] for t in dict.fromkeys(rotulos)}
+        return {rotulos[i]: valores.iloc[i:f] for i, f in zip(inicios, fins)}
@@ -0,0 +1,388 @@
+# -*- coding: utf-8 -*-
+"""
+Provedores de cotações utilizados pelo pipeline.
+
+Os scripts de coleta dependem apenas da interface dos provedores (`get_info`,
+`get_history`, `get_recommendations`, `get_dividends`, `download` e
+`get_logos`), o que permite trocar o yfinance e a Brapi por uma implementação
+falsa para executar e medir o pipeline sem acesso à rede:
+
+- `RecordReplayProvider` grava em disco as respostas reais de outro provedor
+  e depois as reproduz, sem rede;
+- `SyntheticProvider` gera, de forma determinística, históricos OHLCV,
+  dividendos, `.info`, recomendações e logos para qualquer ticker.
+
+O provedor usado pelas etapas é escolhido pela variável de ambiente
+BUSSOLA_PROVIDER (ver `get_provider`).
+"""
+
+import os
+import pickle
+import zlib
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import requests
+import yfinance as yf
+
+import metricas
+from common import ProviderCache, get_cache
+
+BRAPI_LISTA_URL = "https://brapi.dev/api/quote/list"
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / '.cache' / 'fixtures'
+
+
+class YFinanceProvider:
+    """
+    Provedor padrão: consulta o Yahoo Finance via yfinance.
+
+    Todas as chamadas passam pelo cache persistente de `common.py`, de modo que
+    reexecuções do pipeline (ou o modo `--offline`) não acessam a rede.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else get_cache()
+
+    def _consultar(self, endpoint: str, ticker: str, params: dict, fetch):
+        def _fetch_medido():
+            metricas.contar('chamadas_rede')
+            return fetch()
+        if self.cache is None:
+            return _fetch_medido()
+        return self.cache.get_or_fetch(endpoint, ticker, params, _fetch_medido)
+
+    def get_info(self, ticker_yf: str) -> dict:
+        """Retorna o dicionário `.info` do ticker (ex.: 'PETR4.SA')."""
+        return self._consultar('info', ticker_yf, {}, lambda: yf.Ticker(ticker_yf).info)
+
+    def get_history(self, ticker_yf: str, period: str = "5y", **kwargs) -> pd.DataFrame:
+        """Retorna o histórico diário (OHLCV) do ticker para o período informado."""
+        params = {'period': period, **kwargs}
+        return self._consultar('history', ticker_yf, params, lambda: yf.Ticker(ticker_yf).history(**params))
+
+    def get_recommendations(self, ticker_yf: str) -> pd.DataFrame | None:
+        """Retorna o resumo de recomendações de analistas do ticker."""
+        return self._consultar('recommendations', ticker_yf, {}, lambda: yf.Ticker(ticker_yf).recommendations_summary)
+
+    def get_dividends(self, ticker_yf: str, start: str | None = None) -> pd.Series:
+        """
+        Retorna a série de dividendos (data ex -> valor) do ticker.
+
+        Sem `start`, traz o histórico completo; com `start` ('AAAA-MM-DD'),
+        consulta apenas os eventos a partir desta data.
+        """
+        if start is None:
+            return self._consultar('dividends', ticker_yf, {}, lambda: yf.Ticker(ticker_yf).dividends)
+
+        def _fetch():
+            hist = yf.Ticker(ticker_yf).history(start=start, auto_adjust=False, actions=True)
+            if hist.empty or 'Dividends' not in hist.columns:
+                return pd.Series(dtype=float, name='Dividends')
+            dividendos = hist['Dividends']
+            return dividendos[dividendos > 0]
+        return self._consultar('dividends', ticker_yf, {'start': start}, _fetch)
+
+    def download(self, tickers: list[str], **kwargs) -> pd.DataFrame:
+        """Baixa o histórico de vários tickers em uma única requisição (`yf.download`)."""
+        tickers = list(tickers)
+        params = {'tickers': sorted(tickers), **kwargs}
+        return self._consultar('download', '*', params, lambda: yf.download(tickers, **kwargs))
+
+    def get_logos(self) -> dict[str, str]:
+        """Retorna o mapa ticker -> URL do logo, da lista de ativos da Brapi."""
+        def _fetch():
+            response = requests.get(BRAPI_LISTA_URL, timeout=20)
+            response.raise_for_status()
+            return {
+                stock['stock']: stock['logo']
+                for stock in response.json().get('stocks', []) if 'stock' in stock and 'logo' in stock
+            }
+        return self._consultar('logos', '*', {}, _fetch)
+
+
+class StaticQuoteProvider:
+    """
+    Provedor falso, alimentado por dicionários em memória.
+
+    Útil para testes offline: tickers ausentes em `infos` levantam KeyError,
+    simulando uma falha de consulta; históricos ausentes retornam vazio.
+    """
+
+    def __init__(self, infos: dict[str, dict] | None = None,
+                 historicos: dict[str, pd.DataFrame] | None = None,
+                 recomendacoes: dict[str, pd.DataFrame] | None = None,
+                 dividendos: dict[str, pd.Series] | None = None,
+                 logos: dict[str, str] | None = None):
+        self.infos = infos or {}
+        self.historicos = historicos or {}
+        self.recomendacoes = recomendacoes or {}
+        self.dividendos = dividendos or {}
+        self.logos = logos or {}
+
+    def get_info(self, ticker_yf: str) -> dict:
+        return self.infos[ticker_yf]
+
+    def get_history(self, ticker_yf: str, period: str = "5y", **kwargs) -> pd.DataFrame:
+        return self.historicos.get(ticker_yf, pd.DataFrame())
+
+    def get_recommendations(self, ticker_yf: str) -> pd.DataFrame | None:
+        return self.recomendacoes.get(ticker_yf)
+
+    def get_dividends(self, ticker_yf: str, start: str | None = None) -> pd.Series:
+        dividendos = self.dividendos.get(ticker_yf, pd.Series(dtype=float, name='Dividends'))
+        if start is not None and not dividendos.empty:
+            dividendos = dividendos[dividendos.index >= pd.Timestamp(start, tz=dividendos.index.tz)]
+        return dividendos
+
+    def download(self, tickers: list[str], start: str | None = None, **kwargs) -> pd.DataFrame:
+        """Monta, a partir dos históricos, o retorno de `yf.download` (colunas (campo, ticker))."""
+        historicos = {}
+        for ticker in tickers:
+            hist = self.historicos.get(ticker)
+            if hist is None or hist.empty:
+                continue
+            if start is not None:
+                hist = hist[hist.index >= pd.Timestamp(start, tz=hist.index.tz)]
+            historicos[ticker] = hist
+        return montar_download(historicos)
+
+    def get_logos(self) -> dict[str, str]:
+        return dict(self.logos)
+
+
+def montar_download(historicos: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Junta históricos por ticker no formato de `yf.download` (colunas (campo, ticker))."""
+    if not historicos:
+        return pd.DataFrame()
+    return pd.concat(historicos, axis=1, names=['Ticker', 'Price']).swaplevel(axis=1).sort_index(axis=1)
+
+
+class FixtureAusente(LookupError):
+    """Levantada na reprodução quando a resposta não foi gravada."""
+
+
+class RecordReplayProvider:
+    """
+    Grava e reproduz respostas de outro provedor em um diretório de fixtures.
+
+    No modo 'gravar', cada chamada é repassada ao provedor real e a resposta é
+    salva em `<diretorio>/<endpoint>/<chave>.pkl` (a chave é a mesma do cache
+    de `common.py`: endpoint, ticker e parâmetros). No modo 'reproduzir', as
+    respostas vêm só do diretório, sem rede; chamadas não gravadas levantam
+    `FixtureAusente`, que as etapas tratam como uma falha de consulta.
+    """
+
+    MODOS = ('gravar', 'reproduzir')
+
+    def __init__(self, diretorio: Path = FIXTURES_DIR, modo: str = 'reproduzir', provider=None):
+        if modo not in self.MODOS:
+            raise ValueError(f"Modo '{modo}' inválido; use um de {self.MODOS}.")
+        self.diretorio = Path(diretorio)
+        self.modo = modo
+        self.provider = provider if provider is not None or modo == 'reproduzir' else YFinanceProvider()
+
+    def _caminho(self, endpoint: str, ticker: str, params: dict) -> Path:
+        chave, _ = ProviderCache._chave(endpoint, ticker, params)
+        return self.diretorio / endpoint / f"{chave}.pkl"
+
+    def _consultar(self, endpoint: str, ticker: str, params: dict, fetch):
+        caminho = self._caminho(endpoint, ticker, params)
+        if self.modo == 'reproduzir':
+            if not caminho.exists():
+                raise FixtureAusente(f"'{endpoint}' de {ticker} ({params}) não foi gravado em {self.diretorio}.")
+            with open(caminho, 'rb') as f:
+                return pickle.load(f)['valor']
+
+        resultado = fetch()
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        temporario = caminho.with_name(f".{caminho.name}.tmp")
+        with open(temporario, 'wb') as f:
+            pickle.dump({'endpoint': endpoint, 'ticker': ticker, 'params': params, 'valor': resultado},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporario, caminho)
+        return resultado
+
+    def get_info(self, ticker_yf: str) -> dict:
+        return self._consultar('info', ticker_yf, {}, lambda: self.provider.get_info(ticker_yf))
+
+    def get_history(self, ticker_yf: str, period: str = "5y", **kwargs) -> pd.DataFrame:
+        params = {'period': period, **kwargs}
+        return self._consultar('history', ticker_yf, params,
+                               lambda: self.provider.get_history(ticker_yf, period=period, **kwargs))
+
+    def get_recommendations(self, ticker_yf: str) -> pd.DataFrame | None:
+        return self._consultar('recommendations', ticker_yf, {}, lambda: self.provider.get_recommendations(ticker_yf))
+
+    def get_dividends(self, ticker_yf: str, start: str | None = None) -> pd.Series:
+        return self._consultar('dividends', ticker_yf, {'start': start},
+                               lambda: self.provider.get_dividends(ticker_yf, start=start))
+
+    def download(self, tickers: list[str], **kwargs) -> pd.DataFrame:
+        tickers = list(tickers)
+        params = {'tickers': sorted(tickers), **kwargs}
+        return self._consultar('download', '*', params, lambda: self.provider.download(tickers, **kwargs))
+
+    def get_logos(self) -> dict[str, str]:
+        return self._consultar('logos', '*', {}, lambda: self.provider.get_logos())
+
+
+class SyntheticProvider:
+    """
+    Provedor sintético e determinístico para medições sem rede.
+
+    Cada ticker recebe um histórico diário (passeio aleatório em dias úteis,
+    com volume e dividendos trimestrais em parte dos tickers), um `.info`
+    coerente com o último preço, recomendações e um logo. Os dados dependem
+    só da semente, do ticker e da data final, então execuções repetidas veem
+    as mesmas respostas. `tickers` lista um universo de `n_tickers` símbolos
+    fictícios (com setores em `mapeamento_b3`), mas qualquer ticker
+    consultado recebe dados.
+    """
+
+    SETORES = ('Financial Services', 'Utilities', 'Basic Materials', 'Energy', 'Consumer Cyclical',
+               'Industrials', 'Real Estate', 'Healthcare', 'Communication Services', 'Technology')
+
+    def __init__(self, n_tickers: int = 500, semente: int = 42, anos: int = 8, hoje=None):
+        self.semente = semente
+        self.hoje = pd.Timestamp(hoje if hoje is not None else pd.Timestamp.today()).normalize()
+        self.datas = pd.bdate_range(self.hoje - pd.DateOffset(years=anos), self.hoje,
+                                    tz='America/Sao_Paulo', name='Date')
+        self.tickers = [f"SIN{i:05d}" for i in range(n_tickers)]
+        # Regerar é determinístico: o cache só poupa as consultas repetidas das etapas
+        self._historico = lru_cache(maxsize=2048)(self._gerar_historico)
+
+    def _rng(self, ticker_yf: str, uso: str) -> np.random.Generator:
+        return np.random.default_rng([self.semente, zlib.crc32(f"{ticker_yf}|{uso}".encode('utf-8'))])
+
+    def _gerar_historico(self, ticker_yf: str) -> pd.DataFrame:
+        rng = self._rng(ticker_yf, 'historico')
+        # Parte dos tickers estreia no meio do período
+        inicio = int(rng.integers(0, len(self.datas) * 3 // 4)) if rng.random() < 0.1 else 0
+        datas = self.datas[inicio:]
+        close = np.round(rng.uniform(2, 80) * np.exp(np.cumsum(rng.normal(0.0002, 0.02, len(datas)))), 2)
+        variacao = np.abs(rng.normal(0, 0.01, len(datas)))
+        dividendos = np.zeros(len(datas))
+        if rng.random() < 0.7:
+            rendimento_anual = rng.uniform(0.01, 0.12)
+            pagamentos = np.arange(int(rng.integers(0, 63)), len(datas), 63)
+            dividendos[pagamentos] = np.round(close[pagamentos] * rendimento_anual / 4, 4)
+        return pd.DataFrame({
+            'Open': np.round(close * (1 + rng.normal(0, 0.005, len(datas))), 2),
+            'High': np.round(close * (1 + variacao), 2),
+            'Low': np.round(close * (1 - variacao), 2),
+            'Close': close,
+            'Volume': rng.integers(1_000, 20_000_000, len(datas)),
+            'Dividends': dividendos,
+            'Stock Splits': 0.0,
+        }, index=datas)
+
+    def _desde(self, hist: pd.DataFrame, period: str | None = None, start: str | None = None) -> pd.DataFrame:
+        if start is not None:
+            return hist[hist.index >= pd.Timestamp(start, tz=hist.index.tz)]
+        if period is None or period == 'max':
+            return hist
+        quantidade, unidade = int(''.join(c for c in period if c.isdigit())), period.lstrip('0123456789')
+        deslocamento = {'d': pd.DateOffset(days=quantidade), 'wk': pd.DateOffset(weeks=quantidade),
+                        'mo': pd.DateOffset(months=quantidade), 'y': pd.DateOffset(years=quantidade)}[unidade]
+        return hist[hist.index > pd.Timestamp(self.hoje - deslocamento, tz=hist.index.tz)]
+
+    def get_info(self, ticker_yf: str) -> dict:
+        rng = self._rng(ticker_yf, 'info')
+        hist = self._historico(ticker_yf)
+        preco = float(hist['Close'].iloc[-1])
+        acoes = int(rng.integers(50_000_000, 5_000_000_000))
+        lpa = round(preco / rng.uniform(4, 30), 2) * (1 if rng.random() < 0.85 else -1)
+        vpa = round(preco / rng.uniform(0.5, 4), 2)
+        ebitda = int(acoes * abs(lpa) * rng.uniform(1.2, 3))
+        nome = ticker_yf.removesuffix('.SA')
+        return {
+            'symbol': ticker_yf,
+            'longName': f"{nome} Participações S.A.",
+            'shortName': nome,
+            'quoteType': 'EQUITY',
+            'sector': self.SETORES[zlib.crc32(nome.encode('utf-8')) % len(self.SETORES)],
+            'currentPrice': preco,
+            'marketCap': int(preco * acoes),
+            'averageVolume': int(hist['Volume'].tail(63).mean()),
+            'beta': round(float(rng.normal(1, 0.4)), 3),
+            'returnOnEquity': round(float(rng.normal(0.12, 0.1)), 4),
+            'payoutRatio': round(float(rng.uniform(0, 1.2)), 4),
+            'totalDebt': int(ebitda * rng.uniform(0, 4)),
+            'ebitda': ebitda,
+            'freeCashflow': int(ebitda * rng.normal(0.3, 0.3)),
+            'currentRatio': round(float(rng.uniform(0.5, 3)), 3),
+            'trailingEps': lpa,
+            'bookValue': vpa,
+            'priceToBook': round(preco / vpa, 3),
+            'trailingPE': round(preco / lpa, 2) if lpa > 0 else None,
+        }
+
+    def get_history(self, ticker_yf: str, period: str = "5y", **kwargs) -> pd.DataFrame:
+        return self._desde(self._historico(ticker_yf), period=period, start=kwargs.get('start')).copy()
+
+    def get_recommendations(self, ticker_yf: str) -> pd.DataFrame | None:
+        rng = self._rng(ticker_yf, 'recomendacoes')
+        votos = rng.integers(0, 8, (4, 5))
+        return pd.DataFrame({
+            'period': ['0m', '-1m', '-2m', '-3m'],
+            'strongBuy': votos[:, 0], 'buy': votos[:, 1], 'hold': votos[:, 2],
+            'sell': votos[:, 3], 'strongSell': votos[:, 4],
+        })
+
+    def get_dividends(self, ticker_yf: str, start: str | None = None) -> pd.Series:
+        dividendos = self._desde(self._historico(ticker_yf), start=start)['Dividends']
+        return dividendos[dividendos > 0].copy()
+
+    def download(self, tickers: list[str], start: str | None = None, period: str | None = None,
+                 actions: bool = False, **kwargs) -> pd.DataFrame:
+        colunas = ['Open', 'High', 'Low', 'Close', 'Volume'] + (['Dividends', 'Stock Splits'] if actions else [])
+        return montar_download({
+            t: self._desde(self._historico(t), period=period, start=start)[colunas] for t in tickers
+        })
+
+    def get_logos(self) -> dict[str, str]:
+        return {t: f"https://logos.invalid/{t}.svg" for t in self.tickers}
+
+    @property
+    def mapeamento_b3(self) -> dict[str, tuple[str, str]]:
+        """
+        Setor e subsetor fictícios de cada ticker do universo (cerca de 100
+        tickers por subsetor e 8 subsetores por setor), no formato de
+        `MAPEAMENTO_COMPLETO_TICKERS`; a coleta de ativos usa este universo.
+        """
+        n_subsetores = max(1, len(self.tickers) // 100)
+        return {
+            ticker: (f"Setor Sintético {(i % n_subsetores) // 8:03d}", f"Subsetor Sintético {i % n_subsetores:04d}")
+            for i, ticker in enumerate(self.tickers)
+        }
+
+
+def get_provider():
+    """
+    Retorna o provedor de cotações do pipeline, conforme BUSSOLA_PROVIDER:
+
+    - 'yfinance' (padrão): Yahoo Finance e Brapi, com o cache de `common.py`;
+    - 'gravar' / 'reproduzir': `RecordReplayProvider` em BUSSOLA_FIXTURES_DIR
+      (padrão `.cache/fixtures`);
+    - 'sintetico': `SyntheticProvider` (BUSSOLA_SINTETICO_TICKERS e
+      BUSSOLA_SINTETICO_SEMENTE).
+    """
+    modo = os.environ.get('BUSSOLA_PROVIDER', 'yfinance')
+    if modo == 'yfinance':
+        return YFinanceProvider()
+    if modo in RecordReplayProvider.MODOS:
+        return RecordReplayProvider(Path(os.environ.get('BUSSOLA_FIXTURES_DIR', FIXTURES_DIR)), modo=modo)
+    if modo == 'sintetico':
+        return _provedor_sintetico(
+            int(os.environ.get('BUSSOLA_SINTETICO_TICKERS', '500')),
+            int(os.environ.get('BUSSOLA_SINTETICO_SEMENTE', '42')),
+        )
+    raise ValueError(f"BUSSOLA_PROVIDER='{modo}' inválido; use yfinance, gravar, reproduzir ou sintetico.")
+
+
+@lru_cache(maxsize=None)
+def _provedor_sintetico(n_tickers: int, semente: int) -> SyntheticProvider:
+    """Um único provedor sintético por processo, para que as etapas compartilhem os históricos gerados."""
+    return SyntheticProvider(n_tickers=n_tickers, semente=semente)
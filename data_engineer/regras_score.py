@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+Tabela de regras do Score de Qualidade e motor de cálculo vetorizado.
+
+Cada critério (ex.: `score_dy`) é uma soma de regras. Uma regra lê uma
+coluna e atribui pontos pela primeira faixa em que o valor se encaixa
+(como uma cadeia de if/elif); valores ausentes (NaN) não pontuam. As faixas
+usam a notação de intervalos: "(5, inf)" é `x > 5`, "[30, 60]" é
+`30 <= x <= 60`.
+
+A mesma tabela é usada pelo pipeline (`10-score.py`) e pelo app
+(`app/scoring.py`). Além dos pontos, cada regra que pontua gera um código
+estável (ex.: `dy12m:(5, inf)`) e um detalhe legível
+(ex.: `DY 12m (6.1%) > 5%: **+60**`), gravados na tabela 'scores'.
+
+O cálculo é feito sobre as colunas inteiras com `np.select`, sem iterar
+linha a linha.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+_INTERVALO = re.compile(r'^\s*([\[(])\s*(-?inf|-?[\d.]+)\s*,\s*(-?inf|-?[\d.]+)\s*([\])])\s*$')
+
+
+@dataclass(frozen=True)
+class Faixa:
+    """Um intervalo de valores e os pontos atribuídos a ele."""
+    intervalo: str
+    pontos: int
+    minimo: float = field(init=False)
+    maximo: float = field(init=False)
+    inclui_minimo: bool = field(init=False)
+    inclui_maximo: bool = field(init=False)
+
+    def __post_init__(self):
+        m = _INTERVALO.match(self.intervalo)
+        if not m:
+            raise ValueError(f"Intervalo inválido: '{self.intervalo}'")
+        abre, minimo, maximo, fecha = m.groups()
+        object.__setattr__(self, 'minimo', float(minimo))
+        object.__setattr__(self, 'maximo', float(maximo))
+        object.__setattr__(self, 'inclui_minimo', abre == '[')
+        object.__setattr__(self, 'inclui_maximo', fecha == ']')
+
+    def contem(self, x: np.ndarray) -> np.ndarray:
+        acima = x >= self.minimo if self.inclui_minimo else x > self.minimo
+        abaixo = x <= self.maximo if self.inclui_maximo else x < self.maximo
+        return acima & abaixo
+
+    def descrever(self, escala: float = 1.0, unidade: str = '') -> str:
+        """Texto da faixa para os detalhes do score (ex.: '> 5%', '<= 1%', 'entre 60% e 80%')."""
+        def valor(v):
+            return f"{v * escala:g}{unidade}"
+        if self.maximo == np.inf:
+            return f"{'>=' if self.inclui_minimo else '>'} {valor(self.minimo)}"
+        if self.minimo == -np.inf or (self.minimo == 0 and not self.inclui_minimo):
+            return f"{'<=' if self.inclui_maximo else '<'} {valor(self.maximo)}"
+        return f"entre {valor(self.minimo)} e {valor(self.maximo)}"
+
+
+@dataclass(frozen=True)
+class Regra:
+    """
+    Pontuação de uma coluna por faixas, por categorias ou por uma fórmula.
+
+    `somente_se`/`exceto_se` nomeiam colunas booleanas que restringem as
+    linhas em que a regra se aplica (ex.: regras específicas do setor financeiro).
+    `rotulo`, `unidade`, `escala` e `casas` controlam o texto dos detalhes;
+    `codigo` distingue regras diferentes sobre a mesma coluna.
+    """
+    coluna: str
+    faixas: tuple[Faixa, ...] = ()
+    categorias: dict | None = None
+    formula: Callable[[np.ndarray], np.ndarray] | None = None
+    somente_se: str | None = None
+    exceto_se: str | None = None
+    rotulo: str = ''
+    unidade: str = ''
+    escala: float = 1.0
+    casas: int = 2
+    codigo: str | None = None
+
+    def avaliar(self, colunas: dict[str, np.ndarray]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Retorna (pontos, máscara das linhas com pontuação fracionária, índice
+        da faixa/categoria que pontuou ou -1). Fórmulas usam o índice 0.
+        """
+        x = colunas[self.coluna]
+        fracionaria = np.zeros(len(x), dtype=bool)
+        if self.formula is not None:
+            valido = ~pd.isna(x)
+            pontos = np.where(valido, self.formula(np.where(valido, x, 0.0)), 0.0)
+            indice = np.where(valido, 0, -1)
+            fracionaria = valido
+        else:
+            if self.categorias is not None:
+                condicoes, valores = [x == c for c in self.categorias], list(self.categorias.values())
+            else:
+                condicoes, valores = [f.contem(x) for f in self.faixas], [f.pontos for f in self.faixas]
+            pontos = np.select(condicoes, valores, default=0)
+            indice = np.select(condicoes, range(len(condicoes)), default=-1)
+
+        aplica = np.ones(len(x), dtype=bool)
+        if self.somente_se:
+            aplica &= colunas[self.somente_se]
+        if self.exceto_se:
+            aplica &= ~colunas[self.exceto_se]
+        return np.where(aplica, pontos, 0).astype(float), fracionaria & aplica, np.where(aplica, indice, -1)
+
+    def explicar(self, indice: int, valores: np.ndarray, pontos: np.ndarray) -> tuple[str, list[str]]:
+        """Código e detalhes das linhas que pontuaram na faixa/categoria `indice`."""
+        base = self.codigo or self.coluna
+        if self.categorias is not None:
+            categoria = list(self.categorias)[indice]
+            return f"{base}:{categoria}", [f"{self.rotulo} ({categoria}): **{p:+.0f}**" for p in pontos]
+        formatar = f"{{:.{self.casas}f}}".format
+        textos = map(formatar, (valores * self.escala).tolist())
+        if self.formula is not None:
+            return base, [f"{self.rotulo} ({t}{self.unidade}): **{p:+.1f}**" for t, p in zip(textos, pontos.tolist())]
+        faixa = self.faixas[indice]
+        prefixo = f"{self.rotulo} ("
+        sufixo = f"{self.unidade}) {faixa.descrever(self.escala, self.unidade)}: **{faixa.pontos:+d}**"
+        return f"{base}:{faixa.intervalo}", [prefixo + t + sufixo for t in textos]
+
+
+def faixas(*pares: tuple[str, int]) -> tuple[Faixa, ...]:
+    return tuple(Faixa(intervalo, pontos) for intervalo, pontos in pares)
+
+
+# --- Tabela de Regras (a ordem dos critérios é a ordem das colunas em 'scores') ---
+CRITERIOS: dict[str, list[Regra]] = {
+    'score_dy': [
+        Regra('dy12m', faixas(("(5, inf)", 60), ("(3.5, inf)", 45), ("(2, inf)", 30), ("(0, 2)", -20)),
+              rotulo='DY 12m', unidade='%', casas=1),
+        Regra('dy5anos', faixas(("(10, inf)", 120), ("(8, inf)", 100), ("(6, inf)", 80), ("(4, inf)", 40),
+                                ("(1, 3)", -20), ("(-inf, 1]", -30)),
+              rotulo='DY Média 5 Anos', unidade='%', casas=1),
+    ],
+    'score_payout': [
+        Regra('payout_ratio', faixas(("[30, 60]", 30), ("(60, 80]", 15), ("(0, 20)", -15), ("(80, inf)", -15)),
+              rotulo='Payout', unidade='%', casas=0),
+    ],
+    'score_roe': [
+        Regra('roe', faixas(("(15, inf)", 80), ("(12, inf)", 60), ("(8, inf)", 30)), somente_se='financeiro',
+              rotulo='ROE (Financeiro)', unidade='%', casas=1, codigo='roe_financeiro'),
+        Regra('roe', faixas(("(12, inf)", 45), ("(8, inf)", 15)), exceto_se='financeiro',
+              rotulo='ROE', unidade='%', casas=1),
+    ],
+    'score_pl_pvp': [
+        Regra('p_l', faixas(("(0, 12)", 45), ("(0, 18)", 30), ("(25, inf)", -15)), rotulo='P/L'),
+        Regra('p_vp', faixas(("(0, 0.50)", 135), ("(0, 0.66)", 120), ("(0, 1.00)", 90), ("(0, 1.50)", 45),
+                             ("(0, 2.50)", 15), ("(4.00, inf)", -30)),
+              rotulo='P/VP'),
+    ],
+    'score_divida': [
+        Regra('divida_market_cap', faixas(("(-inf, 0.3)", 45), ("(-inf, 0.7)", 30), ("(1.5, inf)", -30)),
+              exceto_se='financeiro', rotulo='Dívida/Market Cap'),
+        Regra('divida_ebitda', faixas(("(0, 1)", 45), ("(0, 3)", 15), ("(5, inf)", -30)),
+              exceto_se='financeiro', rotulo='Dívida/EBITDA'),
+        Regra('current_ratio', faixas(("(2, inf)", 40), ("(1, inf)", 20), ("(-inf, 1]", -15)),
+              exceto_se='financeiro', rotulo='Current Ratio'),
+    ],
+    'score_crescimento_sentimento': [
+        Regra('crescimento_preco_5a', faixas(("(15, inf)", 50), ("(10, inf)", 35), ("(5, inf)", 20), ("(-inf, 0)", -20)),
+              rotulo='Crescimento 5A', unidade='%', casas=1),
+        Regra('sentimento_gauge', formula=lambda s: (s / 100.0) * 60 - 20,
+              rotulo='Sentimento', unidade='/100', casas=0),
+    ],
+    'score_ciclo_mercado': [
+        Regra('status_ciclo', categorias={'Compra': 70, 'Venda': -70}, rotulo='Ciclo de Mercado'),
+    ],
+    'score_graham': [
+        Regra('margem_graham', faixas(("(2.0, inf)", 150), ("(1.5, inf)", 130), ("(1.0, inf)", 110),
+                                      ("(0.5, inf)", 70), ("(0.2, inf)", 35), ("(0, inf)", 20), ("(-inf, 0]", -70)),
+              rotulo='Margem Graham', unidade='%', escala=100, casas=1),
+    ],
+    'score_beta': [
+        Regra('beta', faixas(("(-inf, 1.0)", 35), ("(1.5, inf)", -35)), rotulo='Beta'),
+    ],
+    'score_market_cap': [
+        Regra('market_cap', faixas(("(50000000000, inf)", 35), ("(10000000000, inf)", 25), ("(2000000000, inf)", 15)),
+              rotulo='Market Cap', unidade=' bi', escala=1e-9, casas=1),
+    ],
+    'score_liquidez': [
+        Regra('liquidez_media_diaria', faixas(("(50000000, inf)", 35), ("(20000000, inf)", 25), ("(5000000, inf)", 15)),
+              rotulo='Liquidez', unidade=' mi/dia', escala=1e-6, casas=1),
+    ],
+    'score_fcf_yield': [
+        Regra('fcf_yield', faixas(("(8, inf)", 35), ("(5, inf)", 20)), rotulo='FCF Yield', unidade='%', casas=1),
+    ],
+}
+
+
+def _numerica(df: pd.DataFrame, coluna: str) -> np.ndarray:
+    if coluna not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[coluna], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+
+def preparar_colunas(df: pd.DataFrame) -> dict[str, np.ndarray]:
+    """Extrai as colunas usadas pelas regras, incluindo as derivadas (Dívida/Market Cap, margem de Graham)."""
+    colunas = {nome: _numerica(df, nome) for nome in (
+        'dy12m', 'dy5anos', 'payout_ratio', 'roe', 'p_l', 'p_vp', 'divida_ebitda', 'current_ratio',
+        'crescimento_preco_5a', 'sentimento_gauge', 'beta', 'market_cap', 'liquidez_media_diaria', 'fcf_yield',
+    )}
+    setor = df['subsetor_b3'].astype(str) if 'subsetor_b3' in df.columns else pd.Series('N/A', index=df.index)
+    colunas['financeiro'] = setor.str.lower().str.contains('finance', regex=False).to_numpy(dtype=bool)
+    colunas['status_ciclo'] = (
+        df['status_ciclo'].to_numpy(dtype=object) if 'status_ciclo' in df.columns else np.full(len(df), None, dtype=object)
+    )
+
+    market_cap = colunas['market_cap']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        colunas['divida_market_cap'] = np.where(market_cap > 0, _numerica(df, 'divida_total') / market_cap, np.nan)
+
+    # Margem de segurança de Graham: só definida com preço, LPA e VPA positivos
+    preco, lpa, vpa = _numerica(df, 'preco_atual'), _numerica(df, 'lpa'), _numerica(df, 'vpa')
+    valido = (preco > 0) & (lpa > 0) & (vpa > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        numero_graham = np.where(valido, 22.5 * lpa * vpa, np.nan) ** 0.5
+        colunas['margem_graham'] = np.where(valido, numero_graham / preco - 1, np.nan)
+    return colunas
+
+
+def calcular_scores(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula os sub-scores, o score total e as explicações de todas as linhas
+    de uma vez.
+
+    Critérios apenas com pontos inteiros saem como int64; critérios com
+    fórmula (sentimento) saem como float64 quando alguma linha tem valor
+    fracionário, como na soma linha a linha original. As colunas
+    `score_codigos` e `score_detalhes` listam, na ordem da tabela de regras,
+    o código e o texto de cada regra que pontuou.
+    """
+    n = len(df)
+    colunas = preparar_colunas(df)
+    resultado = {'ticker': df['ticker'].to_numpy()}
+    total = np.zeros(n)
+    fracionario_total = np.zeros(n, dtype=bool)
+    linhas, codigos, detalhes = [], [], []
+
+    for criterio, regras in CRITERIOS.items():
+        pontos = np.zeros(n)
+        fracionario = np.zeros(n, dtype=bool)
+        for regra in regras:
+            pontos_regra, fracionaria, indice = regra.avaliar(colunas)
+            pontos = pontos + pontos_regra
+            fracionario |= fracionaria
+            for k in np.unique(indice[indice >= 0]):
+                selecionadas = np.flatnonzero(indice == k)
+                codigo, textos = regra.explicar(k, colunas[regra.coluna][selecionadas], pontos_regra[selecionadas])
+                linhas.append(selecionadas)
+                codigos.append(np.full(len(selecionadas), codigo, dtype=object))
+                detalhes.append(np.array(textos, dtype=object))
+        resultado[criterio] = pontos if fracionario.any() else pontos.astype('int64')
+        total = total + pontos
+        fracionario_total |= fracionario
+
+    positivo = total > 0
+    fracionario_total &= positivo
+    total = np.where(positivo, total, 0.0)
+    resultado['score_total'] = total if fracionario_total.any() else total.astype('int64')
+    resultado['score_codigos'], resultado['score_detalhes'] = _agrupar_por_linha(n, linhas, codigos, detalhes)
+    return pd.DataFrame(resultado)
+
+
+def _agrupar_por_linha(n: int, linhas: list, *listas: list) -> list[list[list[str]]]:
+    """Agrupa os valores explicativos por linha, mantendo a ordem em que as regras foram avaliadas."""
+    if not linhas:
+        return [[[] for _ in range(n)] for _ in listas]
+    todas_linhas = np.concatenate(linhas)
+    ordem = np.argsort(todas_linhas, kind='stable')
+    limites = np.concatenate(([0], np.cumsum(np.bincount(todas_linhas, minlength=n)))).tolist()
+    agrupados = []
+    for valores in listas:
+        plano = np.concatenate(valores)[ordem].tolist()
+        agrupados.append([plano[inicio:fim] for inicio, fim in zip(limites, limites[1:])])
+    return agrupados
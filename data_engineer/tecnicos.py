@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+Indicadores técnicos vetorizados sobre a matriz de preços (datas x tickers).
+
+Calcula RSI(14), histograma do MACD(12, 26, 9), último volume e a
+classificação do ciclo de mercado de todos os tickers de uma vez. As médias
+exponenciais são recorrências (`y = (1 - a) * y + a * x`) avançadas uma data
+por vez sobre todas as colunas, com as mesmas definições da biblioteca `ta`
+(`adjust=False`, `min_periods` igual à janela).
+
+Cada coluna é tratada como a série daquele ticker: datas sem preço (antes da
+estreia, em suspensões ou fora da janela) não entram na recorrência, de modo
+que o resultado é o mesmo de aplicar o `ta` ao histórico de cada ticker.
+"""
+
+import numpy as np
+import pandas as pd
+
+JANELA_RSI = 14
+MACD_RAPIDA, MACD_LENTA, MACD_SINAL = 12, 26, 9
+
+# Mínimo de pregões para cada indicador (como em `08-indicadores.py`)
+MINIMO_RSI = JANELA_RSI + 1
+MINIMO_MACD = MACD_LENTA + MACD_SINAL
+
+# Pontos de cada classificação no score do ciclo; as do MACD ('Baixa',
+# 'Neutra', 'Alta') não pontuam, como na regra original por palavra-chave.
+PONTOS_CLASSIFICACAO = {'Baixo': 10, 'Fraco': 10, 'Medio': 33, 'Normal': 33, 'Alto': 100, 'Forte': 100}
+
+
+def ewm_colunas(valores: np.ndarray, alpha: float, min_periodos: int) -> np.ndarray:
+    """
+    Média exponencial (`ewm(alpha=..., adjust=False).mean()`) de cada coluna.
+
+    NaN marca uma data sem observação na coluna: o estado é mantido e a saída
+    nessa data é NaN. A saída só é preenchida depois de `min_periodos`
+    observações da coluna.
+    """
+    saida = np.full(valores.shape, np.nan)
+    estado = np.full(valores.shape[1], np.nan)
+    observacoes = np.zeros(valores.shape[1], dtype=np.int64)
+    peso_antigo = 1.0 - alpha
+    for t, linha in enumerate(valores):
+        valido = ~np.isnan(linha)
+        if not valido.any():
+            continue
+        atualizado = (peso_antigo * estado + alpha * linha) / (peso_antigo + alpha)
+        estado = np.where(valido, np.where(np.isnan(estado), linha, atualizado), estado)
+        observacoes += valido
+        saida[t] = np.where(valido & (observacoes >= min_periodos), estado, np.nan)
+    return saida
+
+
+def variacao_colunas(valores: np.ndarray) -> np.ndarray:
+    """Diferença para a observação anterior da mesma coluna (NaN na primeira e nas datas sem preço)."""
+    anteriores = pd.DataFrame(valores).ffill().shift(1).to_numpy()
+    return valores - anteriores
+
+
+def rsi(closes: np.ndarray, janela: int = JANELA_RSI) -> np.ndarray:
+    """RSI de cada coluna, como `ta.momentum.RSIIndicator(close, window).rsi()`."""
+    valido = ~np.isnan(closes)
+    diferenca = variacao_colunas(closes)
+    # Como no `ta`, a variação ausente da primeira observação conta como zero
+    alta = np.where(valido, np.where(diferenca > 0, diferenca, 0.0), np.nan)
+    baixa = np.where(valido, np.where(diferenca < 0, -diferenca, 0.0), np.nan)
+    media_alta = ewm_colunas(alta, 1 / janela, janela)
+    media_baixa = ewm_colunas(baixa, 1 / janela, janela)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        resultado = np.where(media_baixa == 0, 100.0, 100 - (100 / (1 + media_alta / media_baixa)))
+    return np.where(valido, resultado, np.nan)
+
+
+def macd_hist(closes: np.ndarray, rapida: int = MACD_RAPIDA, lenta: int = MACD_LENTA,
+              sinal: int = MACD_SINAL) -> np.ndarray:
+    """Histograma do MACD de cada coluna, como `ta.trend.MACD(...).macd_diff()`."""
+    media_rapida = ewm_colunas(closes, 2 / (rapida + 1), rapida)
+    media_lenta = ewm_colunas(closes, 2 / (lenta + 1), lenta)
+    macd = media_rapida - media_lenta
+    return macd - ewm_colunas(macd, 2 / (sinal + 1), sinal)
+
+
+def recortar_anos(matriz: pd.DataFrame, anos: int = 1) -> pd.DataFrame:
+    """
+    Mantém, em cada coluna, só as datas posteriores a `anos` antes da sua
+    última data com preço (o recorte de `recortar_historico`, por ticker).
+    """
+    valido = matriz.notna().to_numpy()
+    if matriz.empty or not valido.any():
+        return matriz
+    ultima = len(matriz) - 1 - np.argmax(valido[::-1], axis=0)
+    inicios = pd.DatetimeIndex(matriz.index[ultima]) - pd.DateOffset(years=anos)
+    dentro = matriz.index.to_numpy()[:, None] > inicios.to_numpy()[None, :]
+    return matriz.where(dentro)
+
+
+def ultimos_valores(indicador: np.ndarray, referencia: np.ndarray) -> np.ndarray:
+    """Valor de `indicador` na última data em que a coluna de `referencia` tem dado (NaN se nenhuma)."""
+    valido = ~np.isnan(referencia)
+    posicao = len(referencia) - 1 - np.argmax(valido[::-1], axis=0)
+    valores = indicador[posicao, np.arange(indicador.shape[1])]
+    return np.where(valido.any(axis=0), valores, np.nan)
+
+
+def calcular_tecnicos(closes: pd.DataFrame, volumes: pd.DataFrame | None = None,
+                      minimo_rsi: int = MINIMO_RSI, minimo_macd: int = MINIMO_MACD) -> pd.DataFrame:
+    """
+    RSI, histograma do MACD e volume da última data de cada ticker (colunas
+    de `closes`). Tickers com menos pregões que o mínimo de cada indicador
+    ficam com NaN nele.
+
+    Returns:
+        pd.DataFrame: Índice de tickers e colunas 'rsi', 'macd', 'volume' e 'pregoes'.
+    """
+    if closes.empty:
+        return pd.DataFrame(columns=['rsi', 'macd', 'volume', 'pregoes'], index=closes.columns, dtype='float64')
+    valores = closes.to_numpy(dtype='float64')
+    pregoes = (~np.isnan(valores)).sum(axis=0)
+    rsi_final = ultimos_valores(rsi(valores), valores)
+    macd_final = ultimos_valores(macd_hist(valores), valores)
+    if volumes is not None:
+        volume = volumes.reindex(index=closes.index, columns=closes.columns).to_numpy(dtype='float64')
+        volume_final = ultimos_valores(volume, valores)
+    else:
+        volume_final = np.full(len(closes.columns), np.nan)
+    return pd.DataFrame({
+        'rsi': np.where(pregoes >= minimo_rsi, rsi_final, np.nan),
+        'macd': np.where(pregoes >= minimo_macd, macd_final, np.nan),
+        'volume': volume_final,
+        'pregoes': pregoes,
+    }, index=closes.columns)
+
+
+def classificar_faixas(valores, limite_baixo, limite_alto, rotulos: tuple[str, str, str]) -> np.ndarray:
+    """Rótulo de cada valor: abaixo, entre ou acima dos limites ('N/A' para ausentes)."""
+    valores = np.asarray(valores, dtype='float64')
+    return np.select(
+        [np.isnan(valores), valores < limite_baixo, valores > limite_alto],
+        ['N/A', rotulos[0], rotulos[2]],
+        default=rotulos[1],
+    )
+
+
+def classificar_ciclo(rsi_valores, macd_valores, volume_valores, volume_medio: float) -> pd.DataFrame:
+    """
+    Classificação vetorizada do ciclo de mercado (`calcular_dados_ciclo`):
+    status de RSI, MACD e volume, score médio (0 a 100) e ciclo.
+    """
+    status = {
+        'rsi_status': classificar_faixas(rsi_valores, 30, 70, ('Baixo', 'Medio', 'Alto')),
+        'macd_status': classificar_faixas(macd_valores, -0.5, 0.5, ('Baixa', 'Neutra', 'Alta')),
+        'volume_status': classificar_faixas(
+            volume_valores, volume_medio * 0.8, volume_medio * 1.2, ('Fraco', 'Normal', 'Forte')
+        ),
+    }
+    pontos = sum(
+        pd.Series(rotulos).map(PONTOS_CLASSIFICACAO).fillna(0).to_numpy() for rotulos in status.values()
+    )
+    # round() do Python arredonda .5 para o par; a soma de pontos / 3 nunca termina em .5
+    score = np.round(pontos / 3).astype('int64')
+    ciclo = np.select([score <= 30, score <= 60], ['Pânico / Fundo', 'Neutro / Transição'], default='Euforia / Topo')
+    return pd.DataFrame({**status, 'score_ciclo': score, 'ciclo_de_mercado': ciclo})
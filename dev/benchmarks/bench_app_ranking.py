@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark e verificação de equivalência da tabela 'app_ranking'.
+
+Compara o carregamento antigo do app (leitura de seis tabelas, normalização
+de 'ticker_base' em cada uma, merges do pandas e `df.apply` linha a linha)
+com a leitura da tabela 'app_ranking' materializada pela carga
+(`duckdb/carga/app_ranking.py`). Verifica que as colunas exibidas têm os
+mesmos valores e reporta o tempo de cada caminho em uma conexão nova
+(como no primeiro acesso de uma sessão).
+
+Uso (a partir da raiz do projeto, com o DW já carregado):
+    python dev/benchmarks/bench_app_ranking.py
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parents[2]
+DB_PATH = RAIZ / 'duckdb' / 'banco_dw' / 'dw.duckdb'
+sys.path.insert(0, str(RAIZ / 'duckdb' / 'carga'))
+
+from app_ranking import COLUNAS_EXIBICAO, COLUNAS_NUMERICAS, TABELA  # noqa: E402
+
+
+def ler(con, tabela: str) -> pd.DataFrame:
+    try:
+        return con.table(tabela).df()
+    except duckdb.Error:
+        return pd.DataFrame()
+
+
+def base(serie: pd.Series) -> pd.Series:
+    return serie.astype(str).str.upper().str.replace('.SA', '', regex=False).str.strip()
+
+
+def carregar_merges(con) -> pd.DataFrame:
+    """Implementação original de `load_and_merge_data` (sem o cache do Streamlit)."""
+    indic = ler(con, 'indicadores')
+    dy = ler(con, 'dividend_yield')
+    indic['ticker_base'] = base(indic['ticker'])
+    dy['ticker_base'] = base(dy['ticker'])
+    df = indic.merge(dy[['ticker_base', 'DY12m', 'DY5anos']], on='ticker_base', how='left')
+    df.rename(columns={k: v for k, v in COLUNAS_EXIBICAO.items() if k != 'status_ciclo'}, inplace=True)
+    if 'subsetor_b3' in df.columns:
+        df['Setor (brapi)'] = df['subsetor_b3']
+    for col in COLUNAS_NUMERICAS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    df['Ticker'] = df['ticker_base']
+    df['Dívida/Market Cap'] = df.apply(
+        lambda row: row['Dívida Total'] / row['Market Cap'] if row['Market Cap'] != 0 else 0, axis=1
+    )
+
+    scores_df = ler(con, 'scores')
+    scores_df['ticker_base'] = base(scores_df['ticker'])
+    df = df.merge(scores_df, left_on='Ticker', right_on='ticker_base', how='left', suffixes=('', '_scores'))
+    df['Score Total'] = pd.to_numeric(df['score_total'], errors='coerce').fillna(0)
+
+    pt = ler(con, 'preco_teto')
+    pt['ticker_base'] = base(pt['ticker'])
+    df = df.merge(pt[['ticker_base', 'preco_teto_5anos', 'diferenca_percentual']], left_on='Ticker',
+                  right_on='ticker_base', how='left', suffixes=('', '_pt'))
+    df.rename(columns={'preco_teto_5anos': 'Preço Teto 5A', 'diferenca_percentual': 'Alvo'}, inplace=True)
+
+    pa = ler(con, 'precos_acoes')
+    pa['ticker_base'] = base(pa['ticker'])
+    df = df.merge(pa[['ticker_base', 'fechamento_atual', 'fechamento_1m_atras', 'fechamento_6m_atras']],
+                  left_on='Ticker', right_on='ticker_base', how='left', suffixes=('', '_pa'))
+    df['Preço Atual'] = df['fechamento_atual'].combine_first(df['Preço Atual'])
+    df.drop(columns=['fechamento_atual'], inplace=True)
+    df.rename(columns={'fechamento_1m_atras': 'Preço 1M', 'fechamento_6m_atras': 'Preço 6M'}, inplace=True)
+    for period in ['1M', '6M']:
+        price_col, val_col = f'Preço {period}', f'Val {period}'
+        df[val_col] = df.apply(
+            lambda row: ((row['Preço Atual'] - row[price_col]) / row[price_col]) * 100
+            if row[price_col] and row[price_col] != 0 else 0,
+            axis=1
+        )
+
+    df_setor = ler(con, 'avaliacao_setor')
+    df_setor_scores = df_setor[['subsetor_b3', 'pontuacao_final']].drop_duplicates(subset=['subsetor_b3'])
+    df = df.merge(df_setor_scores, on='subsetor_b3', how='left')
+
+    df.rename(columns={'status_ciclo': 'Status Ciclo'}, inplace=True)
+    df['Status Ciclo'] = df['Status Ciclo'].fillna('N/A')
+    df.drop(columns=[col for col in df.columns if 'ticker_base' in str(col)], inplace=True, errors='ignore')
+    return df
+
+
+def carregar_app_ranking(con) -> pd.DataFrame:
+    return con.table(TABELA).df()
+
+
+def verificar(antigo: pd.DataFrame, novo: pd.DataFrame) -> None:
+    colunas = [c for c in antigo.columns if c in novo.columns and c != 'Score Details']
+    faltando = sorted(set(antigo.columns) - set(novo.columns) - {'ticker', 'ticker_scores', 'data_atualizacao_scores'})
+    assert not faltando, f"Colunas ausentes na app_ranking: {faltando}"
+    assert len(antigo) == len(novo), (len(antigo), len(novo))
+    a = antigo[colunas].sort_values('Ticker').reset_index(drop=True)
+    b = novo[colunas].sort_values('Ticker').reset_index(drop=True)
+    for coluna in colunas:
+        if pd.api.types.is_numeric_dtype(a[coluna]) and pd.api.types.is_numeric_dtype(b[coluna]):
+            assert np.allclose(a[coluna].astype(float), b[coluna].astype(float), equal_nan=True, rtol=1e-12), coluna
+        else:
+            assert a[coluna].fillna('<NA>').astype(str).equals(b[coluna].fillna('<NA>').astype(str)), coluna
+    print(f"✅ {len(novo)} linhas, {len(colunas)} colunas com os mesmos valores.")
+
+
+def cronometrar(funcao, repeticoes: int) -> float:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        con = duckdb.connect(str(DB_PATH), read_only=True)
+        inicio = time.perf_counter()
+        funcao(con)
+        melhor = min(melhor, time.perf_counter() - inicio)
+        con.close()
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=5, help='Repetições de cada caminho (padrão: 5)')
+    args = parser.parse_args()
+
+    with duckdb.connect(str(DB_PATH), read_only=True) as con:
+        verificar(carregar_merges(con), carregar_app_ranking(con))
+
+    t_merges = cronometrar(carregar_merges, args.repeticoes)
+    t_tabela = cronometrar(carregar_app_ranking, args.repeticoes)
+    print(f"  merges no app (original): {t_merges * 1000:8.1f} ms")
+    print(f"  app_ranking:              {t_tabela * 1000:8.1f} ms  ({t_merges / t_tabela:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
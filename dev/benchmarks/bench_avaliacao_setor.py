@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark e verificação de equivalência da avaliação de setores de `11-avaliacao_setor.py`.
+
+Compara o cálculo original (cinco merges, um `groupby` por estatística ou
+contagem e sete `Series.apply` com as funções de pontuação escalares) com
+`avaliar_setores` (uma única agregação agrupada com as contagens
+condicionais e pontuação por faixas sobre as colunas inteiras). A tabela
+'avaliacao_setor' dos dois caminhos deve ser idêntica (valores, tipos e
+ordem das linhas), tanto nos dados reais da land_dw (quando existirem)
+quanto em uma base sintética com valores ausentes, limites exatos das faixas
+e subsetores sem setor.
+
+Uso (a partir da raiz do projeto):
+    python dev/benchmarks/bench_avaliacao_setor.py --tickers 50000 --subsetores 500
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parents[2]
+DATA_ENGINEER_DIR = RAIZ / 'data_engineer'
+LAND_DW_DIR = RAIZ / 'duckdb' / 'land_dw'
+sys.path.insert(0, str(DATA_ENGINEER_DIR))
+
+
+def carregar_modulo_setor():
+    """Importa `11-avaliacao_setor.py` (nome de arquivo não é um identificador válido)."""
+    spec = importlib.util.spec_from_file_location('avaliacao_setor', DATA_ENGINEER_DIR / '11-avaliacao_setor.py')
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+# --- Implementação original ---
+
+def calcular_score_dy(dy_5a_medio):
+    if dy_5a_medio >= 10: return 150
+    if 8 <= dy_5a_medio < 10: return 120
+    if 6 <= dy_5a_medio < 8: return 90
+    if 4 <= dy_5a_medio < 6: return 60
+    if 2 <= dy_5a_medio < 4: return -30
+    if dy_5a_medio < 2: return -60
+    if dy_5a_medio < 1: return -90
+    return 0
+
+def calcular_score_roe(roe_medio):
+    if roe_medio > 25: return 75
+    if 20 <= roe_medio <= 25: return 55
+    if 15 <= roe_medio < 20: return 35
+    if 10 <= roe_medio < 15: return 20
+    return 0
+
+def calcular_score_beta(beta_medio):
+    if beta_medio < 0.8: return 35
+    if 0.8 <= beta_medio <= 1.2: return 20
+    if beta_medio > 1.5: return -20
+    return 0
+
+def calcular_score_payout(payout_medio):
+    if 30 <= payout_medio <= 60: return 35
+    if (20 <= payout_medio < 30) or (60 < payout_medio <= 80): return 20
+    return 0
+
+def calcular_score_empresas_boas(contagem):
+    if contagem >= 8: return 75
+    if 6 <= contagem < 8: return 55
+    if 3 <= contagem <= 5: return 35
+    if 1 <= contagem <= 2: return 20
+    return 0
+
+def calcular_penalidade_empresas_ruins(contagem):
+    if contagem >= 6: return -60
+    if 3 <= contagem <= 5: return -40
+    if 1 <= contagem <= 2: return -20
+    return 0
+
+def calcular_score_graham(margem_media):
+    if margem_media > 150: return 55
+    if 100 <= margem_media <= 150: return 35
+    if 50 <= margem_media < 100: return 20
+    return 0
+
+
+def avaliar_setores_original(indicadores_df, dy_df, scores_df, rj_df, acoes_df) -> pd.DataFrame:
+    """Corpo original de `main()` em `11-avaliacao_setor.py`."""
+    dy_df, rj_df = dy_df.copy(), rj_df.copy()
+    indicadores_df = indicadores_df.drop(columns=['setor_b3', 'subsetor_b3'], errors='ignore')
+    merged_df = pd.merge(indicadores_df, acoes_df[['ticker', 'setor_b3', 'subsetor_b3']].drop_duplicates(), on="ticker", how="left")
+    dy_df.rename(columns={'DY5anos': 'dy5anos'}, inplace=True)
+    merged_df = pd.merge(merged_df, dy_df[['ticker', 'dy5anos']], on="ticker", how="left")
+    merged_df = pd.merge(merged_df, scores_df[['ticker', 'score_total']], on="ticker", how="left")
+
+    merged_df = merged_df.dropna(subset=['setor_b3', 'subsetor_b3'])
+    numeric_cols = ['roe', 'beta', 'payout_ratio', 'margem_seguranca_percent', 'dy5anos', 'score_total']
+    for col in numeric_cols:
+        merged_df[col] = pd.to_numeric(merged_df[col], errors='coerce')
+    merged_df = merged_df.fillna(0)
+
+    subsetor_stats = merged_df.groupby('subsetor_b3').agg(
+        roe_medio=('roe', 'mean'),
+        beta_medio=('beta', 'mean'),
+        payout_medio=('payout_ratio', 'mean'),
+        dy_5a_medio=('dy5anos', 'mean'),
+        margem_graham_media=('margem_seguranca_percent', 'mean'),
+        score_original=('score_total', 'mean')
+    ).reset_index()
+
+    boas = merged_df[merged_df['score_total'] > 300].groupby('subsetor_b3').size().reset_index(name='empresas_boas_contagem')
+    subsetor_stats = pd.merge(subsetor_stats, boas, on='subsetor_b3', how='left')
+
+    ruins = merged_df[merged_df['score_total'] < 100].groupby('subsetor_b3').size().reset_index(name='empresas_ruins_contagem')
+    subsetor_stats = pd.merge(subsetor_stats, ruins, on='subsetor_b3', how='left')
+
+    rj_df['setor'] = rj_df['setor'].str.strip()
+    rj_counts = rj_df[rj_df['data_saida_rj'].isnull()].groupby('setor').size().reset_index(name='ocorrencias_rj')
+    subsetor_stats = pd.merge(subsetor_stats, rj_counts, left_on='subsetor_b3', right_on='setor', how='left').drop(columns='setor')
+
+    subsetor_stats = subsetor_stats.fillna(0)
+
+    score_original_scaled = subsetor_stats['score_original']
+    subsetor_stats['score_dy'] = subsetor_stats['dy_5a_medio'].apply(calcular_score_dy)
+    subsetor_stats['score_roe'] = subsetor_stats['roe_medio'].apply(calcular_score_roe)
+    subsetor_stats['score_beta'] = subsetor_stats['beta_medio'].apply(calcular_score_beta)
+    subsetor_stats['score_payout'] = subsetor_stats['payout_medio'].apply(calcular_score_payout)
+    subsetor_stats['score_empresas_boas'] = subsetor_stats['empresas_boas_contagem'].apply(calcular_score_empresas_boas)
+    subsetor_stats['penalidade_empresas_ruins'] = subsetor_stats['empresas_ruins_contagem'].apply(calcular_penalidade_empresas_ruins)
+    subsetor_stats['score_graham'] = subsetor_stats['margem_graham_media'].apply(calcular_score_graham)
+
+    max_ocorrencias = subsetor_stats['ocorrencias_rj'].max()
+    if max_ocorrencias > 0:
+        subsetor_stats['penalidade_rj'] = -(subsetor_stats['ocorrencias_rj'] / max_ocorrencias * 80)
+    else:
+        subsetor_stats['penalidade_rj'] = 0
+
+    positive_score_cols = ['score_dy', 'score_roe', 'score_beta', 'score_payout', 'score_empresas_boas', 'score_graham']
+    subsetor_stats['pontuacao_positiva'] = subsetor_stats[positive_score_cols].sum(axis=1) + score_original_scaled
+
+    penalty_cols = ['penalidade_empresas_ruins', 'penalidade_rj']
+    subsetor_stats['pontuacao_final'] = subsetor_stats['pontuacao_positiva'] + subsetor_stats[penalty_cols].sum(axis=1)
+
+    setor_mapping = acoes_df[['setor_b3', 'subsetor_b3']].drop_duplicates()
+    resultado_final = pd.merge(subsetor_stats, setor_mapping, on='subsetor_b3', how='left')
+
+    pontuacao_setor_media = resultado_final.groupby('setor_b3')['pontuacao_final'].mean().reset_index()
+    pontuacao_setor_media = pontuacao_setor_media.rename(columns={'pontuacao_final': 'pontuacao_setor'})
+
+    resultado_final = pd.merge(resultado_final, pontuacao_setor_media, on='setor_b3', how='left')
+
+    colunas_finais = [
+        'setor_b3', 'pontuacao_setor', 'subsetor_b3', 'pontuacao_final',
+        'score_dy', 'score_roe', 'score_beta', 'score_payout',
+        'score_empresas_boas', 'penalidade_empresas_ruins', 'score_graham', 'penalidade_rj',
+        'dy_5a_medio', 'roe_medio', 'beta_medio', 'payout_medio', 'margem_graham_media', 'score_original',
+        'empresas_boas_contagem', 'empresas_ruins_contagem', 'ocorrencias_rj'
+    ]
+    resultado_final = resultado_final[colunas_finais]
+    resultado_final = resultado_final.sort_values(by=['pontuacao_setor', 'pontuacao_final'], ascending=[False, False])
+
+    for col in resultado_final.columns:
+        if pd.api.types.is_numeric_dtype(resultado_final[col]):
+            resultado_final[col] = resultado_final[col].round(2)
+    return resultado_final
+
+
+# --- Bases de comparação ---
+
+def ler_land_dw() -> tuple | None:
+    nomes = ['indicadores', 'dividend_yield', 'scores', 'rj', 'acoes_e_fundos']
+    if not all((LAND_DW_DIR / f'{nome}.parquet').exists() for nome in nomes):
+        return None
+    return tuple(pd.read_parquet(LAND_DW_DIR / f'{nome}.parquet') for nome in nomes)
+
+
+def gerar_base(n_tickers: int, n_subsetores: int, semente: int = 11) -> tuple:
+    """Entradas sintéticas com ausentes, valores nos limites das faixas e subsetores sem setor."""
+    rng = np.random.default_rng(semente)
+    tickers = np.array([f'T{i:06d}' for i in range(n_tickers)], dtype=object)
+    subsetores = np.array([f'Subsetor {i:04d}' for i in range(n_subsetores)], dtype=object)
+    setores = np.array([f'Setor {i:03d}' for i in range(max(1, n_subsetores // 8))], dtype=object)
+    subsetor_ticker = subsetores[rng.integers(0, n_subsetores, n_tickers)]
+    setor_do_subsetor = dict(zip(subsetores, setores[rng.integers(0, len(setores), n_subsetores)]))
+    setor_ticker = np.array([setor_do_subsetor[s] for s in subsetor_ticker], dtype=object)
+    setor_ticker[rng.random(n_tickers) < 0.01] = None
+
+    codigo_subsetor = pd.Series(subsetor_ticker).str[-4:].astype(int).to_numpy()
+
+    def coluna(escala, limites):
+        # Em parte dos subsetores todos os tickers têm o mesmo limite de faixa (média exata no limite)
+        valores = rng.normal(escala, escala, n_tickers)
+        no_limite = rng.random(n_subsetores) < 0.1
+        limite_subsetor = rng.choice(limites, n_subsetores)
+        valores = np.where(no_limite[codigo_subsetor], limite_subsetor[codigo_subsetor], valores)
+        valores[~no_limite[codigo_subsetor] & (rng.random(n_tickers) < 0.05)] = np.nan
+        return valores
+
+    acoes = pd.DataFrame({'ticker': tickers, 'setor_b3': setor_ticker, 'subsetor_b3': subsetor_ticker})
+    indicadores = pd.DataFrame({
+        'ticker': tickers,
+        'roe': coluna(15, [10, 15, 20, 25]),
+        'beta': coluna(1, [0.8, 1.2, 1.5]),
+        'payout_ratio': coluna(50, [20, 30, 60, 80]),
+        'margem_seguranca_percent': coluna(60, [50, 100, 150]),
+        'subsetor_b3': subsetor_ticker,
+        'empresa': [f'Empresa {t}' for t in tickers],
+        **{f'indicador_{i:02d}': rng.normal(0, 1, n_tickers) for i in range(25)},
+    })
+    dy = pd.DataFrame({'ticker': tickers, 'DY5anos': coluna(5, [2, 4, 6, 8, 10])})
+    scores = pd.DataFrame({'ticker': tickers, 'score_total': rng.integers(0, 600, n_tickers)})
+    n_rj = max(1, n_subsetores // 5)
+    rj = pd.DataFrame({
+        'setor': [f' {s} ' for s in rng.choice(subsetores, n_rj)],
+        'data_saida_rj': np.where(rng.random(n_rj) < 0.3, '2024-01-01', None),
+    })
+    return indicadores, dy, scores, rj, acoes
+
+
+def verificar(modulo, entradas: tuple, descricao: str) -> None:
+    antigo = avaliar_setores_original(*entradas)
+    novo = modulo.avaliar_setores(*entradas)
+    pd.testing.assert_frame_equal(antigo.reset_index(drop=True), novo.reset_index(drop=True), check_exact=True)
+    print(f"✅ {descricao}: {len(novo)} subsetores com a mesma tabela 'avaliacao_setor'.")
+
+
+def cronometrar(funcao, repeticoes: int) -> float:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=50_000, help='Número de tickers (padrão: 50000)')
+    parser.add_argument('--subsetores', type=int, default=500, help='Número de subsetores (padrão: 500)')
+    parser.add_argument('--repeticoes', type=int, default=3, help='Repetições de cada caminho (padrão: 3)')
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        modulo = carregar_modulo_setor()
+
+    reais = ler_land_dw()
+    if reais is not None:
+        verificar(modulo, reais, 'land_dw')
+    entradas = gerar_base(args.tickers, args.subsetores)
+    verificar(modulo, entradas, 'base sintética')
+
+    t_antigo = cronometrar(lambda: avaliar_setores_original(*entradas), args.repeticoes)
+    t_novo = cronometrar(lambda: modulo.avaliar_setores(*entradas), args.repeticoes)
+    print(f"  universo: {args.tickers} tickers, {args.subsetores} subsetores")
+    print(f"  merges + apply (original): {t_antigo * 1000:8.1f} ms")
+    print(f"  agregação única:           {t_novo * 1000:8.1f} ms  ({t_antigo / t_novo:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
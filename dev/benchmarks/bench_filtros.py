@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark e verificação de equivalência dos filtros da sidebar.
+
+Compara o filtro do app (máscaras booleanas do pandas sobre o DataFrame
+completo, `.copy()` e `sort_values`, em app/components/filters.py) com a
+mesma seleção feita por uma consulta parametrizada no DuckDB, para várias
+combinações de filtros. Com `--fator N`, a 'app_ranking' é replicada N
+vezes em um banco em memória para simular um universo maior de ações.
+
+Medido de 373 a 1,1 milhão de linhas, a consulta (sem cache) foi sempre
+mais lenta que as máscaras; por isso o app continua filtrando em memória.
+
+Uso (a partir da raiz do projeto, com o DW já carregado):
+    python dev/benchmarks/bench_filtros.py [--fator 100]
+"""
+
+import argparse
+import itertools
+import time
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parents[2]
+DB_PATH = RAIZ / 'duckdb' / 'banco_dw' / 'dw.duckdb'
+
+
+def filtrar_pandas(df: pd.DataFrame, perfis, score_range, subsetor_score_min, dy_min, dy_5y_min, ticker_foco):
+    """Implementação de `render_sidebar_filters`."""
+    df_filtrado = df[
+        (df['Perfil da Ação'].isin(perfis)) &
+        (df['Score Total'].between(score_range[0], score_range[1])) &
+        (df['DY (Taxa 12m, %)'] >= dy_min) &
+        (df['DY 5 Anos Média (%)'] >= dy_5y_min) &
+        (df['pontuacao_final'].fillna(0) >= subsetor_score_min)
+    ].copy()
+    if ticker_foco:
+        df_filtrado = df_filtrado[df_filtrado['Ticker'] == ticker_foco]
+    return df_filtrado.sort_values(by='Score Total', ascending=False)
+
+
+def montar_consulta_filtros(perfis: tuple, score_range: tuple, subsetor_score_min: float,
+                            dy_min: float, dy_5y_min: float, ticker_foco: str | None) -> tuple[str, list]:
+    """
+    Consulta parametrizada equivalente às máscaras (nulos nunca passam nos
+    filtros, exceto a pontuação do setor, tratada como 0).
+    """
+    condicoes, parametros = [], []
+    if perfis:
+        condicoes.append(f'"Perfil da Ação" IN ({", ".join("?" * len(perfis))})')
+        parametros.extend(perfis)
+    else:
+        condicoes.append('FALSE')
+    condicoes.append('"Score Total" BETWEEN ? AND ?')
+    parametros.extend(score_range)
+    condicoes.append('"DY (Taxa 12m, %)" >= ?')
+    parametros.append(dy_min)
+    condicoes.append('"DY 5 Anos Média (%)" >= ?')
+    parametros.append(dy_5y_min)
+    condicoes.append('COALESCE(pontuacao_final, 0) >= ?')
+    parametros.append(subsetor_score_min)
+    if ticker_foco:
+        condicoes.append('"Ticker" = ?')
+        parametros.append(ticker_foco)
+    consulta = (
+        "SELECT * FROM app_ranking WHERE " + " AND ".join(condicoes)
+        + ' ORDER BY "Score Total" DESC, rowid'
+    )
+    return consulta, parametros
+
+
+def filtrar_duckdb(con, *filtros) -> pd.DataFrame:
+    consulta, parametros = montar_consulta_filtros(*filtros)
+    return con.execute(consulta, parametros).to_arrow_table().to_pandas(split_blocks=True)
+
+
+def combinacoes(df: pd.DataFrame) -> list[tuple]:
+    perfis = sorted(df['Perfil da Ação'].dropna().unique().tolist())
+    ticker = df['Ticker'].iloc[0]
+    return [
+        (tuple(p), faixa, setor, dy, dy5, foco)
+        for p, faixa, setor, dy, dy5, foco in itertools.product(
+            [perfis, perfis[1:], []], [(0, 1000), (350, 1000)], [0, 350], [0.0, 6.0], [0.0, 6.0], [None, ticker],
+        )
+    ]
+
+
+def verificar(con, df: pd.DataFrame) -> None:
+    casos = combinacoes(df)
+    for filtros in casos:
+        antigo = filtrar_pandas(df, *filtros)
+        novo = filtrar_duckdb(con, *filtros)
+        assert len(antigo) == len(novo), (filtros, len(antigo), len(novo))
+        # Empates no score podem sair em outra ordem: compara o conjunto e a ordem do score
+        assert sorted(antigo['Ticker']) == sorted(novo['Ticker']), filtros
+        assert np.array_equal(antigo['Score Total'].to_numpy(), novo['Score Total'].to_numpy()), filtros
+    print(f"✅ {len(casos)} combinações de filtros com o mesmo resultado.")
+
+
+def cronometrar(funcao, repeticoes: int) -> float:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fator', type=int, default=1, help='Replicações da app_ranking (padrão: 1)')
+    parser.add_argument('--repeticoes', type=int, default=5, help='Repetições de cada caminho (padrão: 5)')
+    args = parser.parse_args()
+
+    with duckdb.connect(str(DB_PATH), read_only=True) as origem:
+        verificar(origem, origem.table('app_ranking').df())
+        base = origem.table('app_ranking').to_arrow_table()
+
+    con = duckdb.connect()
+    con.register('base', base)
+    con.execute(f"CREATE TABLE app_ranking AS SELECT base.* FROM base, range({args.fator})")
+    df = con.table('app_ranking').df()
+    filtros = (tuple(sorted(df['Perfil da Ação'].dropna().unique())), (350, 1000), 350, 6.0, 6.0, None)
+
+    t_pandas = cronometrar(lambda: filtrar_pandas(df, *filtros), args.repeticoes)
+    t_duckdb = cronometrar(lambda: filtrar_duckdb(con, *filtros), args.repeticoes)
+    # Combinação já vista: o app só converte o resultado Arrow guardado no cache LRU
+    consulta, parametros = montar_consulta_filtros(*filtros)
+    em_cache = con.execute(consulta, parametros).to_arrow_table()
+    t_cache = cronometrar(lambda: em_cache.to_pandas(split_blocks=True), args.repeticoes)
+    print(f"  universo: {len(df)} linhas, {em_cache.num_rows} selecionadas")
+    print(f"  máscaras do pandas (app):      {t_pandas * 1000:8.1f} ms")
+    print(f"  consulta no DuckDB:            {t_duckdb * 1000:8.1f} ms  ({t_pandas / t_duckdb:.1f}x)")
+    print(f"  consulta em cache:             {t_cache * 1000:8.1f} ms  ({t_pandas / t_cache:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
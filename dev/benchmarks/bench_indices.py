@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark e verificação da coleta de índices de `12-indices.py`.
+
+Compara a coleta original (um `get_history` por índice, indicadores técnicos
+por histórico e um `pd.concat` por ano e por índice) com `coletar_indices`
+(um único `download` em lote, fechamentos de fim de ano por `groupby` e
+indicadores sobre a matriz datas x índices). Os históricos sintéticos são
+servidos por um `StaticQuoteProvider` e incluem índices que estreiam no meio
+do período, com poucos pregões (sem indicadores) e sem dados. A tabela
+'indices' dos dois caminhos deve ser idêntica.
+
+Uso (a partir da raiz do projeto):
+    python dev/benchmarks/bench_indices.py --indices 200
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import sys
+import time
+import warnings
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DATA_ENGINEER_DIR = Path(__file__).resolve().parents[2] / 'data_engineer'
+sys.path.insert(0, str(DATA_ENGINEER_DIR))
+
+from providers import StaticQuoteProvider  # noqa: E402
+from tecnicos import MINIMO_MACD, calcular_tecnicos  # noqa: E402
+
+
+def carregar_modulo_indices():
+    """Importa `12-indices.py` (nome de arquivo não é um identificador válido)."""
+    spec = importlib.util.spec_from_file_location('indices', DATA_ENGINEER_DIR / '12-indices.py')
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def gerar_historicos(n_indices: int, semente: int = 12) -> tuple[dict[str, str], dict[str, pd.DataFrame]]:
+    """Históricos de 5 anos no formato de `Ticker.history()` (índice de datas com fuso)."""
+    rng = np.random.default_rng(semente)
+    hoje = pd.Timestamp.today().normalize()
+    datas = pd.bdate_range(hoje - pd.DateOffset(years=5), hoje, tz='America/Sao_Paulo', name='Date')
+    indices, historicos = {}, {}
+    for i in range(n_indices):
+        codigo = f'IDX{i:04d}.SA'
+        indices[codigo] = f'Índice {i}'
+        if i % 37 == 5:  # sem dados
+            continue
+        inicio = 0
+        if i % 7 == 3:  # estreia no meio do período
+            inicio = int(rng.integers(1, len(datas) - 60))
+        if i % 23 == 4:  # poucos pregões, abaixo do mínimo do MACD
+            inicio = len(datas) - int(rng.integers(5, MINIMO_MACD))
+        indice = datas[inicio:]
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.015, len(indice))))
+        historicos[codigo] = pd.DataFrame({
+            'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+            'Volume': rng.integers(10_000, 5_000_000, len(indice)),
+        }, index=indice)
+    return indices, historicos
+
+
+# --- Implementação original (com o provedor como parâmetro) ---
+
+def compute_indicadores_tecnicos(hist: pd.DataFrame) -> dict:
+    indicadores = {'rsi': None, 'macd': None, 'volume': None}
+    if hist.empty or len(hist) < MINIMO_MACD:
+        return indicadores
+
+    tecnicos = calcular_tecnicos(hist[['Close']]).iloc[0]
+    indicadores['rsi'] = tecnicos['rsi']
+    indicadores['macd'] = tecnicos['macd']
+    indicadores['volume'] = hist['Volume'].iloc[-1] if 'Volume' in hist.columns and not hist['Volume'].empty else None
+
+    return {k: round(v, 2) if v is not None else None for k, v in indicadores.items()}
+
+
+def get_annual_closing(provider, index_code, index_name):
+    hist = provider.get_history(index_code, period="5y", auto_adjust=True)
+    if hist.empty:
+        return pd.DataFrame()
+
+    hist.reset_index(inplace=True)
+    hist['year'] = pd.to_datetime(hist['Date']).dt.year
+
+    tecnicos = compute_indicadores_tecnicos(hist)
+    annual = pd.DataFrame()
+    current_year = datetime.now().year
+
+    for year in range(current_year - 4, current_year + 1):
+        year_data = hist[hist['year'] == year]
+        if not year_data.empty:
+            last_day = year_data[year_data['Date'] == year_data['Date'].max()]
+            if not last_day.empty:
+                last_day = last_day.copy()
+                last_day.loc[:, 'index'] = index_name
+                for key, value in tecnicos.items():
+                    last_day.loc[:, key] = value
+
+                cols_to_keep = ['year', 'index', 'Close', 'rsi', 'macd', 'volume']
+                annual = pd.concat([annual, last_day[[c for c in cols_to_keep if c in last_day.columns]]], ignore_index=True)
+
+    return annual[annual['year'] >= current_year - 5]
+
+
+def coletar_original(indices: dict[str, str], provider) -> pd.DataFrame:
+    all_data = pd.DataFrame()
+    for code, name in indices.items():
+        df = get_annual_closing(provider, code, name)
+        if not df.empty:
+            all_data = pd.concat([all_data, df], ignore_index=True)
+    all_data.columns = [col.lower() for col in all_data.columns]
+    all_data['close'] = all_data['close'].round(2)
+    return all_data
+
+
+def verificar(antigo: pd.DataFrame, novo: pd.DataFrame) -> None:
+    # O caminho original deixa 'rsi'/'macd'/'volume' como object quando algum índice não tem indicadores
+    for coluna in ('rsi', 'macd', 'volume'):
+        if antigo[coluna].dtype == object:
+            antigo[coluna] = pd.to_numeric(antigo[coluna])
+    pd.testing.assert_frame_equal(antigo, novo, check_exact=True)
+    print(f"✅ {novo['index'].nunique()} índices, {len(novo)} linhas: tabela 'indices' idêntica.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--indices', type=int, default=200, help='Número de índices (padrão: 200)')
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        modulo = carregar_modulo_indices()
+    indices, historicos = gerar_historicos(args.indices)
+    provider = StaticQuoteProvider(historicos=historicos)
+
+    # O caminho original altera o histórico recebido (reset_index inplace): recebe cópias
+    copias = StaticQuoteProvider(historicos={c: h.copy() for c, h in historicos.items()})
+    inicio = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning)
+        antigo = coletar_original(indices, copias)
+    t_antigo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        novo = modulo.coletar_indices(indices, provider)
+    t_novo = time.perf_counter() - inicio
+
+    verificar(antigo, novo)
+    # Com o padrão (5 índices) a coleta original fazia 5 requisições; a nova faz 1
+    print(f"  requisições: {len(indices)} (original) -> 1 (lote)")
+    print(f"  por índice + concat por ano (original): {t_antigo * 1000:8.0f} ms")
+    print(f"  lote + groupby:                         {t_novo * 1000:8.0f} ms  ({t_antigo / t_novo:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
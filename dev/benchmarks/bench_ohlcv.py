@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark e verificação do armazém de histórico diário (`data_engineer/ohlcv.py`).
+
+Gera históricos sintéticos (passeios aleatórios em dias úteis) servidos por um
+`StaticQuoteProvider`, e, em um diretório temporário:
+
+1. carrega o armazém vazio e confere que a leitura devolve exatamente os
+   dados de origem (matriz de fechamentos e histórico por ticker);
+2. acrescenta um pregão e mede a atualização incremental, conferindo que só a
+   partição do ano corrente de cada ticker é reescrita;
+3. acrescenta um dividendo em um ticker e confere que só ele é refeito;
+4. mede a leitura a frio (processo novo, índice e arquivos ainda não abertos)
+   e a quente (repetida no mesmo processo) da matriz de fechamentos de 7
+   anos, usada por `05-preco_acoes.py`, e dos históricos de 5 anos, usados
+   por `08-indicadores.py`.
+
+Uso (a partir da raiz do projeto):
+    python dev/benchmarks/bench_ohlcv.py --tickers 500 --anos 7
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DATA_ENGINEER_DIR = Path(__file__).resolve().parents[2] / 'data_engineer'
+sys.path.insert(0, str(DATA_ENGINEER_DIR))
+
+from ohlcv import ARQUIVO_PARTICAO, OHLCVStore  # noqa: E402
+from providers import StaticQuoteProvider  # noqa: E402
+
+
+def gerar_historicos(n_tickers: int, datas: pd.DatetimeIndex, semente: int = 42) -> dict[str, pd.DataFrame]:
+    """Históricos no formato de `Ticker.history()`; alguns tickers começam no meio do período."""
+    rng = np.random.default_rng(semente)
+    historicos = {}
+    for i in range(n_tickers):
+        inicio = rng.integers(0, len(datas) // 2) if i % 10 == 0 else 0
+        indice = datas[inicio:]
+        close = np.round(20 * np.exp(np.cumsum(rng.normal(0, 0.02, len(indice)))), 4)
+        historicos[f'T{i:05d}.SA'] = pd.DataFrame({
+            'Open': close * 0.99, 'High': close * 1.01, 'Low': close * 0.98, 'Close': close,
+            'Volume': rng.integers(1_000, 1_000_000, len(indice)),
+            'Dividends': 0.0, 'Stock Splits': 0.0,
+        }, index=pd.DatetimeIndex(indice, name='Date'))
+    return historicos
+
+
+def tamanho_em_disco(diretorio: Path) -> int:
+    return sum(p.stat().st_size for p in diretorio.rglob('*.parquet'))
+
+
+def ler_tudo(store: OHLCVStore, tickers: list[str], hoje: pd.Timestamp, anos: int):
+    store.fechamentos(tickers, inicio=pd.Timestamp(hoje.year - anos, 1, 1), fim=hoje)
+    store.historicos(tickers, inicio=hoje - pd.DateOffset(years=5))
+
+
+def leitura_fria(diretorio: Path, tickers: list[str], hoje: pd.Timestamp, anos: int) -> float:
+    """Mede, em um processo novo, a primeira leitura do armazém."""
+    comando = [sys.executable, __file__, '--leitura-fria', str(diretorio), '--tickers', str(len(tickers)),
+               '--anos', str(anos), '--hoje', hoje.strftime('%Y-%m-%d')]
+    saida = subprocess.run(comando, capture_output=True, text=True, check=True).stdout
+    return json.loads(saida.strip().splitlines()[-1])['segundos']
+
+
+def verificar_leitura(store: OHLCVStore, historicos: dict[str, pd.DataFrame]) -> None:
+    tickers = list(historicos)
+    esperado = pd.DataFrame({t: h['Close'] for t, h in historicos.items()}).sort_index()
+    obtido = store.fechamentos(tickers)
+    pd.testing.assert_frame_equal(obtido, esperado, check_names=False, check_freq=False)
+    lidos = store.historicos(tickers)
+    for ticker, hist in historicos.items():
+        pd.testing.assert_frame_equal(lidos[ticker], hist, check_freq=False)
+    print(f"✅ Leitura idêntica aos dados de origem ({len(tickers)} tickers).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=500, help='Número de tickers (padrão: 500)')
+    parser.add_argument('--anos', type=int, default=7, help='Anos de histórico (padrão: 7)')
+    parser.add_argument('--repeticoes', type=int, default=5, help='Repetições da leitura a quente (padrão: 5)')
+    parser.add_argument('--leitura-fria', type=Path, help=argparse.SUPPRESS)
+    parser.add_argument('--hoje', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    tickers = [f'T{i:05d}.SA' for i in range(args.tickers)]
+
+    if args.leitura_fria:
+        hoje = pd.Timestamp(args.hoje)
+        inicio = time.perf_counter()
+        ler_tudo(OHLCVStore(args.leitura_fria), tickers, hoje, args.anos)
+        print(json.dumps({'segundos': time.perf_counter() - inicio}))
+        return
+
+    hoje = pd.Timestamp.today().normalize()
+    datas = pd.bdate_range(pd.Timestamp(hoje.year - args.anos, 1, 1), hoje - pd.Timedelta(days=1))
+    historicos = gerar_historicos(args.tickers, datas)
+    inicio_janela = f"{hoje.year - args.anos}-01-01"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        diretorio = Path(tmp) / 'ohlcv'
+        store = OHLCVStore(diretorio)
+
+        t0 = time.perf_counter()
+        resumo = store.atualizar(tickers, inicio_janela, StaticQuoteProvider(historicos=historicos))
+        t_carga = time.perf_counter() - t0
+        assert len(resumo['completos']) == args.tickers, resumo
+        verificar_leitura(OHLCVStore(diretorio), historicos)
+
+        # Um pregão novo para todos os tickers
+        novo_dia = hoje
+        for ticker, hist in historicos.items():
+            linha = hist.iloc[[-1]].copy()
+            linha.index = pd.DatetimeIndex([novo_dia], name='Date')
+            historicos[ticker] = pd.concat([hist, linha])
+        arquivos = {p: p.stat().st_mtime_ns for p in diretorio.rglob(ARQUIVO_PARTICAO)}
+        t0 = time.perf_counter()
+        resumo = store.atualizar(tickers, inicio_janela, StaticQuoteProvider(historicos=historicos))
+        t_incremental = time.perf_counter() - t0
+        reescritos = [p for p in diretorio.rglob(ARQUIVO_PARTICAO) if arquivos.get(p) != p.stat().st_mtime_ns]
+        assert len(resumo['incrementais']) == args.tickers and not resumo['refeitos'], resumo
+        assert all(p.parent.name == f'ano={novo_dia.year}' for p in reescritos), 'partições antigas reescritas'
+        verificar_leitura(OHLCVStore(diretorio), historicos)
+        print(f"✅ Incremental: {len(reescritos)} partições reescritas (só ano={novo_dia.year}).")
+
+        # Dividendo em um pregão seguinte de um ticker: o histórico dele é reajustado e refeito
+        ticker = tickers[1]
+        hist = historicos[ticker].copy()
+        hist[['Open', 'High', 'Low', 'Close']] *= 0.98
+        linha = hist.iloc[[-1]].copy()
+        linha.index = pd.DatetimeIndex([novo_dia + pd.Timedelta(days=1)], name='Date')
+        linha['Dividends'] = 0.5
+        historicos[ticker] = pd.concat([hist, linha])
+        resumo = store.atualizar(tickers, inicio_janela, StaticQuoteProvider(historicos=historicos))
+        assert resumo['refeitos'] == [ticker], resumo
+        verificar_leitura(OHLCVStore(diretorio), historicos)
+        print(f"✅ Provento em {ticker}: só ele foi baixado de novo.")
+
+        t_fria = leitura_fria(diretorio, tickers, hoje + pd.Timedelta(days=2), args.anos)
+        quente = OHLCVStore(diretorio)
+        ler_tudo(quente, tickers, hoje + pd.Timedelta(days=2), args.anos)
+        t_quente = float('inf')
+        for _ in range(args.repeticoes):
+            t0 = time.perf_counter()
+            ler_tudo(quente, tickers, hoje + pd.Timedelta(days=2), args.anos)
+            t_quente = min(t_quente, time.perf_counter() - t0)
+
+        linhas = sum(len(h) for h in historicos.values())
+        print(f"  universo: {args.tickers} tickers, {linhas} pregões, "
+              f"{tamanho_em_disco(diretorio) / 1024 / 1024:.1f} MB em disco (zstd)")
+        print(f"  carga inicial:          {t_carga * 1000:8.0f} ms")
+        print(f"  atualização de 1 dia:   {t_incremental * 1000:8.0f} ms")
+        print(f"  leitura a frio:         {t_fria * 1000:8.0f} ms  (processo novo)")
+        print(f"  leitura a quente:       {t_quente * 1000:8.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
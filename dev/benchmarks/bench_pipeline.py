@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark de ponta a ponta do pipeline, com curvas de escala.
+
+Para cada tamanho de universo (padrão: 500, 2k, 10k e 50k tickers), monta
+uma cópia do projeto em um diretório temporário (`data_engineer/` e
+`duckdb/carga/`, com a land_dw, a trusted_dw, o DW e o armazém OHLCV vazios)
+e executa, uma por vez e cada uma em seu próprio processo, as etapas de
+`data_engineer/` (em ordem de nome, como `loader.py --sequencial`) e as da
+carga do DuckDB (na ordem de `duckdb/carga/loader.py`). As cotações vêm do
+`SyntheticProvider` (BUSSOLA_PROVIDER=sintetico), cujo universo de tickers
+substitui o `MAPEAMENTO_COMPLETO_TICKERS`, sem rede e sem limite de taxa.
+
+Cada etapa registra o tempo de parede, o pico de memória residente (RSS) do
+processo e os bytes gravados no projeto (arquivos criados ou alterados). Com
+`--rodadas 2`, a segunda rodada mede a execução diária, com o armazém e o DW
+já carregados. O relatório sai em JSON e, com `--baseline`, é comparado a um
+relatório anterior: etapas mais lentas ou com mais memória que o baseline
+(além da tolerância) são listadas e o script termina com código 1. O
+baseline versionado (`baseline_pipeline.json`, 500 tickers, duas rodadas)
+traz a máquina em que foi medido; em outra máquina, gere um baseline local
+antes de comparar.
+
+Uso (a partir da raiz do projeto):
+    python dev/benchmarks/bench_pipeline.py --escalas 500 2000
+    python dev/benchmarks/bench_pipeline.py --escalas 500 --rodadas 2 --baseline dev/benchmarks/baseline_pipeline.json
+    python dev/benchmarks/bench_pipeline.py --escalas 500 --rodadas 2 --salvar-baseline dev/benchmarks/baseline_pipeline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[2]
+BASELINE_PADRAO = Path(__file__).resolve().parent / 'baseline_pipeline.json'
+ESCALAS_PADRAO = [500, 2_000, 10_000, 50_000]
+# Mesma ordem de `duckdb/carga/loader.py`
+ETAPAS_CARGA = ['01-carga_completa', '02-carga_incremental', '03-duckdb_dw', '05-loader_datetime']
+DIRETORIOS_VAZIOS = ['duckdb/land_dw', 'duckdb/trusted_dw', 'duckdb/banco_dw', 'duckdb/backup', 'duckdb/ohlcv']
+
+# Regressão: acima do baseline em mais que a tolerância relativa E que o mínimo absoluto
+MINIMO_ABSOLUTO = {'segundos': 1.0, 'pico_rss_mb': 50.0}
+
+
+def preparar_projeto(destino: Path) -> None:
+    """Copia o código do pipeline para `destino`, com os diretórios de dados vazios."""
+    ignorar = shutil.ignore_patterns('__pycache__', '*.parquet', '*.duckdb*', '*.json', '.cache')
+    shutil.copytree(RAIZ / 'data_engineer', destino / 'data_engineer', ignore=ignorar)
+    shutil.copytree(RAIZ / 'duckdb' / 'carga', destino / 'duckdb' / 'carga', ignore=ignorar)
+    for diretorio in DIRETORIOS_VAZIOS:
+        (destino / diretorio).mkdir(parents=True, exist_ok=True)
+
+
+def listar_etapas(projeto: Path) -> list[tuple[str, list[str], Path]]:
+    """(nome, comando, diretório de trabalho) de cada etapa, na ordem de execução."""
+    data_engineer = projeto / 'data_engineer'
+    carga = projeto / 'duckdb' / 'carga'
+    etapas = [
+        (script.name, [sys.executable, '-X', 'utf8', '-u', script.name], data_engineer)
+        for script in sorted(data_engineer.glob('[0-9][0-9]-*.py'))
+    ]
+    etapas += [
+        (f"carga/{modulo}", [sys.executable, '-X', 'utf8', '-u', '-c',
+                             f"import importlib; importlib.import_module({modulo!r}).main()"], carga)
+        for modulo in ETAPAS_CARGA
+    ]
+    return etapas
+
+
+def instantaneo(projeto: Path) -> dict[Path, tuple[int, int]]:
+    """Tamanho e mtime de cada arquivo do projeto (fora dos logs do benchmark)."""
+    arquivos = {}
+    for raiz, _, nomes in os.walk(projeto):
+        if raiz.startswith(str(projeto / '_logs')):
+            continue
+        for nome in nomes:
+            caminho = Path(raiz) / nome
+            try:
+                estado = caminho.stat()
+            except FileNotFoundError:
+                continue
+            arquivos[caminho] = (estado.st_size, estado.st_mtime_ns)
+    return arquivos
+
+
+def pico_rss_mb(uso) -> float:
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return uso.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def executar_etapa(nome: str, comando: list[str], cwd: Path, env: dict, projeto: Path, timeout: float) -> dict:
+    """Executa uma etapa e mede tempo, pico de RSS e bytes gravados."""
+    antes = instantaneo(projeto)
+    log = projeto / '_logs' / f"{nome.replace('/', '_')}.log"
+    log.parent.mkdir(exist_ok=True)
+    inicio = time.perf_counter()
+    with open(log, 'ab') as saida:
+        processo = subprocess.Popen(comando, cwd=cwd, env=env, stdout=saida, stderr=subprocess.STDOUT)
+        temporizador = threading.Timer(timeout, processo.kill)
+        temporizador.start()
+        try:
+            _, status, uso = os.wait4(processo.pid, 0)
+        finally:
+            temporizador.cancel()
+    segundos = time.perf_counter() - inicio
+    codigo = os.waitstatus_to_exitcode(status)
+
+    depois = instantaneo(projeto)
+    alterados = [c for c, estado in depois.items() if antes.get(c) != estado]
+    resultado = {
+        'etapa': nome,
+        'segundos': round(segundos, 3),
+        'pico_rss_mb': round(pico_rss_mb(uso), 1),
+        'bytes_gravados': sum(depois[c][0] for c in alterados),
+        'arquivos_gravados': len(alterados),
+        'codigo_saida': codigo,
+    }
+    # As etapas da carga tratam erros imprimindo '❌' e terminam com código 0: o marcador conta como falha
+    texto = log.read_text(encoding='utf-8', errors='replace')
+    if codigo == 0 and nome.startswith('carga/') and '❌' in texto:
+        resultado['codigo_saida'] = 1
+    if resultado['codigo_saida'] != 0:
+        resultado['saida'] = texto[-2000:]
+    return resultado
+
+
+def executar_escala(n_tickers: int, rodadas: int, semente: int, timeout: float, manter: Path | None) -> list[dict]:
+    """Executa o pipeline completo `rodadas` vezes sobre um universo de `n_tickers` tickers."""
+    env = {
+        **os.environ,
+        'BUSSOLA_PROVIDER': 'sintetico',
+        'BUSSOLA_SINTETICO_TICKERS': str(n_tickers),
+        'BUSSOLA_SINTETICO_SEMENTE': str(semente),
+        'BUSSOLA_CACHE': '0',
+        'BUSSOLA_REQUISICOES_POR_SEGUNDO': '0',
+        'PYTHONUNBUFFERED': '1',
+        'BUSSOLA_RUN_ID': f'bench_pipeline_{n_tickers}',
+    }
+    env.pop('BUSSOLA_OFFLINE', None)
+    resultados = []
+    with tempfile.TemporaryDirectory(prefix=f'bench_pipeline_{n_tickers}_') as tmp:
+        projeto = Path(tmp)
+        preparar_projeto(projeto)
+        for rodada in range(1, rodadas + 1):
+            etapas = []
+            for nome, comando, cwd in listar_etapas(projeto):
+                # Spans da etapa (data_engineer/metricas.py) em logs/metricas/ da cópia, como no loader
+                resultado = executar_etapa(nome, comando, cwd, {**env, 'BUSSOLA_ETAPA': nome}, projeto, timeout)
+                etapas.append(resultado)
+                situacao = '✅' if resultado['codigo_saida'] == 0 else '❌'
+                print(f"  {situacao} {n_tickers:>6} tickers | rodada {rodada} | {nome:32s} | "
+                      f"{resultado['segundos']:8.1f}s | {resultado['pico_rss_mb']:7.0f} MB | "
+                      f"{resultado['bytes_gravados'] / 1024 / 1024:8.1f} MB gravados", flush=True)
+                if resultado['codigo_saida'] != 0:
+                    print(resultado['saida'])
+                    break
+            ok = all(e['codigo_saida'] == 0 for e in etapas)
+            resultados.append({
+                'tickers': n_tickers,
+                'rodada': rodada,
+                'ok': ok,
+                'etapas': etapas,
+                'total': {
+                    'segundos': round(sum(e['segundos'] for e in etapas), 3),
+                    'pico_rss_mb': max(e['pico_rss_mb'] for e in etapas),
+                    'bytes_gravados': sum(e['bytes_gravados'] for e in etapas),
+                },
+            })
+            if not ok:
+                break
+        if manter is not None:
+            destino = manter / f"{n_tickers}_tickers"
+            shutil.rmtree(destino, ignore_errors=True)
+            shutil.copytree(projeto, destino)
+    return resultados
+
+
+def maquina() -> dict:
+    """Dados da máquina gravados no relatório, para saber se dois relatórios são comparáveis."""
+    try:
+        memoria_gb = round(os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') / 1024 ** 3, 1)
+    except (ValueError, OSError, AttributeError):
+        memoria_gb = None
+    return {
+        'python': platform.python_version(), 'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(), 'cpus': os.cpu_count(), 'memoria_gb': memoria_gb,
+    }
+
+
+def comparar_baseline(relatorio: dict, baseline: dict, tolerancia: float) -> list[str]:
+    """Etapas (e totais) acima do baseline, para as mesmas escala e rodada."""
+    anteriores = {}
+    for execucao in baseline['execucoes']:
+        chave = (execucao['tickers'], execucao['rodada'])
+        anteriores[(*chave, 'total')] = execucao['total']
+        for etapa in execucao['etapas']:
+            anteriores[(*chave, etapa['etapa'])] = etapa
+
+    regressoes = []
+    for execucao in relatorio['execucoes']:
+        chave = (execucao['tickers'], execucao['rodada'])
+        for nome, atual in [('total', execucao['total'])] + [(e['etapa'], e) for e in execucao['etapas']]:
+            anterior = anteriores.get((*chave, nome))
+            if anterior is None:
+                continue
+            for metrica, minimo in MINIMO_ABSOLUTO.items():
+                if atual[metrica] > anterior[metrica] * (1 + tolerancia) and atual[metrica] - anterior[metrica] > minimo:
+                    regressoes.append(
+                        f"{chave[0]} tickers, rodada {chave[1]}, {nome}: {metrica} "
+                        f"{anterior[metrica]:.1f} -> {atual[metrica]:.1f} (+{atual[metrica] / anterior[metrica] - 1:.0%})"
+                    )
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=int, nargs='+', default=ESCALAS_PADRAO,
+                        help='Tamanhos do universo de tickers (padrão: 500 2000 10000 50000)')
+    parser.add_argument('--rodadas', type=int, default=1,
+                        help='Execuções seguidas do pipeline em cada escala (padrão: 1, carga inicial)')
+    parser.add_argument('--semente', type=int, default=42, help='Semente do provedor sintético (padrão: 42)')
+    parser.add_argument('--timeout', type=float, default=4 * 3600, help='Tempo máximo por etapa, em segundos')
+    parser.add_argument('--saida', type=Path,
+                        default=RAIZ / 'logs' / f"bench_pipeline_{time.strftime('%Y-%m-%d_%H-%M-%S')}.json",
+                        help='Relatório JSON (padrão: logs/bench_pipeline_<data>.json)')
+    parser.add_argument('--baseline', type=Path,
+                        help=f'Relatório anterior para detectar regressões (ex.: {BASELINE_PADRAO.relative_to(RAIZ)})')
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help='Aumento relativo tolerado em relação ao baseline (padrão: 0.2)')
+    parser.add_argument('--salvar-baseline', type=Path, help='Grava também o relatório como baseline neste caminho')
+    parser.add_argument('--manter', type=Path, help='Copia o projeto gerado em cada escala para este diretório')
+    args = parser.parse_args()
+
+    relatorio = {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'maquina': maquina(),
+        'semente': args.semente,
+        'execucoes': [],
+    }
+    print(f"Pipeline completo com o provedor sintético: escalas {args.escalas}, {args.rodadas} rodada(s).")
+    for n_tickers in args.escalas:
+        relatorio['execucoes'] += executar_escala(n_tickers, args.rodadas, args.semente, args.timeout, args.manter)
+
+    print("\n  Curva de escala (soma das etapas):")
+    for execucao in relatorio['execucoes']:
+        total = execucao['total']
+        print(f"  {'✅' if execucao['ok'] else '❌'} {execucao['tickers']:>6} tickers | rodada {execucao['rodada']} | "
+              f"{total['segundos']:8.1f}s | pico {total['pico_rss_mb']:7.0f} MB | "
+              f"{total['bytes_gravados'] / 1024 / 1024:8.1f} MB gravados")
+
+    args.saida.parent.mkdir(parents=True, exist_ok=True)
+    args.saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\nRelatório: {args.saida}")
+    if args.salvar_baseline:
+        args.salvar_baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.salvar_baseline.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding='utf-8')
+        print(f"Baseline salvo em {args.salvar_baseline}")
+
+    falhou = not all(e['ok'] for e in relatorio['execucoes'])
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        if baseline.get('maquina') != relatorio['maquina']:
+            print(f"\n⚠️ Baseline medido em outra máquina: {baseline.get('maquina')}")
+        regressoes = comparar_baseline(relatorio, baseline, args.tolerancia)
+        if regressoes:
+            print(f"\n❌ {len(regressoes)} regressões em relação a {args.baseline} (tolerância {args.tolerancia:.0%}):")
+            for regressao in regressoes:
+                print(f"  - {regressao}")
+            falhou = True
+        else:
+            print(f"\n✅ Nenhuma regressão em relação a {args.baseline} (tolerância {args.tolerancia:.0%}).")
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == '__main__':
+    main()
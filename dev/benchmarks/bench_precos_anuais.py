@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark da extração de preços anuais/1M/6M de `05-preco_acoes.py`.
+
+Compara o processamento antigo (loop por ticker com `.loc[str(ano), ticker]`
+e `.asof`) com `processar_fechamentos` (operações sobre a matriz inteira) em
+uma matriz sintética de fechamentos, e verifica que as duas saídas são
+idênticas antes de reportar os tempos.
+
+Uso (a partir da raiz do projeto):
+    python dev/benchmarks/bench_precos_anuais.py --tickers 2000 --anos 7
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DATA_ENGINEER_DIR = Path(__file__).resolve().parents[2] / 'data_engineer'
+sys.path.insert(0, str(DATA_ENGINEER_DIR))
+
+
+def carregar_modulo_precos():
+    """Importa `05-preco_acoes.py` (nome de arquivo não é um identificador válido)."""
+    spec = importlib.util.spec_from_file_location('preco_acoes', DATA_ENGINEER_DIR / '05-preco_acoes.py')
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def processar_fechamentos_loop(df_closes, lista_tickers, hoje, anos_anteriores=7):
+    """Implementação original: um `.loc` por ticker e ano e um `.asof` por ticker."""
+    tickers_sa = [f"{t.upper()}.SA" for t in lista_tickers]
+    data_1_mes_atras = pd.to_datetime(hoje) - pd.DateOffset(months=1)
+    data_6_meses_atras = pd.to_datetime(hoje) - pd.DateOffset(months=6)
+    lista_completa, lista_resumida = [], []
+
+    for ticker, ticker_sa in zip(lista_tickers, tickers_sa):
+        col = df_closes.get(ticker_sa)
+        if col is None or col.dropna().empty:
+            continue
+        fechamento_atual = col.dropna().iloc[-1]
+        lista_resumida.append({
+            'ticker': ticker,
+            'fechamento_atual': fechamento_atual,
+            'fechamento_1m_atras': col.asof(data_1_mes_atras),
+            'fechamento_6m_atras': col.asof(data_6_meses_atras),
+        })
+        lista_completa.append({'ticker': ticker, 'ano': hoje.year, 'fechamento': fechamento_atual})
+        for j in range(anos_anteriores):
+            ano_alvo = hoje.year - (j + 1)
+            try:
+                fechamento_ano = df_closes.loc[str(ano_alvo), ticker_sa].dropna().iloc[-1]
+            except (KeyError, IndexError):
+                fechamento_ano = None
+            lista_completa.append({'ticker': ticker, 'ano': ano_alvo, 'fechamento': fechamento_ano})
+
+    if not lista_completa:
+        return None, None
+    return pd.DataFrame(lista_completa), pd.DataFrame(lista_resumida)
+
+
+def gerar_fechamentos(n_tickers: int, anos: int, hoje: date, seed: int = 42) -> tuple[pd.DataFrame, list]:
+    """
+    Gera uma matriz (dias úteis x tickers) com passeios aleatórios, incluindo
+    ativos listados no meio do período, lacunas, ativos sem nenhum pregão e
+    tickers ausentes do download.
+    """
+    rng = np.random.default_rng(seed)
+    datas = pd.bdate_range(f"{hoje.year - anos}-01-01", hoje, name='Date')
+    retornos = rng.normal(0, 0.02, size=(len(datas), n_tickers))
+    precos = 20 * np.exp(np.cumsum(retornos, axis=0))
+
+    inicio = rng.integers(0, len(datas), size=n_tickers)
+    inicio[rng.random(n_tickers) < 0.7] = 0
+    precos[np.arange(len(datas))[:, None] < inicio] = np.nan
+    precos[rng.random(precos.shape) < 0.02] = np.nan
+    precos[:, rng.random(n_tickers) < 0.01] = np.nan
+
+    tickers = [f"T{i:05d}" for i in range(n_tickers)]
+    df = pd.DataFrame(precos, index=datas, columns=[f"{t}.SA" for t in tickers])
+    ausentes = [f"X{i:05d}" for i in range(max(1, n_tickers // 100))]
+    return df, tickers + ausentes
+
+
+def medir(funcao, repeticoes: int) -> tuple[float, tuple]:
+    melhores, resultado = [], None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        melhores.append(time.perf_counter() - inicio)
+    return min(melhores), resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=2000)
+    parser.add_argument('--anos', type=int, default=7)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    args = parser.parse_args()
+
+    modulo = carregar_modulo_precos()
+    hoje = date.today()
+    df_closes, tickers = gerar_fechamentos(args.tickers, args.anos, hoje)
+    print(f"Matriz sintética: {df_closes.shape[0]} datas x {df_closes.shape[1]} tickers")
+
+    t_loop, (completo_loop, resumido_loop) = medir(
+        lambda: processar_fechamentos_loop(df_closes, tickers, hoje, args.anos), 1)
+    # A versão vetorizada imprime os tickers sem dados; silencia para não poluir a saída
+    with contextlib.redirect_stdout(io.StringIO()):
+        t_vet, (completo_vet, resumido_vet) = medir(
+            lambda: modulo.processar_fechamentos(df_closes, tickers, hoje, args.anos), args.repeticoes)
+
+    pd.testing.assert_frame_equal(completo_loop, completo_vet)
+    pd.testing.assert_frame_equal(resumido_loop, resumido_vet)
+    print("Saídas idênticas (precos_acoes_completo e precos_acoes).")
+    print(f"Loop por ticker : {t_loop:8.3f}s")
+    print(f"Vetorizado      : {t_vet:8.3f}s  ({t_loop / t_vet:,.0f}x mais rápido)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Verificação e benchmark dos provedores offline (`data_engineer/providers.py`).
+
+1. `SyntheticProvider` é determinístico: duas instâncias com a mesma semente
+   devolvem as mesmas respostas, e sementes diferentes mudam os dados;
+2. `RecordReplayProvider` no modo 'gravar' repassa as chamadas (aqui, ao
+   provedor sintético) e salva as respostas em um diretório temporário; no
+   modo 'reproduzir', sem provedor por trás, devolve exatamente as mesmas
+   respostas, e chamadas não gravadas levantam `FixtureAusente`;
+3. mede o tempo de geração, gravação e reprodução de todas as consultas que o
+   pipeline faz por ticker (`.info`, recomendações, dividendos, histórico e
+   o download em lote), além do tamanho das fixtures em disco.
+
+Para medir as etapas do pipeline sem rede, use BUSSOLA_PROVIDER=sintetico
+(ou 'gravar'/'reproduzir', ver `get_provider`).
+
+Uso (a partir da raiz do projeto):
+    python dev/benchmarks/bench_providers.py --tickers 500
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+DATA_ENGINEER_DIR = Path(__file__).resolve().parents[2] / 'data_engineer'
+sys.path.insert(0, str(DATA_ENGINEER_DIR))
+
+from providers import FixtureAusente, RecordReplayProvider, SyntheticProvider  # noqa: E402
+
+
+def consultar_tudo(provider, tickers: list[str], inicio_dividendos: str, inicio_download: str) -> dict:
+    """As consultas que as etapas de coleta fazem, na mesma forma de chamada."""
+    respostas = {'logos': provider.get_logos()}
+    for ticker in tickers:
+        ticker_yf = f"{ticker}.SA"
+        respostas[('info', ticker)] = provider.get_info(ticker_yf)
+        respostas[('recomendacoes', ticker)] = provider.get_recommendations(ticker_yf)
+        respostas[('dividendos', ticker)] = provider.get_dividends(ticker_yf, start=inicio_dividendos)
+        respostas[('historico', ticker)] = provider.get_history(ticker_yf, period="5y", auto_adjust=True)
+    respostas['download'] = provider.download(
+        [f"{t}.SA" for t in tickers], start=inicio_download, auto_adjust=True, actions=True, progress=False
+    )
+    return respostas
+
+
+def comparar(esperado: dict, obtido: dict) -> None:
+    assert esperado.keys() == obtido.keys()
+    for chave, valor in esperado.items():
+        if isinstance(valor, pd.DataFrame):
+            pd.testing.assert_frame_equal(obtido[chave], valor)
+        elif isinstance(valor, pd.Series):
+            pd.testing.assert_series_equal(obtido[chave], valor)
+        else:
+            assert obtido[chave] == valor, chave
+
+
+def tamanho_em_disco(diretorio: Path) -> int:
+    return sum(p.stat().st_size for p in diretorio.rglob('*.pkl'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=500, help='Número de tickers (padrão: 500)')
+    parser.add_argument('--semente', type=int, default=42, help='Semente do provedor sintético (padrão: 42)')
+    args = parser.parse_args()
+
+    hoje = pd.Timestamp.today().normalize()
+    inicio_dividendos = (hoje - pd.DateOffset(years=7)).strftime('%Y-%m-%d')
+    inicio_download = f"{hoje.year - 7}-01-01"
+    sintetico = SyntheticProvider(n_tickers=args.tickers, semente=args.semente, hoje=hoje)
+    tickers = sintetico.tickers
+
+    t0 = time.perf_counter()
+    gerado = consultar_tudo(sintetico, tickers, inicio_dividendos, inicio_download)
+    t_geracao = time.perf_counter() - t0
+    comparar(gerado, consultar_tudo(SyntheticProvider(args.tickers, args.semente, hoje=hoje), tickers,
+                                    inicio_dividendos, inicio_download))
+    outra_semente = SyntheticProvider(args.tickers, args.semente + 1, hoje=hoje)
+    assert not outra_semente.get_history(f"{tickers[0]}.SA").equals(gerado[('historico', tickers[0])])
+    print(f"✅ Provedor sintético determinístico ({len(tickers)} tickers, semente {args.semente}).")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        diretorio = Path(tmp) / 'fixtures'
+        gravador = RecordReplayProvider(diretorio, modo='gravar', provider=SyntheticProvider(
+            args.tickers, args.semente, hoje=hoje))
+        t0 = time.perf_counter()
+        gravado = consultar_tudo(gravador, tickers, inicio_dividendos, inicio_download)
+        t_gravacao = time.perf_counter() - t0
+        comparar(gerado, gravado)
+
+        reprodutor = RecordReplayProvider(diretorio, modo='reproduzir')
+        t0 = time.perf_counter()
+        reproduzido = consultar_tudo(reprodutor, tickers, inicio_dividendos, inicio_download)
+        t_reproducao = time.perf_counter() - t0
+        comparar(gerado, reproduzido)
+        try:
+            reprodutor.get_info("NAOGRAVADO3.SA")
+            raise AssertionError("chamada não gravada deveria falhar")
+        except FixtureAusente:
+            pass
+        arquivos = sum(1 for _ in diretorio.rglob('*.pkl'))
+        print(f"✅ Reprodução idêntica à gravação ({arquivos} respostas); chamadas não gravadas falham.")
+
+        print(f"  fixtures em disco:  {tamanho_em_disco(diretorio) / 1024 / 1024:8.1f} MB")
+        print(f"  geração sintética:  {t_geracao * 1000:8.0f} ms")
+        print(f"  gravação:           {t_gravacao * 1000:8.0f} ms")
+        print(f"  reprodução:         {t_reproducao * 1000:8.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
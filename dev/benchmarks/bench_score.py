@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark e verificação de equivalência do motor de scores de `10-score.py`.
+
+Compara o cálculo original (funções escalares aplicadas linha a linha com
+`iterrows`) com `regras_score.calcular_scores` (tabela de regras avaliada
+com `np.select` sobre as colunas inteiras). A saída dos dois caminhos, já
+arredondada e ordenada como em `scores.parquet`, deve ser idêntica (exceto
+pelas colunas de explicação, que só o motor novo gera), tanto
+nos dados reais da land_dw (quando existirem) quanto em uma base sintética
+que inclui valores ausentes e valores exatamente nos limites das faixas.
+
+Uso (a partir da raiz do projeto):
+    python dev/benchmarks/bench_score.py --linhas 100000
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DATA_ENGINEER_DIR = Path(__file__).resolve().parents[2] / 'data_engineer'
+sys.path.insert(0, str(DATA_ENGINEER_DIR))
+
+from regras_score import calcular_scores  # noqa: E402
+
+
+def carregar_modulo_score():
+    """Importa `10-score.py` (nome de arquivo não é um identificador válido)."""
+    spec = importlib.util.spec_from_file_location('score', DATA_ENGINEER_DIR / '10-score.py')
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+# --- Implementação original (uma chamada por linha e critério) ---
+def score_dy(dy_12m, dy_5a):
+    score = 0
+    if pd.notna(dy_12m):
+        if dy_12m > 5: score += 60
+        elif dy_12m > 3.5: score += 45
+        elif dy_12m > 2: score += 30
+        elif dy_12m < 2 and dy_12m > 0: score -= 20
+    if pd.notna(dy_5a):
+        if dy_5a > 10: score += 120
+        elif dy_5a > 8: score += 100
+        elif dy_5a > 6: score += 80
+        elif dy_5a > 4: score += 40
+        elif dy_5a < 3 and dy_5a > 1: score -= 20
+        elif dy_5a <= 1: score -= 30
+    return score
+
+def score_payout(payout):
+    if pd.isna(payout): return 0
+    if 30 <= payout <= 60: return 30
+    if 60 < payout <= 80: return 15
+    if (payout > 0 and payout < 20) or payout > 80: return -15
+    return 0
+
+def score_roe(roe, setor):
+    if pd.isna(roe): return 0
+    is_finance = 'finance' in str(setor).lower()
+    if is_finance:
+        if roe > 15: return 80
+        if roe > 12: return 60
+        if roe > 8: return 30
+    else:
+        if roe > 12: return 45
+        if roe > 8: return 15
+    return 0
+
+def score_pl_pvp(pl, pvp):
+    score = 0
+    if pd.notna(pl) and pl > 0:
+        if pl < 12: score += 45
+        elif pl < 18: score += 30
+        elif pl > 25: score -= 15
+    if pd.notna(pvp) and pvp > 0:
+        if pvp < 0.50: score += 135
+        elif pvp < 0.66: score += 120
+        elif pvp < 1.00: score += 90
+        elif pvp < 1.50: score += 45
+        elif pvp < 2.50: score += 15
+        elif pvp > 4.00: score -= 30
+    return score
+
+def score_divida(div_mc, div_ebitda, current_ratio, subsetor):
+    if 'finance' in str(subsetor).lower(): return 0
+    score = 0
+    if pd.notna(div_mc):
+        if div_mc < 0.3: score += 45
+        elif div_mc < 0.7: score += 30
+        elif div_mc > 1.5: score -= 30
+    if pd.notna(div_ebitda) and div_ebitda > 0:
+        if div_ebitda < 1: score += 45
+        elif div_ebitda < 3: score += 15
+        elif div_ebitda > 5: score -= 30
+    if pd.notna(current_ratio):
+        if current_ratio > 2: score += 40
+        elif current_ratio > 1: score += 20
+        else: score -= 15
+    return score
+
+def score_crescimento_sentimento(crescimento, sentimento):
+    score = 0
+    if pd.notna(crescimento):
+        if crescimento > 15: score += 50
+        elif crescimento > 10: score += 35
+        elif crescimento > 5: score += 20
+        elif crescimento < 0: score -= 20
+    if pd.notna(sentimento):
+        score += (sentimento / 100.0) * 60 - 20
+    return score
+
+def score_ciclo_mercado(status_ciclo):
+    if pd.isna(status_ciclo): return 0
+    if status_ciclo == 'Compra': return 70
+    if status_ciclo == 'Venda': return -70
+    return 0
+
+def score_graham(preco_atual, lpa, vpa):
+    if pd.isna(preco_atual) or pd.isna(lpa) or pd.isna(vpa) or lpa <= 0 or vpa <= 0 or preco_atual <= 0:
+        return 0
+    try:
+        numero_graham = (22.5 * lpa * vpa) ** 0.5
+        margem_seguranca = (numero_graham / preco_atual) - 1
+    except (ValueError, TypeError):
+        return 0
+    if margem_seguranca > 2.0: return 150
+    if margem_seguranca > 1.5: return 130
+    if margem_seguranca > 1.0: return 110
+    if margem_seguranca > 0.5: return 70
+    if margem_seguranca > 0.2: return 35
+    if margem_seguranca > 0: return 20
+    return -70
+
+def score_beta(beta):
+    if pd.isna(beta): return 0
+    if beta < 1.0: return 35
+    if beta > 1.5: return -35
+    return 0
+
+def score_market_cap(market_cap):
+    if pd.isna(market_cap): return 0
+    if market_cap > 50_000_000_000: return 35
+    if market_cap > 10_000_000_000: return 25
+    if market_cap > 2_000_000_000:  return 15
+    return 0
+
+def score_liquidez(liquidez):
+    if pd.isna(liquidez): return 0
+    if liquidez > 50_000_000: return 35
+    if liquidez > 20_000_000: return 25
+    if liquidez > 5_000_000:  return 15
+    return 0
+
+def score_fcf_yield(fcf_yield):
+    if pd.isna(fcf_yield): return 0
+    if fcf_yield > 8: return 35
+    if fcf_yield > 5: return 20
+    return 0
+
+
+def calcular_scores_loop(df: pd.DataFrame) -> pd.DataFrame:
+    scores_data = []
+    for _, row in df.iterrows():
+        setor = row.get('subsetor_b3', 'N/A')
+        div_mc = row['divida_total'] / row['market_cap'] if pd.notna(row['market_cap']) and row['market_cap'] > 0 else None
+
+        s_dy = score_dy(row.get('dy12m'), row.get('dy5anos'))
+        s_payout = score_payout(row.get('payout_ratio'))
+        s_roe = score_roe(row.get('roe'), setor)
+        s_pl_pvp = score_pl_pvp(row.get('p_l'), row.get('p_vp'))
+        s_divida = score_divida(div_mc, row.get('divida_ebitda'), row.get('current_ratio'), setor)
+        s_cresc_sent = score_crescimento_sentimento(row.get('crescimento_preco_5a'), row.get('sentimento_gauge'))
+        s_ciclo = score_ciclo_mercado(row.get('status_ciclo'))
+        s_graham = score_graham(row.get('preco_atual'), row.get('lpa'), row.get('vpa'))
+        s_beta = score_beta(row.get('beta'))
+        s_mcap = score_market_cap(row.get('market_cap'))
+        s_liquidez = score_liquidez(row.get('liquidez_media_diaria'))
+        s_fcf = score_fcf_yield(row.get('fcf_yield'))
+
+        score_total = s_dy + s_payout + s_roe + s_pl_pvp + s_divida + s_cresc_sent + s_ciclo + s_graham + s_beta + s_mcap + s_liquidez + s_fcf
+
+        scores_data.append({
+            'ticker': row['ticker'],
+            'score_dy': s_dy,
+            'score_payout': s_payout,
+            'score_roe': s_roe,
+            'score_pl_pvp': s_pl_pvp,
+            'score_divida': s_divida,
+            'score_crescimento_sentimento': s_cresc_sent,
+            'score_ciclo_mercado': s_ciclo,
+            'score_graham': s_graham,
+            'score_beta': s_beta,
+            'score_market_cap': s_mcap,
+            'score_liquidez': s_liquidez,
+            'score_fcf_yield': s_fcf,
+            'score_total': max(0, score_total)
+        })
+    return pd.DataFrame(scores_data)
+
+
+def finalizar(scores_df: pd.DataFrame) -> pd.DataFrame:
+    """Arredondamento e ordenação aplicados por `10-score.py` antes de salvar."""
+    return scores_df.round(2).sort_values(by='score_total', ascending=False)
+
+
+# --- Dados ---
+# Limites das faixas: valores exatamente nas bordas exercitam `>` vs `>=`
+LIMITES = {
+    'dy12m': [0, 2, 3.5, 5],
+    'dy5anos': [1, 3, 4, 6, 8, 10],
+    'payout_ratio': [0, 20, 30, 60, 80],
+    'roe': [8, 12, 15],
+    'p_l': [0, 12, 18, 25],
+    'p_vp': [0, 0.5, 0.66, 1, 1.5, 2.5, 4],
+    'divida_ebitda': [0, 1, 3, 5],
+    'current_ratio': [1, 2],
+    'crescimento_preco_5a': [0, 5, 10, 15],
+    'beta': [1, 1.5],
+    'market_cap': [2e9, 10e9, 50e9],
+    'liquidez_media_diaria': [5e6, 20e6, 50e6],
+    'fcf_yield': [5, 8],
+}
+
+
+def gerar_base_sintetica(linhas: int, semente: int = 42) -> pd.DataFrame:
+    """Base com a mesma estrutura de `load_and_prepare_data()`: ~10% de NaN por coluna e ~5% de valores nas bordas."""
+    rng = np.random.default_rng(semente)
+    escalas = {
+        'dy12m': (-2, 14), 'dy5anos': (-2, 14), 'payout_ratio': (-20, 150), 'roe': (-30, 40),
+        'p_l': (-20, 60), 'p_vp': (-1, 6), 'divida_ebitda': (-2, 10), 'current_ratio': (0, 4),
+        'crescimento_preco_5a': (-40, 60), 'sentimento_gauge': (0, 100), 'beta': (-0.5, 3),
+        'market_cap': (1e8, 1e11), 'divida_total': (0, 5e10), 'liquidez_media_diaria': (0, 1e8),
+        'fcf_yield': (-10, 20), 'preco_atual': (-1, 100), 'lpa': (-5, 15), 'vpa': (-5, 50),
+    }
+    df = pd.DataFrame({'ticker': [f"T{i:06d}" for i in range(linhas)]})
+    for coluna, (minimo, maximo) in escalas.items():
+        valores = rng.uniform(minimo, maximo, linhas)
+        if coluna in LIMITES:
+            nas_bordas = rng.random(linhas) < 0.05
+            valores[nas_bordas] = rng.choice(LIMITES[coluna], nas_bordas.sum())
+        valores[rng.random(linhas) < 0.10] = np.nan
+        df[coluna] = valores
+    df['subsetor_b3'] = rng.choice(['Financeiro', 'Finance', 'Bancos', 'Energia Elétrica', None], linhas)
+    df['status_ciclo'] = rng.choice(['Compra', 'Venda', 'Observação', None], linhas)
+    return df
+
+
+def carregar_base_real(modulo) -> pd.DataFrame | None:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return modulo.load_and_prepare_data()
+
+
+def verificar(nome: str, df: pd.DataFrame) -> None:
+    esperado = finalizar(calcular_scores_loop(df))
+    obtido = finalizar(calcular_scores(df))
+    # As colunas de explicação não existem na implementação original
+    pd.testing.assert_frame_equal(
+        obtido[esperado.columns].reset_index(drop=True), esperado.reset_index(drop=True), check_exact=True
+    )
+    assert (obtido['score_codigos'].map(len) == obtido['score_detalhes'].map(len)).all()
+    print(f"✅ {nome}: {len(df)} linhas, saídas idênticas (valores, dtypes e ordem).")
+
+
+def cronometrar(funcao, *args, repeticoes: int = 1) -> float:
+    melhor = float('inf')
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=100_000, help='Linhas da base sintética (padrão: 100000)')
+    args = parser.parse_args()
+
+    base_real = carregar_base_real(carregar_modulo_score())
+    if base_real is not None:
+        verificar("Base real (land_dw)", base_real)
+        # Sem sentimento, os critérios fracionários saem como int64 nos dois caminhos
+        verificar("Base real sem sentimento", base_real.drop(columns=['sentimento_gauge'], errors='ignore'))
+
+    base = gerar_base_sintetica(args.linhas)
+    verificar("Base sintética", base)
+
+    t_loop = cronometrar(calcular_scores_loop, base)
+    t_vetor = cronometrar(calcular_scores, base, repeticoes=3)
+    print(f"\nLinhas: {len(base)}")
+    print(f"  iterrows (original): {t_loop:8.3f}s")
+    print(f"  tabela de regras:    {t_vetor:8.3f}s  ({t_loop / t_vetor:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark e verificação dos indicadores técnicos vetorizados (`data_engineer/tecnicos.py`).
+
+Compara o cálculo original de `08-indicadores.py` (por ticker: recorte de 1
+ano do histórico, `ta.RSIIndicator`/`ta.MACD`, último volume e a
+classificação do ciclo de mercado) com `calcular_tecnicos_historico` e
+`classificar_ciclo`, que calculam todos os tickers de uma vez sobre a matriz
+datas x tickers. A base sintética inclui tickers que estreiam no meio do
+período, tickers com suspensões (datas sem preço) e tickers com poucos
+pregões. RSI, MACD e crescimento devem coincidir com o `ta` dentro da
+tolerância, e volume e ciclo devem ser idênticos.
+
+Uso (a partir da raiz do projeto):
+    python dev/benchmarks/bench_tecnicos.py --tickers 2000 --anos 5
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from ta.momentum import RSIIndicator
+from ta.trend import MACD
+
+DATA_ENGINEER_DIR = Path(__file__).resolve().parents[2] / 'data_engineer'
+sys.path.insert(0, str(DATA_ENGINEER_DIR))
+
+from tecnicos import classificar_ciclo  # noqa: E402
+
+TOLERANCIA = 1e-8
+
+
+def carregar_modulo_indicadores():
+    """Importa `08-indicadores.py` (nome de arquivo não é um identificador válido)."""
+    spec = importlib.util.spec_from_file_location('indicadores', DATA_ENGINEER_DIR / '08-indicadores.py')
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def gerar_matrizes(n_tickers: int, anos: int, semente: int = 7) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Fechamentos e volumes (datas x tickers) com estreias, suspensões e históricos curtos."""
+    rng = np.random.default_rng(semente)
+    hoje = pd.Timestamp.today().normalize()
+    datas = pd.bdate_range(hoje - pd.DateOffset(years=anos), hoje, name='Date')
+    retornos = rng.normal(0, 0.02, (len(datas), n_tickers))
+    closes = 20 * np.exp(np.cumsum(retornos, axis=0))
+    volumes = rng.integers(1_000, 1_000_000, (len(datas), n_tickers)).astype('float64')
+    for j in range(n_tickers):
+        if j % 7 == 0:  # estreia no meio do período
+            closes[: rng.integers(1, len(datas) - 5), j] = np.nan
+        if j % 11 == 0:  # suspensão de algumas semanas
+            inicio = rng.integers(0, len(datas) - 30)
+            closes[inicio: inicio + rng.integers(5, 30), j] = np.nan
+        if j % 50 == 0:  # poucos pregões (abaixo dos mínimos de RSI/MACD)
+            closes[: len(datas) - rng.integers(1, 40), j] = np.nan
+        if j % 97 == 0:  # deixa de negociar antes do fim do período
+            closes[len(datas) - rng.integers(1, 200):, j] = np.nan
+    tickers = [f'T{j:05d}.SA' for j in range(n_tickers)]
+    volumes[np.isnan(closes)] = np.nan
+    return pd.DataFrame(closes, index=datas, columns=tickers), pd.DataFrame(volumes, index=datas, columns=tickers)
+
+
+def compute_indicadores_ta(hist: pd.DataFrame) -> dict:
+    """Implementação original de `08-indicadores.py`, com o `ta` por ticker."""
+    out = {"rsi_14_1y": None, "macd_diff_1y": None, "volume_1y": None}
+    if hist is None or hist.empty:
+        return out
+    close = hist.get("Close")
+    volume = hist.get("Volume")
+    if close is not None and len(close.dropna()) >= 15:
+        val = RSIIndicator(close=close, window=14, fillna=False).rsi().iloc[-1]
+        out["rsi_14_1y"] = float(val) if pd.notna(val) else None
+    if close is not None and len(close.dropna()) >= (26 + 9):
+        diff = MACD(close=close, window_slow=26, window_fast=12, window_sign=9, fillna=False).macd_diff().iloc[-1]
+        out["macd_diff_1y"] = float(diff) if pd.notna(diff) else None
+    if volume is not None and not volume.dropna().empty:
+        out["volume_1y"] = float(volume.iloc[-1]) if pd.notna(volume.iloc[-1]) else None
+    return out
+
+
+def classificar(valor, lim_baixo, lim_alto, rotulos):
+    if pd.isna(valor):
+        return "N/A"
+    return rotulos[0] if valor < lim_baixo else rotulos[2] if valor > lim_alto else rotulos[1]
+
+
+def ciclo_original(rsi_val, macd_val, vol_val, vol_mean) -> str:
+    """`calcular_dados_ciclo` original, sem o sorteio da frase."""
+    status = (
+        classificar(rsi_val, 30, 70, ("Baixo", "Medio", "Alto")),
+        classificar(macd_val, -0.5, 0.5, ("Baixa", "Neutra", "Alta")),
+        classificar(vol_val, vol_mean * 0.8, vol_mean * 1.2, ("Fraco", "Normal", "Forte")),
+    )
+    score_total = 0
+    for cls in status:
+        if any(key in str(cls) for key in ["Baixo", "Fraco"]): score_total += 10
+        elif any(key in str(cls) for key in ["Medio", "Normal"]): score_total += 33
+        elif any(key in str(cls) for key in ["Alto", "Forte"]): score_total += 100
+    score = round(score_total / 3)
+    return "Pânico / Fundo" if score <= 30 else "Neutro / Transição" if score <= 60 else "Euforia / Topo"
+
+
+def calcular_por_ticker(closes: pd.DataFrame, volumes: pd.DataFrame) -> pd.DataFrame:
+    """Caminho original: um histórico por ticker, recorte de 1 ano e `ta`."""
+    linhas = {}
+    for ticker in closes.columns:
+        hist_5y = pd.DataFrame({'Close': closes[ticker], 'Volume': volumes[ticker]}).dropna(subset=['Close'])
+        growth = None
+        if not hist_5y.empty and len(hist_5y["Close"]) > 1 and hist_5y["Close"].iloc[0] > 0:
+            growth = ((hist_5y["Close"].iloc[-1] / hist_5y["Close"].iloc[0]) - 1) * 100
+        hist_1y = hist_5y
+        if not hist_5y.empty:
+            hist_1y = hist_5y[hist_5y.index > hist_5y.index[-1] - pd.DateOffset(years=1)]
+        linhas[ticker] = {'crescimento_preco_5a': growth, **compute_indicadores_ta(hist_1y)}
+    resultado = pd.DataFrame.from_dict(linhas, orient='index').astype('float64')
+    vol_mean = resultado['volume_1y'].dropna().mean()
+    resultado['ciclo_de_mercado'] = [
+        ciclo_original(r.rsi_14_1y, r.macd_diff_1y, r.volume_1y, vol_mean) for r in resultado.itertuples()
+    ]
+    return resultado
+
+
+def calcular_vetorizado(modulo, closes: pd.DataFrame, volumes: pd.DataFrame) -> pd.DataFrame:
+    resultado = modulo.calcular_tecnicos_historico(closes, volumes)
+    vol_mean = resultado['volume_1y'].dropna().mean()
+    ciclos = classificar_ciclo(resultado['rsi_14_1y'], resultado['macd_diff_1y'], resultado['volume_1y'], vol_mean)
+    resultado['ciclo_de_mercado'] = ciclos['ciclo_de_mercado'].to_numpy()
+    return resultado
+
+
+def verificar(antigo: pd.DataFrame, novo: pd.DataFrame) -> None:
+    for coluna in ('crescimento_preco_5a', 'rsi_14_1y', 'macd_diff_1y'):
+        a, b = antigo[coluna].to_numpy(), novo[coluna].to_numpy()
+        assert np.array_equal(np.isnan(a), np.isnan(b)), coluna
+        erro = np.nanmax(np.abs(a - b)) if (~np.isnan(a)).any() else 0.0
+        assert np.allclose(a, b, rtol=TOLERANCIA, atol=TOLERANCIA, equal_nan=True), (coluna, erro)
+        print(f"  {coluna:22s} erro máximo vs ta: {erro:.2e}")
+    assert np.array_equal(antigo['volume_1y'].to_numpy(), novo['volume_1y'].to_numpy(), equal_nan=True)
+    assert (antigo['ciclo_de_mercado'] == novo['ciclo_de_mercado']).all()
+    print(f"✅ {len(antigo)} tickers: técnicos dentro da tolerância ({TOLERANCIA:g}); volume e ciclo idênticos.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tickers', type=int, default=2000, help='Número de tickers (padrão: 2000)')
+    parser.add_argument('--anos', type=int, default=5, help='Anos de histórico (padrão: 5)')
+    args = parser.parse_args()
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        modulo = carregar_modulo_indicadores()
+    closes, volumes = gerar_matrizes(args.tickers, args.anos)
+
+    inicio = time.perf_counter()
+    antigo = calcular_por_ticker(closes, volumes)
+    t_antigo = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    novo = calcular_vetorizado(modulo, closes, volumes)
+    t_novo = time.perf_counter() - inicio
+
+    verificar(antigo, novo)
+    print(f"  universo: {args.tickers} tickers x {len(closes)} pregões ({args.anos} anos)")
+    print(f"  ta por ticker (original): {t_antigo * 1000:9.0f} ms")
+    print(f"  matriz vetorizada:        {t_novo * 1000:9.0f} ms  ({t_antigo / t_novo:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
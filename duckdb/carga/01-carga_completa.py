@@ -1,8 +1,15 @@
 import duckdb
+import json
 import os
+import sys
 from datetime import datetime
+from pathlib import Path
 from dateutil import tz
 
+# Mesmo hash de conteúdo do manifesto do pipeline (data_engineer/manifesto.py), também ao executar o script isolado
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', 'data_engineer'))
+from manifesto import hash_arquivo
+
 # --- Configuração ---
 # Lista de tabelas para carga completa
 # Neste modo, todos os dados da tabela são apagados e uma nova carga é inserida.
@@ -21,7 +28,25 @@ TABLES_TO_LOAD = [
     "tickers_nao_mapeados"
 ]
 
+# Manifesto com o hash do arquivo da land_dw que originou cada tabela da trusted_dw
+MANIFEST_FILE = "_manifest_carga_completa.json"
+
 # --- Lógica do Script ---
+def carregar_manifesto(caminho):
+    """Lê o manifesto de hashes da carga completa (vazio se não existir)."""
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def salvar_manifesto(caminho, manifesto):
+    """Grava o manifesto de forma atômica."""
+    temporario = caminho + '.tmp'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, indent=2, sort_keys=True)
+    os.replace(temporario, caminho)
+
 def get_project_root():
     """Encontra o diretório raiz do projeto."""
     script_dir = os.path.dirname(os.path.realpath(__file__))
@@ -40,6 +65,8 @@ def main():
     Executa o processo de carga completa para as tabelas especificadas.
     Lê um arquivo parquet da camada 'land_dw', adiciona uma coluna de data/hora,
     e o salva na camada 'trusted_dw', sobrescrevendo qualquer dado existente.
+    Tabelas cujo arquivo de origem não mudou desde a última carga (mesmo hash
+    de conteúdo) não são reescritas e mantêm a data de atualização anterior.
     """
     project_root = get_project_root()
     land_dw_path = os.path.join(project_root, 'duckdb', 'land_dw')
@@ -48,6 +75,8 @@ def main():
 
     # Garante que o diretório de destino exista
     os.makedirs(trusted_dw_path, exist_ok=True)
+    manifesto_path = os.path.join(trusted_dw_path, MANIFEST_FILE)
+    manifesto = carregar_manifesto(manifesto_path)
 
     # Conecta-se ao DuckDB (pode ser em memória, já que é usado para transformação)
     con = duckdb.connect(database=':memory:')
@@ -62,16 +91,24 @@ def main():
             continue
 
         try:
+            hash_origem = hash_arquivo(Path(source_parquet_path))
+            if manifesto.get(table_name) == hash_origem and os.path.exists(destination_parquet_path):
+                print(f"  ⏭️  Inalterada: Tabela '{table_name}' (origem sem mudanças).")
+                continue
+
             relation = con.read_parquet(source_parquet_path)
             con.register('temp_relation', relation)
             updated_relation = con.sql(f"SELECT *, '{data_atualizacao}' AS data_atualizacao FROM temp_relation")
             updated_relation.write_parquet(destination_parquet_path)
+            con.unregister('temp_relation')
+            manifesto[table_name] = hash_origem
             print(f"  ✅  Sucesso: Tabela '{table_name}' carregada.")
 
         except Exception as e:
             print(f"  ❌  Erro ao carregar '{table_name}': {e}")
 
     con.close()
+    salvar_manifesto(manifesto_path, manifesto)
     print("\n✨ Processo de Carga Completa finalizado! ✨")
 
 if __name__ == "__main__":
@@ -2,6 +2,10 @@ import duckdb
 import os
 from datetime import datetime, timezone
 from dateutil import tz
+from particoes import (
+    TABELAS_PARTICIONADAS, caminho_particao, com_ano, diretorio_tabela, gravar_particoes, substituir_tabela,
+    upsert_particoes,
+)
 
 # --- Configuração ---
 # Lista de tabelas para o processo incremental.
@@ -12,6 +16,9 @@ INCREMENTAL_TABLES = [
     "todos_dividendos"
 ]
 
+# Marcador gravado por data_engineer/02-dividendos.py na recarga completa dos dividendos
+MARCADOR_RECARGA_DIVIDENDOS = "todos_dividendos_recarga.json"
+
 # --- Lógica do Script ---
 def get_project_root():
     """Encontra o diretório raiz do projeto."""
@@ -25,11 +32,66 @@ def get_current_time_str():
     local_time = utc_now.astimezone(tz.gettz('America/Sao_Paulo'))
     return local_time.strftime('%Y-%m-%d %H:%M:%S')
 
+def carregar_particionada(con, table_name, source_path, land_dw_path, trusted_dw_path,
+                          data_atualizacao, current_year):
+    """
+    Carga incremental de uma tabela particionada por ano (ver particoes.py).
+    Migra o arquivo único antigo, se existir, e reescreve só as partições
+    afetadas: as dos anos presentes no delta de dividendos (merge/upsert por
+    ticker e data) ou, sem delta, a do ano corrente. Depois de uma recarga
+    completa dos dividendos (marcador na land_dw), todas as partições de
+    'todos_dividendos' são reescritas a partir da land_dw.
+    """
+    diretorio = diretorio_tabela(trusted_dw_path, table_name)
+    legado_path = os.path.join(trusted_dw_path, f"{table_name}.parquet")
+    land_sql = f"SELECT *, '{data_atualizacao}' AS data_atualizacao FROM read_parquet('{source_path}')"
+
+    if not os.path.isdir(diretorio):
+        if not os.path.exists(legado_path):
+            # Se a tabela ainda não existir, a carga é simplesmente os novos dados
+            anos = gravar_particoes(con, trusted_dw_path, table_name, com_ano(con, table_name, land_sql))
+            print(f"  📦  Info: Carga inicial de '{table_name}' concluída ({len(anos)} partições).")
+            return
+        # Layout antigo (um único arquivo): converte para partições por ano
+        legado_sql = f"SELECT * FROM read_parquet('{legado_path}')"
+        anos = gravar_particoes(con, trusted_dw_path, table_name, com_ano(con, table_name, legado_sql))
+        os.remove(legado_path)
+        print(f"  📦  Info: '{table_name}' migrada para {len(anos)} partições por ano.")
+
+    # Recarga completa: eventos corrigidos ou removidos em anos anteriores também chegam à trusted_dw
+    marcador_path = os.path.join(land_dw_path, MARCADOR_RECARGA_DIVIDENDOS)
+    if table_name == 'todos_dividendos' and os.path.exists(marcador_path):
+        anos = substituir_tabela(con, trusted_dw_path, table_name, com_ano(con, table_name, land_sql))
+        os.remove(marcador_path)
+        print(f"  ✅  Sucesso: '{table_name}' recarregada por completo ({len(anos)} partições).")
+        return
+
+    # Merge incremental: aplica apenas os eventos novos de dividendos
+    delta_path = os.path.join(land_dw_path, "todos_dividendos_novos.parquet")
+    if table_name == 'todos_dividendos' and os.path.exists(delta_path):
+        delta_sql = f"SELECT *, '{data_atualizacao}' AS data_atualizacao FROM read_parquet('{delta_path}')"
+        linhas, anos = upsert_particoes(con, trusted_dw_path, table_name, delta_sql)
+        print(f"  ✅  Sucesso: {linhas} eventos aplicados a '{table_name}' (partições: {anos or 'nenhuma'}).")
+        return
+
+    # Substitui apenas a partição do ano corrente pelos dados da land_dw
+    ano_corrente_sql = f"SELECT * FROM ({com_ano(con, table_name, land_sql)}) WHERE ano = {current_year}"
+    if not gravar_particoes(con, trusted_dw_path, table_name, ano_corrente_sql):
+        particao = caminho_particao(trusted_dw_path, table_name, current_year)
+        if os.path.exists(particao):
+            os.remove(particao)
+    print(f"  ✅  Sucesso: Partição ano={current_year} de '{table_name}' atualizada.")
+
 def main():
     """
     Executa o processo de carga incremental para tabelas específicas.
     A lógica principal é substituir os dados do ano corrente na camada 'trusted_dw'
     com os novos dados da 'land_dw', mantendo os dados de anos anteriores intactos.
+    As tabelas de eventos ('todos_dividendos', 'precos_acoes_completo') ficam
+    particionadas por ano e só as partições afetadas são reescritas; para
+    'todos_dividendos', se houver o delta 'todos_dividendos_novos', os eventos
+    novos são aplicados com merge/upsert por (ticker, data) e, após uma recarga
+    completa, todas as partições são reescritas.
     """
     project_root = get_project_root()
     land_dw_path = os.path.join(project_root, 'duckdb', 'land_dw')
@@ -53,6 +115,11 @@ def main():
         print(f"  🔄  Processando tabela: '{table_name}'")
 
         try:
+            if table_name in TABELAS_PARTICIONADAS:
+                carregar_particionada(con, table_name, source_path, land_dw_path, trusted_dw_path,
+                                      data_atualizacao, current_year)
+                continue
+
             # Lê os dados da land_dw
             land_rel = con.read_parquet(source_path)
 
@@ -63,12 +130,9 @@ def main():
                 continue
 
             # Define os filtros para o ano corrente e para o histórico
-            if table_name == 'dividendos_ano' or table_name == 'precos_acoes_completo':
+            if table_name == 'dividendos_ano':
                 historical_filter = f"ano < {current_year}"
                 land_filter = f"ano = {current_year}"
-            elif table_name == 'todos_dividendos':
-                historical_filter = f"YEAR(data) < {current_year}"
-                land_filter = f"YEAR(data) = {current_year}"
             else:
                 print(f"  ⚠️  Aviso: Lógica de filtro não definida para '{table_name}'. Pulando.")
                 continue
@@ -1,6 +1,20 @@
 import duckdb
 import os
 import glob
+import time
+from datetime import datetime
+from app_ranking import materializar_app_ranking
+from particoes import TABELAS_PARTICIONADAS, arquivos_particoes, diretorio_tabela, ler_particoes
+
+# --- Configuração ---
+# Paralelismo e memória do DuckDB durante a carga (padrão: os do próprio DuckDB)
+THREADS = os.environ.get('BUSSOLA_DW_THREADS')
+MEMORY_LIMIT = os.environ.get('BUSSOLA_DW_MEMORY_LIMIT')  # ex.: '2GB'
+# Parquets maiores que este tamanho (MB) entram como views sobre o arquivo, e não
+# como cópias (0 = desativado). As views usam caminhos relativos à raiz do projeto,
+# de onde o app é executado.
+VIEW_ACIMA_MB = float(os.environ.get('BUSSOLA_DW_VIEW_MB', '0'))
+TABELA_AUDITORIA = 'auditoria_carga'
 
 # --- Lógica do Script ---
 def get_project_root():
@@ -8,47 +22,172 @@ def get_project_root():
     script_dir = os.path.dirname(os.path.realpath(__file__))
     return os.path.dirname(os.path.dirname(script_dir))
 
+def remover_arquivos(*caminhos):
+    """Remove arquivos de uma geração anterior ou abortada, se existirem."""
+    for caminho in caminhos:
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+def configurar_conexao(con, project_root: str):
+    """Aplica threads/memory_limit configurados e resolve caminhos relativos a partir da raiz."""
+    if THREADS:
+        con.execute(f"SET threads = {int(THREADS)}")
+    if MEMORY_LIMIT:
+        con.execute(f"SET memory_limit = '{MEMORY_LIMIT}'")
+    con.execute(f"SET file_search_path = '{project_root}'")
+
+def encontrar_fontes(trusted_dw_path: str) -> dict[str, str]:
+    """
+    Tabelas da trusted_dw: {nome: caminho}, com um arquivo .parquet por tabela
+    ou, para as tabelas particionadas por ano (ver particoes.py), o diretório
+    das partições, que prevalece sobre um arquivo antigo de mesmo nome.
+    """
+    fontes = {
+        os.path.basename(file_path).replace('.parquet', ''): file_path
+        for file_path in glob.glob(os.path.join(trusted_dw_path, '*.parquet'))
+    }
+    for table_name in TABELAS_PARTICIONADAS:
+        diretorio = diretorio_tabela(trusted_dw_path, table_name)
+        if arquivos_particoes(diretorio):
+            fontes[table_name] = diretorio
+    return fontes
+
+def ler_fonte(caminho: str, particionada: bool) -> str:
+    """Expressão SQL de leitura de um arquivo ou de um diretório particionado (hive)."""
+    if particionada:
+        return ler_particoes(caminho)
+    return f"read_parquet('{caminho}')"
+
+def carregar_tabela(con, table_name: str, file_path: str, project_root: str) -> dict:
+    """
+    Carrega um parquet (ou tabela particionada) como tabela (cópia) ou, se for
+    maior que VIEW_ACIMA_MB, como view sobre os arquivos; em views particionadas
+    os filtros por 'ano' leem só as partições necessárias. Retorna o registro de
+    auditoria da carga.
+    """
+    particionada = os.path.isdir(file_path)
+    arquivos = arquivos_particoes(file_path) if particionada else [file_path]
+    tamanho = sum(os.path.getsize(arquivo) for arquivo in arquivos)
+    como_view = VIEW_ACIMA_MB > 0 and tamanho > VIEW_ACIMA_MB * 1024 * 1024
+    inicio = time.perf_counter()
+    if como_view:
+        relativo = os.path.relpath(file_path, project_root).replace(os.sep, '/')
+        con.execute(f"CREATE VIEW {table_name} AS SELECT * FROM {ler_fonte(relativo, particionada)}")
+    else:
+        con.execute(f"CREATE TABLE {table_name} AS SELECT * FROM {ler_fonte(file_path, particionada)}")
+    linhas = con.execute(f"SELECT count(*) FROM {table_name}").fetchone()[0]
+    return {
+        'tabela': table_name, 'tipo': 'view' if como_view else 'tabela', 'linhas': linhas,
+        'bytes_parquet': tamanho, 'duracao_s': time.perf_counter() - inicio,
+    }
+
+def validar_dw(con, auditoria: list[dict], tabelas: dict):
+    """
+    Confere a nova geração do DW antes da troca: cada tabela deve existir e ter
+    o mesmo número de linhas do parquet de origem. Lança RuntimeError se não.
+    """
+    carregadas = {registro['tabela']: registro['linhas'] for registro in auditoria}
+    for table_name, file_path in tabelas.items():
+        esperado = con.execute(f"SELECT count(*) FROM {ler_fonte(file_path, os.path.isdir(file_path))}").fetchone()[0]
+        carregado = carregadas.get(table_name)
+        if carregado != esperado:
+            raise RuntimeError(f"Tabela '{table_name}' com {carregado} linhas (esperado: {esperado})")
+
+def gravar_auditoria(con, auditoria: list[dict]):
+    """Grava na tabela de auditoria o tempo e as linhas de cada tabela desta carga."""
+    carregado_em = datetime.now()
+    con.execute(f"""
+        CREATE TABLE {TABELA_AUDITORIA} (
+            tabela VARCHAR, tipo VARCHAR, linhas BIGINT, bytes_parquet BIGINT,
+            duracao_s DOUBLE, carregado_em TIMESTAMP
+        )
+    """)
+    con.executemany(
+        f"INSERT INTO {TABELA_AUDITORIA} VALUES (?, ?, ?, ?, ?, ?)",
+        [[r['tabela'], r['tipo'], r['linhas'], r['bytes_parquet'], r['duracao_s'], carregado_em] for r in auditoria],
+    )
+
 def main():
     """
-    Carrega todos os arquivos .parquet da camada 'trusted_dw' para um único
-    arquivo de banco de dados DuckDB, criando ou substituindo as tabelas.
+    Carrega todos os arquivos .parquet da camada 'trusted_dw' em uma nova
+    geração do banco DuckDB e a troca atomicamente pela atual.
+
+    A nova geração é montada em 'dw.duckdb.novo', em uma única transação, e
+    validada antes de substituir 'dw.duckdb' com `os.replace`. Cada carga usa o
+    paralelismo interno do DuckDB (BUSSOLA_DW_THREADS, BUSSOLA_DW_MEMORY_LIMIT),
+    e o tempo e as linhas de cada tabela ficam em 'auditoria_carga'. Leitores com uma
+    conexão aberta continuam na geração anterior até reabrirem o arquivo (o app
+    faz isso quando a versão do DW muda), sem ver dados pela metade nem
+    disputar o lock do arquivo com a carga. Em caso de erro, o DW atual fica
+    intacto.
     """
     project_root = get_project_root()
     trusted_dw_path = os.path.join(project_root, 'duckdb', 'trusted_dw')
     db_dir = os.path.join(project_root, 'duckdb', 'banco_dw')
     db_path = os.path.join(db_dir, 'dw.duckdb')
+    novo_path = db_path + '.novo'
 
     # Garante que o diretório do banco de dados exista
     os.makedirs(db_dir, exist_ok=True)
 
-    # Encontra todos os arquivos parquet no diretório trusted_dw
-    parquet_files = glob.glob(os.path.join(trusted_dw_path, '*.parquet'))
+    # Encontra todas as tabelas (arquivos e diretórios particionados) da trusted_dw
+    fontes = encontrar_fontes(trusted_dw_path)
 
-    if not parquet_files:
+    if not fontes:
         print("⚠️  Aviso: Nenhum arquivo .parquet encontrado em 'trusted_dw'. O banco de dados não será atualizado.")
         return
 
-    print(f"🗄️  Iniciando a carga do Data Warehouse DuckDB em '{db_path}'...")
+    print(f"🗄️  Iniciando a carga do Data Warehouse DuckDB em '{novo_path}'...")
+
+    # Sobras de uma carga interrompida
+    remover_arquivos(novo_path, novo_path + '.wal')
 
+    con = None
     try:
-        # Conecta-se ao arquivo do banco de dados DuckDB
-        con = duckdb.connect(database=db_path)
+        # Conecta-se ao arquivo da nova geração do banco de dados
+        con = duckdb.connect(database=novo_path)
+        configurar_conexao(con, project_root)
+        con.execute("BEGIN TRANSACTION")
 
-        for file_path in parquet_files:
-            table_name = os.path.basename(file_path).replace('.parquet', '')
+        tabelas = {}
+        auditoria = []
+        for table_name, file_path in fontes.items():
             try:
-                # Cria ou substitui a tabela no DW a partir do arquivo parquet
-                con.execute(f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM read_parquet('{file_path}')")
-                print(f"  ✅  Sucesso: Tabela '{table_name}' carregada no DW.")
+                # Cria a tabela (ou view) no DW a partir do arquivo parquet
+                registro = carregar_tabela(con, table_name, file_path, project_root)
+                tabelas[table_name] = file_path
+                auditoria.append(registro)
+                print(f"  ✅  Sucesso: {registro['tipo'].capitalize()} '{table_name}' carregada no DW "
+                      f"({registro['linhas']} linhas, {registro['duracao_s']:.2f}s).")
             except Exception as e:
                 # Relança a exceção para que o orquestrador saiba da falha
                 raise RuntimeError(f"Erro ao carregar a tabela '{table_name}'") from e
 
+        # Tabela desnormalizada lida pelo app (ver app_ranking.py)
+        inicio = time.perf_counter()
+        if materializar_app_ranking(con):
+            linhas = con.execute("SELECT count(*) FROM app_ranking").fetchone()[0]
+            auditoria.append({'tabela': 'app_ranking', 'tipo': 'tabela', 'linhas': linhas,
+                              'bytes_parquet': None, 'duracao_s': time.perf_counter() - inicio})
+
+        validar_dw(con, auditoria, tabelas)
+        gravar_auditoria(con, auditoria)
+        con.execute("COMMIT")
+        con.execute("CHECKPOINT")
         con.close()
+        con = None
+
+        # Troca atômica: um WAL da geração anterior não pode ser aplicado à nova
+        remover_arquivos(db_path + '.wal')
+        os.replace(novo_path, db_path)
+        print(f"  🔁  Nova geração do DW publicada em '{db_path}'.")
         print("\n✨ Processo de carga do DW finalizado! ✨")
 
     except Exception as e:
         print(f"❌  Erro fatal ao conectar ou operar o banco de dados DuckDB: {e}")
+        if con is not None:
+            con.close()
+        remover_arquivos(novo_path, novo_path + '.wal')
         raise  # Relança a exceção para sinalizar a falha
 
 if __name__ == "__main__":
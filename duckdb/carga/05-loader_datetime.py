@@ -6,23 +6,39 @@ def get_utc_minus_3_time():
     """Retorna a data e hora atual no fuso horário UTC-3."""
     return datetime.now(timezone.utc) - timedelta(hours=3)
 
+def get_project_root():
+    """Encontra o diretório raiz do projeto."""
+    script_dir = os.path.dirname(os.path.realpath(__file__))
+    return os.path.dirname(os.path.dirname(script_dir))
+
+def versao_anterior(output_path: str) -> int:
+    """Lê a versão do DW gravada na execução anterior (0 se não houver)."""
+    try:
+        df = pd.read_parquet(output_path)
+        return int(df['dw_versao'].iloc[0])
+    except Exception:
+        return 0
+
 def main():
     """
-    Cria um arquivo parquet contendo a data e hora da última execução do loader.
-    O arquivo é salvo no diretório 'duckdb/land_dw/'.
+    Cria um arquivo parquet contendo a data e hora da última execução do loader
+    e a versão do DW ('dw_versao'), um contador que aumenta a cada carga. O app
+    compara essa versão a cada execução e só reabre o banco quando ela muda.
+    O arquivo é salvo no diretório 'duckdb/land_dw/' da raiz do projeto.
     """
-    output_dir = os.path.join('duckdb', 'land_dw')
+    output_dir = os.path.join(get_project_root(), 'duckdb', 'land_dw')
     os.makedirs(output_dir, exist_ok=True)
-    
+
     output_path = os.path.join(output_dir, 'loader_datetime.parquet')
-    
+
     now_utc_minus_3 = get_utc_minus_3_time()
-    
-    df = pd.DataFrame([{'loader_datetime': now_utc_minus_3}])
-    
+    dw_versao = versao_anterior(output_path) + 1
+
+    df = pd.DataFrame([{'loader_datetime': now_utc_minus_3, 'dw_versao': dw_versao}])
+
     df.to_parquet(output_path, index=False)
-    
-    print(f"Arquivo de data de atualização do loader salvo em: {output_path}")
+
+    print(f"Arquivo de data de atualização do loader salvo em: {output_path} (versão do DW: {dw_versao})")
 
 if __name__ == "__main__":
     main()
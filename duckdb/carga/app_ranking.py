@@ -0,0 +1,162 @@
+"""
+Materializa a tabela 'app_ranking' no DW: uma linha por ação com todas as
+colunas exibidas pelo app já renomeadas, tipadas e calculadas.
+
+Substitui o que o app fazia a cada carregamento de página (normalização de
+'ticker_base' em cada tabela, cinco merges do pandas e `df.apply` linha a
+linha para Dívida/Market Cap e Val 1M/6M) por um único `CREATE TABLE AS`
+executado na carga. As tabelas de apoio são opcionais: as colunas que
+dependem de uma tabela ausente simplesmente não são criadas.
+"""
+
+TABELA = 'app_ranking'
+
+# Colunas de origem -> nomes exibidos no app
+COLUNAS_EXIBICAO = {
+    'empresa': 'Empresa', 'logo': 'Logo', 'perfil_acao': 'Perfil da Ação',
+    'market_cap': 'Market Cap', 'preco_atual': 'Preço Atual', 'p_l': 'P/L', 'p_vp': 'P/VP',
+    'payout_ratio': 'Payout Ratio (%)', 'crescimento_preco_5a': 'Crescimento Preço (%)', 'roe': 'ROE (%)',
+    'divida_total': 'Dívida Total', 'divida_ebitda': 'Dívida/EBITDA', 'sentimento_gauge': 'Sentimento Gauge',
+    'DY12m': 'DY (Taxa 12m, %)', 'DY5anos': 'DY 5 Anos Média (%)',
+    'strong_buy': 'Strong Buy', 'buy': 'Buy', 'hold': 'Hold', 'sell': 'Sell', 'strong_sell': 'Strong Sell',
+    'beta': 'Beta', 'current_ratio': 'Current Ratio', 'liquidez_media_diaria': 'Volume Médio Diário',
+    'fcf_yield': 'FCF Yield', 'status_ciclo': 'Status Ciclo',
+}
+
+# Colunas exibidas tratadas como numéricas (ausentes viram 0)
+COLUNAS_NUMERICAS = {
+    'Preço Atual', 'P/L', 'P/VP', 'DY (Taxa 12m, %)', 'DY 5 Anos Média (%)',
+    'Payout Ratio (%)', 'Crescimento Preço (%)', 'ROE (%)', 'Dívida Total',
+    'Market Cap', 'Dívida/EBITDA', 'Sentimento Gauge', 'Strong Buy', 'Buy',
+    'Hold', 'Sell', 'Strong Sell', 'Beta', 'Current Ratio', 'Volume Médio Diário',
+    'FCF Yield', 'margem_seguranca_percent',
+}
+
+TIPOS_NUMERICOS = ('TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT', 'FLOAT', 'DOUBLE', 'DECIMAL')
+
+
+def colunas_da_tabela(con, tabela: str) -> dict[str, str] | None:
+    """Retorna {coluna: tipo} da tabela, ou None se ela não existir no DW."""
+    existe = con.execute(
+        "SELECT count(*) FROM information_schema.tables WHERE table_name = ?", [tabela]
+    ).fetchone()[0]
+    if not existe:
+        return None
+    return {nome: tipo for nome, tipo, *_ in con.execute(f'DESCRIBE "{tabela}"').fetchall()}
+
+
+def ordem_linhas(con, tabela: str) -> str:
+    """Expressão da ordem de inserção: 'rowid' em tabelas; a ordem de leitura em views (carga com BUSSOLA_DW_VIEW_MB)."""
+    tipo = con.execute(
+        "SELECT table_type FROM information_schema.tables WHERE table_name = ?", [tabela]
+    ).fetchone()[0]
+    return 'rowid' if tipo == 'BASE TABLE' else 'row_number() OVER ()'
+
+
+def ticker_base(expr: str) -> str:
+    """Ticker normalizado (maiúsculo, sem '.SA'), a chave de junção entre as tabelas."""
+    return f"trim(replace(upper(CAST({expr} AS VARCHAR)), '.SA', ''))"
+
+
+def numerico(expr: str, tipo: str) -> str:
+    if tipo.startswith(TIPOS_NUMERICOS):
+        return f"COALESCE({expr}, 0)"
+    return f"COALESCE(TRY_CAST({expr} AS DOUBLE), 0)"
+
+
+def montar_consulta(con) -> str | None:
+    """Monta o SELECT da 'app_ranking' de acordo com as tabelas presentes no DW."""
+    indicadores = colunas_da_tabela(con, 'indicadores')
+    if not indicadores:
+        return None
+    dy = colunas_da_tabela(con, 'dividend_yield')
+    scores = colunas_da_tabela(con, 'scores')
+    preco_teto = colunas_da_tabela(con, 'preco_teto')
+    precos = colunas_da_tabela(con, 'precos_acoes')
+    setor = colunas_da_tabela(con, 'avaliacao_setor')
+
+    juncoes = []
+    colunas = {}  # nome exibido -> expressão, na ordem em que o app as recebia
+    for coluna, tipo in indicadores.items():
+        if coluna == 'ticker':
+            continue  # substituída por 'Ticker' (nomes de coluna no DuckDB não diferenciam maiúsculas)
+        nome = COLUNAS_EXIBICAO.get(coluna, coluna)
+        expr = f'i."{coluna}"'
+        if nome in COLUNAS_NUMERICAS:
+            expr = numerico(expr, tipo)
+        elif nome == 'Status Ciclo':
+            expr = f"COALESCE({expr}, 'N/A')"
+        colunas[nome] = expr
+
+    if dy:
+        juncoes.append(f"LEFT JOIN (SELECT {ticker_base('ticker')} AS ticker_base, DY12m, DY5anos FROM dividend_yield) dy "
+                       "ON dy.ticker_base = i.ticker_base")
+        colunas['DY (Taxa 12m, %)'] = numerico('dy.DY12m', dy['DY12m'])
+        colunas['DY 5 Anos Média (%)'] = numerico('dy.DY5anos', dy['DY5anos'])
+    if 'subsetor_b3' in indicadores:
+        colunas['Setor (brapi)'] = 'i.subsetor_b3'
+    colunas['Ticker'] = 'i.ticker_base'
+    if 'Dívida Total' in colunas and 'Market Cap' in colunas:
+        divida, market_cap = colunas['Dívida Total'], colunas['Market Cap']
+        colunas['Dívida/Market Cap'] = f"CASE WHEN {market_cap} <> 0 THEN {divida} / {market_cap} ELSE 0 END"
+
+    if scores:
+        juncoes.append(f"LEFT JOIN (SELECT *, {ticker_base('ticker')} AS ticker_base FROM scores) s "
+                       "ON s.ticker_base = i.ticker_base")
+        for coluna in scores:
+            if coluna.startswith('score_') and coluna not in ('score_codigos', 'score_detalhes'):
+                colunas[coluna] = f's."{coluna}"'
+        colunas['Score Total'] = numerico('s.score_total', scores['score_total'])
+        colunas['Score Details'] = (
+            "COALESCE(s.score_detalhes, []::VARCHAR[])" if 'score_detalhes' in scores else "[]::VARCHAR[]"
+        )
+
+    if preco_teto:
+        juncoes.append(f"LEFT JOIN (SELECT {ticker_base('ticker')} AS ticker_base, preco_teto_5anos, diferenca_percentual "
+                       "FROM preco_teto) pt ON pt.ticker_base = i.ticker_base")
+        colunas['Preço Teto 5A'] = 'pt.preco_teto_5anos'
+        colunas['Alvo'] = 'pt.diferenca_percentual'
+
+    if precos:
+        juncoes.append(f"LEFT JOIN (SELECT {ticker_base('ticker')} AS ticker_base, fechamento_atual, fechamento_1m_atras, "
+                       "fechamento_6m_atras FROM precos_acoes) pa ON pa.ticker_base = i.ticker_base")
+        atual = f"COALESCE(pa.fechamento_atual, {colunas.get('Preço Atual', 'NULL')})"
+        colunas['Preço Atual'] = atual
+        for periodo, origem in (('1M', 'pa.fechamento_1m_atras'), ('6M', 'pa.fechamento_6m_atras')):
+            colunas[f'Preço {periodo}'] = origem
+        for periodo, origem in (('1M', 'pa.fechamento_1m_atras'), ('6M', 'pa.fechamento_6m_atras')):
+            colunas[f'Val {periodo}'] = (
+                f"CASE WHEN {origem} <> 0 THEN (({atual} - {origem}) / {origem}) * 100 WHEN {origem} = 0 THEN 0 END"
+            )
+
+    if setor and 'subsetor_b3' in indicadores:
+        juncoes.append("LEFT JOIN (SELECT DISTINCT ON (subsetor_b3) subsetor_b3, pontuacao_final FROM "
+                       f"(SELECT *, {ordem_linhas(con, 'avaliacao_setor')} AS _ordem FROM avaliacao_setor) "
+                       "ORDER BY subsetor_b3, _ordem) st ON st.subsetor_b3 = i.subsetor_b3")
+        colunas['pontuacao_final'] = 'st.pontuacao_final'
+    else:
+        colunas['pontuacao_final'] = '0'
+
+    if 'Status Ciclo' not in colunas:
+        colunas['Status Ciclo'] = "'N/A'"
+
+    selecao = ",\n    ".join(f'{expr} AS "{nome}"' for nome, expr in colunas.items())
+    return (
+        f"SELECT\n    {selecao}\n"
+        f"FROM (SELECT *, {ticker_base('ticker')} AS ticker_base, {ordem_linhas(con, 'indicadores')} AS _ordem "
+        "FROM indicadores) i\n"
+        + "\n".join(juncoes)
+        + "\nORDER BY i._ordem"
+    )
+
+
+def materializar_app_ranking(con) -> bool:
+    """Cria (ou recria) a 'app_ranking' a partir das tabelas já carregadas no DW."""
+    consulta = montar_consulta(con)
+    if consulta is None:
+        print(f"⚠️  Aviso: Tabela 'indicadores' não encontrada. '{TABELA}' não será criada.")
+        return False
+    con.execute(f"CREATE OR REPLACE TABLE {TABELA} AS {consulta}")
+    linhas = con.execute(f"SELECT count(*) FROM {TABELA}").fetchone()[0]
+    print(f"  ✅  Sucesso: Tabela '{TABELA}' materializada ({linhas} linhas).")
+    return True
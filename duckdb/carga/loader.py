@@ -5,6 +5,10 @@ import time
 
 # Adiciona o diretório atual ao path para permitir a importação dos módulos
 sys.path.append(os.path.dirname(os.path.realpath(__file__)))
+# Métricas estruturadas compartilhadas com o pipeline de engenharia (data_engineer/metricas.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..', 'data_engineer'))
+
+import metricas
 
 def formatar_tempo(segundos: float) -> str:
     """Converte segundos para um formato legível (m, s)."""
@@ -21,7 +25,9 @@ def run_step(module_name: str) -> bool:
     try:
         module = importlib.import_module(module_name)
         if hasattr(module, 'main'):
-            module.main()
+            # Span 'etapa' no arquivo de métricas da execução (status 'erro' se main() falhar)
+            with metricas.span('etapa', etapa=f"carga/{module_name}"):
+                module.main()
         else:
             # Se o módulo não tem main, consideramos um aviso, não um erro fatal.
             duration = time.perf_counter() - start_time
@@ -0,0 +1,123 @@
+"""
+Layout particionado por ano das tabelas de eventos da trusted_dw.
+
+Em vez de um único arquivo, cada tabela fica em um diretório no formato
+hive, `trusted_dw/<tabela>/ano=YYYY/dados.parquet`, de modo que a carga
+incremental reescreve apenas as partições dos anos afetados e os leitores
+(DuckDB com `hive_partitioning`, pyarrow/pandas com `filters`) leem apenas
+as partições necessárias. A coluna 'ano' vem do caminho e não é gravada
+nos arquivos.
+"""
+
+import glob
+import os
+import shutil
+
+ARQUIVO_PARTICAO = 'dados.parquet'
+
+# Tabela -> (expressão SQL do ano da linha, chave do merge/upsert)
+TABELAS_PARTICIONADAS = {
+    'todos_dividendos': ("YEAR(CAST(data AS TIMESTAMP))", ('ticker', 'data')),
+    'precos_acoes_completo': ("ano", ('ticker', 'ano')),
+}
+
+
+def diretorio_tabela(trusted_dw_path: str, tabela: str) -> str:
+    return os.path.join(trusted_dw_path, tabela)
+
+
+def caminho_particao(trusted_dw_path: str, tabela: str, ano: int) -> str:
+    return os.path.join(diretorio_tabela(trusted_dw_path, tabela), f'ano={ano}', ARQUIVO_PARTICAO)
+
+
+def glob_particoes(diretorio: str) -> str:
+    """Padrão dos arquivos de todas as partições de uma tabela."""
+    return os.path.join(diretorio, '*', '*.parquet').replace(os.sep, '/')
+
+
+def ler_particoes(diretorio: str) -> str:
+    """Expressão SQL que lê a tabela particionada (com o 'ano' vindo do caminho)."""
+    return f"read_parquet('{glob_particoes(diretorio)}', hive_partitioning = true)"
+
+
+def arquivos_particoes(diretorio: str) -> list[str]:
+    return sorted(glob.glob(glob_particoes(diretorio)))
+
+
+def com_ano(con, tabela: str, consulta: str) -> str:
+    """Acrescenta a coluna 'ano' (se ainda não existir) a uma consulta sobre a tabela."""
+    expressao_ano, _ = TABELAS_PARTICIONADAS[tabela]
+    colunas = con.sql(f"SELECT * FROM ({consulta}) LIMIT 0").columns
+    if 'ano' in colunas:
+        return consulta
+    return f"SELECT *, {expressao_ano} AS ano FROM ({consulta})"
+
+
+def gravar_particoes(con, trusted_dw_path: str, tabela: str, consulta: str) -> list[int]:
+    """
+    Grava uma partição por ano presente em `consulta` (que deve ter a coluna
+    'ano'), substituindo apenas essas partições. Cada arquivo é escrito em um
+    temporário e trocado com `os.replace`. Retorna os anos gravados.
+    """
+    con.execute(f"CREATE OR REPLACE TEMP TABLE _particoes AS {consulta}")
+    anos = [ano for (ano,) in con.execute("SELECT DISTINCT ano FROM _particoes ORDER BY ano").fetchall()]
+    for ano in anos:
+        destino = caminho_particao(trusted_dw_path, tabela, ano)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        temporario = destino + '.tmp'
+        con.execute(
+            f"COPY (SELECT * EXCLUDE (ano) FROM _particoes WHERE ano = ?) TO '{temporario}' (FORMAT parquet)", [ano]
+        )
+        os.replace(temporario, destino)
+    con.execute("DROP TABLE _particoes")
+    return anos
+
+
+def substituir_tabela(con, trusted_dw_path: str, tabela: str, consulta: str) -> list[int]:
+    """
+    Reescreve todas as partições da tabela a partir de `consulta` (com a coluna
+    'ano'); partições de anos ausentes em `consulta` deixam de existir. A nova
+    versão é montada em um diretório ao lado e trocada com `os.replace`.
+    Retorna os anos gravados.
+    """
+    diretorio = diretorio_tabela(trusted_dw_path, tabela)
+    novo, antigo = diretorio + '.novo', diretorio + '.antigo'
+    for sobra in (novo, antigo):
+        shutil.rmtree(sobra, ignore_errors=True)
+    anos = gravar_particoes(con, trusted_dw_path, os.path.basename(novo), consulta)
+    os.makedirs(novo, exist_ok=True)
+    if os.path.isdir(diretorio):
+        os.replace(diretorio, antigo)
+    os.replace(novo, diretorio)
+    shutil.rmtree(antigo, ignore_errors=True)
+    return anos
+
+
+def upsert_particoes(con, trusted_dw_path: str, tabela: str, consulta_delta: str) -> tuple[int, list[int]]:
+    """
+    Merge/upsert do delta na tabela particionada pela chave da tabela: linhas do
+    delta substituem as existentes com a mesma chave e as demais são anexadas.
+    Só as partições dos anos presentes no delta são lidas e reescritas.
+    Retorna (linhas do delta, anos reescritos).
+    """
+    _, chave = TABELAS_PARTICIONADAS[tabela]
+    con.execute(f"CREATE OR REPLACE TEMP TABLE _delta AS {com_ano(con, tabela, consulta_delta)}")
+    linhas = con.execute("SELECT count(*) FROM _delta").fetchone()[0]
+    anos = [ano for (ano,) in con.execute("SELECT DISTINCT ano FROM _delta ORDER BY ano").fetchall()]
+    existentes = [
+        caminho for caminho in (caminho_particao(trusted_dw_path, tabela, ano) for ano in anos)
+        if os.path.exists(caminho)
+    ]
+    if existentes:
+        lista = ', '.join(f"'{caminho}'" for caminho in existentes)
+        juncao = ' AND '.join(f"t.{c} = d.{c}" for c in chave)
+        consulta = (
+            f"SELECT t.* FROM read_parquet([{lista}], hive_partitioning = true) t "
+            f"ANTI JOIN _delta d ON {juncao} "
+            "UNION ALL BY NAME SELECT * FROM _delta"
+        )
+    else:
+        consulta = "SELECT * FROM _delta"
+    gravar_particoes(con, trusted_dw_path, tabela, consulta)
+    con.execute("DROP TABLE _delta")
+    return linhas, anos
@@ -6,17 +6,29 @@
 Executa em ordem:
 1. Pipeline de Engenharia de Dados (data_engineer/loader.py)
 2. Pipeline de Carga DuckDB (duckdb/carga/loader.py)
+
+A saída de cada loader é registrada no log à medida que é produzida. As
+etapas gravam spans estruturados (duração, linhas, bytes, chamadas de rede,
+acertos de cache) em logs/metricas/<run_id>.jsonl (ver data_engineer/metricas.py);
+ao final, a execução é resumida nos históricos 'pipeline_runs' e
+'pipeline_step_metrics' da trusted_dw, que entram no DW na próxima geração
+montada por duckdb/carga/03-duckdb_dw.py.
 """
 
 import logging
+import os
 import sys
 import time
 import subprocess
+import threading
 from pathlib import Path
 from typing import Tuple
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
+sys.path.insert(0, str(Path(__file__).resolve().parent / "data_engineer"))
+import metricas  # noqa: E402
+
 
 def setup_logging(base_dir: Path) -> None:
     """
@@ -79,20 +91,27 @@ def executar_loader(caminho_loader: Path, nome_pipeline: str) -> Tuple[int, floa
     tempo_inicio = time.perf_counter()
     
     try:
-        processo = subprocess.run(
+        processo = subprocess.Popen(
             [sys.executable, "-X", "utf8", "-u", str(caminho_loader)],
             cwd=caminho_loader.parent,
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             encoding='utf-8',
             errors='surrogateescape'
         )
-        
-        # Imprime a saída do script
+
+        # Registra a saída do script linha a linha, enquanto ele executa; o
+        # stderr é lido em paralelo para que nenhum dos pipes encha e trave o processo
         logging.info(f"--- Início da Saída de {caminho_loader.name} ---")
-        if processo.stdout:
-            logging.info(processo.stdout.strip())
-        if processo.stderr:
-            logging.error(processo.stderr.strip())
+        erros: list[str] = []
+        leitor_erros = threading.Thread(target=lambda: erros.extend(processo.stderr), daemon=True)
+        leitor_erros.start()
+        for linha in processo.stdout:
+            logging.info(linha.rstrip())
+        processo.wait()
+        leitor_erros.join()
+        if erros:
+            logging.error("".join(erros).strip())
         logging.info(f"--- Fim da Saída de {caminho_loader.name} ---")
             
         tempo_fim = time.perf_counter()
@@ -117,6 +136,42 @@ def executar_loader(caminho_loader: Path, nome_pipeline: str) -> Tuple[int, floa
         return 1, duracao
 
 
+def registrar_metricas(base_dir: Path, run_id: str, inicio: datetime, duracao: float, codigo_saida: int) -> None:
+    """
+    Resume os spans da execução nas tabelas 'pipeline_runs' e
+    'pipeline_step_metrics' (ver `metricas.resumir_execucao`).
+
+    O histórico de todas as execuções fica em Parquets da trusted_dw. O DW
+    publicado não é alterado aqui: as tabelas entram na próxima geração
+    montada (e validada) por `03-duckdb_dw.py`. Falhas aqui não afetam o
+    código de saída do pipeline.
+    """
+    try:
+        import pandas as pd
+
+        runs, etapas = metricas.resumir_execucao(run_id, inicio=inicio, duracao_s=duracao, codigo_saida=codigo_saida)
+        trusted_dir = base_dir / "duckdb" / "trusted_dw"
+        trusted_dir.mkdir(parents=True, exist_ok=True)
+        tabelas = {"pipeline_runs": runs, "pipeline_step_metrics": etapas}
+        for nome, df in tabelas.items():
+            caminho = trusted_dir / f"{nome}.parquet"
+            if caminho.exists():
+                historico = pd.read_parquet(caminho)
+                df = pd.concat([historico[historico["run_id"] != run_id], df], ignore_index=True)
+            temporario = caminho.with_suffix(".parquet.tmp")
+            df.to_parquet(temporario, index=False)
+            os.replace(temporario, caminho)
+
+        resumo = runs.iloc[0]
+        logging.info(
+            f"📈 Métricas da execução {run_id}: {len(etapas)} linhas por etapa/span, "
+            f"{resumo['chamadas_rede']} chamadas de rede, {resumo['cache_hits']} acertos de cache, "
+            f"{resumo['linhas_saida']} linhas e {resumo['bytes'] / 1024 / 1024:.1f} MB gravados."
+        )
+    except Exception as e:
+        logging.warning(f"⚠️ Não foi possível registrar as métricas da execução: {e}")
+
+
 def main() -> int:
     """
     Orquestra a execução completa do pipeline de dados.
@@ -129,6 +184,16 @@ def main() -> int:
     # Configura o logging no início da execução
     setup_logging(base_dir)
     
+    # Repassa o modo offline aos scripts filhos (ver cache de cotações em data_engineer/common.py)
+    if "--offline" in sys.argv:
+        os.environ["BUSSOLA_OFFLINE"] = "1"
+        logging.info("📴 Modo offline: dados de mercado servidos apenas do cache.")
+
+    # Executa as etapas de data_engineer no mesmo processo, com handoff de DataFrames em memória
+    if "--em-processo" in sys.argv:
+        os.environ["BUSSOLA_EM_PROCESSO"] = "1"
+        logging.info("⚡ Modo em processo: etapas de engenharia de dados sem subprocessos.")
+
     # Define os loaders a serem executados
     pipelines = [
         (base_dir / "data_engineer" / "loader.py", "Pipeline de Engenharia de Dados"),
@@ -141,13 +206,18 @@ def main() -> int:
             logging.error(f"❌ ERRO: Arquivo não encontrado: {caminho}")
             return 1
     
+    # Identificador da execução, herdado pelos loaders e etapas (BUSSOLA_RUN_ID)
+    run_id = metricas.run_id()
+
     logging.info("=" * 80)
     logging.info("🎯 EXECUÇÃO COMPLETA DO PIPELINE DE DADOS")
     logging.info("=" * 80)
     logging.info(f"📂 Diretório base: {base_dir}")
     logging.info(f"🐍 Python: {sys.executable}")
+    logging.info(f"📈 Métricas: {metricas.arquivo_metricas(run_id)}")
     logging.info("=" * 80)
     
+    inicio_execucao = datetime.now()
     tempo_inicio_total = time.perf_counter()
     resultados = []
     
@@ -185,6 +255,7 @@ def main() -> int:
     
     # Retorna o código de erro do último pipeline com falha, ou 0 se todos tiveram sucesso
     codigo_saida_final = next((rc for _, rc, _ in reversed(resultados) if rc != 0), 0)
+    registrar_metricas(base_dir, run_id, inicio_execucao, duracao_total, codigo_saida_final)
     
     if codigo_saida_final == 0:
         logging.info("🎉 TODOS OS PIPELINES FORAM EXECUTADOS COM SUCESSO! 🎉")
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""Configuração comum dos testes: importa os módulos de `data_engineer/` e dos benchmarks."""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+DATA_ENGINEER_DIR = Path(__file__).resolve().parents[1] / 'data_engineer'
+BENCHMARKS_DIR = Path(__file__).resolve().parents[1] / 'dev' / 'benchmarks'
+sys.path.insert(0, str(DATA_ENGINEER_DIR))
+
+
+def carregar_etapa(nome_arquivo: str):
+    """Importa um script numerado (ex.: '01-acoes_e_fundos.py'), cujo nome não é um identificador válido."""
+    spec = importlib.util.spec_from_file_location(Path(nome_arquivo).stem.replace('-', '_'),
+                                                  DATA_ENGINEER_DIR / nome_arquivo)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def carregar_benchmark(nome_arquivo: str):
+    """Importa um script de dev/benchmarks/, onde ficam as implementações originais usadas como referência."""
+    spec = importlib.util.spec_from_file_location(Path(nome_arquivo).stem, BENCHMARKS_DIR / nome_arquivo)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+@pytest.fixture
+def land_dw(tmp_path, monkeypatch):
+    """Redireciona a land_dw para um diretório temporário (e desativa o modo em memória)."""
+    import common
+
+    monkeypatch.setattr(common, 'LAND_DW_DIR', tmp_path)
+    monkeypatch.setattr(common, '_ARTEFATOS', None)
+    return tmp_path
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+Testes offline da coleta de `01-acoes_e_fundos.py` e do motor de coleta
+(`fetcher.py`), com um provedor falso no lugar do yfinance e da Brapi.
+"""
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from conftest import carregar_etapa
+from fetcher import TokenBucket, coletar_em_paralelo
+from providers import StaticQuoteProvider
+
+COLUNAS_ACOES = ['ticker', 'empresa', 'volume', 'logo', 'setor_gl', 'tipo', 'setor_b3', 'subsetor_b3']
+
+
+class ProvedorFalso(StaticQuoteProvider):
+    """`StaticQuoteProvider` com universo de tickers próprio e registro do instante de cada consulta."""
+
+    def __init__(self, mapeamento_b3: dict, **kwargs):
+        super().__init__(**kwargs)
+        self.mapeamento_b3 = mapeamento_b3
+        self.instantes: list[float] = []
+        self._lock = threading.Lock()
+
+    def get_info(self, ticker_yf: str) -> dict:
+        with self._lock:
+            self.instantes.append(time.monotonic())
+        return super().get_info(ticker_yf)
+
+
+def info(nome: str, tipo: str = 'EQUITY', volume: int = 1000) -> dict:
+    return {'longName': nome, 'sector': 'Energy', 'averageVolume': volume, 'quoteType': tipo}
+
+
+@pytest.fixture(scope='module')
+def etapa():
+    return carregar_etapa('01-acoes_e_fundos.py')
+
+
+@pytest.fixture
+def provedor():
+    # Ordem propositalmente não alfabética; ERRO3 não tem .info (falha na consulta)
+    mapeamento = {
+        'ZZZZ3': ('Setor B', 'Subsetor B'),
+        'ERRO3': ('Setor A', 'Subsetor A'),
+        'AAAA4': ('Setor A', 'Subsetor A'),
+        'FUND11': ('Setor C', 'Subsetor C'),
+        'INDF3': ('Indefinido', 'Indefinido'),
+        'MMMM3': ('Setor B', 'Subsetor B'),
+    }
+    infos = {
+        'ZZZZ3.SA': info('Zeta SA'),
+        'AAAA4.SA': info('Alfa SA', volume=5),
+        'FUND11.SA': info('Fundo', tipo='ETF'),
+        'INDF3.SA': info('Indefinida SA'),
+        'MMMM3.SA': {'shortName': 'Eme', 'quoteType': 'EQUITY'},
+    }
+    return ProvedorFalso(mapeamento, infos=infos, logos={'ZZZZ3': 'https://logo/zzzz3.svg'})
+
+
+def test_extrair_dados_mantem_ordem_e_esquemas(etapa, provedor, land_dw):
+    df = etapa.extrair_dados_yfinance(provider=provedor, requisicoes_por_segundo=0)
+
+    # Ordem de entrada preservada; falha, não-ação e setor indefinido ficam de fora
+    assert df['ticker'].tolist() == ['ZZZZ3', 'AAAA4', 'MMMM3']
+    assert df.columns.tolist() == COLUNAS_ACOES
+
+    salvo = pd.read_parquet(land_dw / 'acoes_e_fundos.parquet')
+    assert salvo.columns.tolist() == COLUNAS_ACOES
+    pd.testing.assert_frame_equal(salvo, df.reset_index(drop=True))
+    linha = salvo.set_index('ticker').loc['MMMM3']
+    assert linha['empresa'] == 'Eme'
+    assert linha['setor_gl'] == 'Indefinido'
+    assert linha['volume'] == 0
+    assert salvo.set_index('ticker').loc['ZZZZ3', 'logo'] == 'https://logo/zzzz3.svg'
+
+    nao_mapeados = pd.read_parquet(land_dw / 'tickers_nao_mapeados.parquet')
+    assert nao_mapeados.columns.tolist() == ['ticker']
+    assert nao_mapeados['ticker'].tolist() == ['ERRO3', 'FUND11', 'INDF3']
+
+
+def test_extrair_dados_respeita_limite_de_taxa(etapa, land_dw):
+    taxa, n = 10.0, 25
+    mapeamento = {f"T{i:03d}3": ('Setor', 'Subsetor') for i in range(n)}
+    provedor = ProvedorFalso(mapeamento, infos={f"{t}.SA": info(t) for t in mapeamento})
+
+    etapa.extrair_dados_yfinance(provider=provedor, logo_map={}, max_workers=8, requisicoes_por_segundo=taxa)
+
+    # O balde começa cheio (capacidade = taxa): as demais consultas saem a `taxa` por segundo
+    assert len(provedor.instantes) == n
+    duracao = max(provedor.instantes) - min(provedor.instantes)
+    assert duracao >= (n - taxa) / taxa * 0.9
+
+
+def test_coletar_em_paralelo_ordem_e_erros_por_chave():
+    def funcao(chave):
+        time.sleep(0.01 * (5 - chave % 5))  # termina fora de ordem
+        if chave % 4 == 0:
+            raise ValueError(f"falha {chave}")
+        return chave * 10
+
+    resultados = coletar_em_paralelo(range(12), funcao, max_workers=4, requisicoes_por_segundo=0)
+
+    assert [r.chave for r in resultados] == list(range(12))
+    for r in resultados:
+        if r.chave % 4 == 0:
+            assert not r.ok and isinstance(r.erro, ValueError) and r.valor is None
+        else:
+            assert r.ok and r.valor == r.chave * 10
+        assert r.latencia >= 0
+
+
+def test_token_bucket_limita_a_taxa():
+    balde = TokenBucket(taxa=20, capacidade=1)
+    inicio = time.monotonic()
+    for _ in range(11):
+        balde.acquire()
+    assert time.monotonic() - inicio >= 10 / 20 * 0.9
+
+
+def test_token_bucket_taxa_zero_nao_limita():
+    balde = TokenBucket(taxa=0)
+    inicio = time.monotonic()
+    for _ in range(1000):
+        balde.acquire()
+    assert time.monotonic() - inicio < 0.5
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+Regressão de `avaliar_setores` (11-avaliacao_setor.py) contra a implementação
+original com merges e `apply` (mantida em dev/benchmarks/bench_avaliacao_setor.py).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import carregar_benchmark, carregar_etapa
+
+
+@pytest.fixture(scope='module')
+def setor():
+    return carregar_etapa('11-avaliacao_setor.py')
+
+
+@pytest.fixture(scope='module')
+def legado():
+    return carregar_benchmark('bench_avaliacao_setor.py')
+
+
+def _entradas(scores: list[int], rj: list[tuple[str, str | None]]) -> tuple:
+    """Seis tickers em três subsetores (A e B no setor X, C no setor Y) e um ticker sem setor."""
+    tickers = ['A1', 'A2', 'B1', 'B2', 'C1', 'C2', 'S1']
+    acoes = pd.DataFrame({
+        'ticker': tickers,
+        'setor_b3': ['X', 'X', 'X', 'X', 'Y', 'Y', None],
+        'subsetor_b3': ['A', 'A', 'B', 'B', 'C', 'C', 'C'],
+    })
+    indicadores = pd.DataFrame({
+        'ticker': tickers,
+        'roe': [30.0, 20.0, 15.0, np.nan, 10.0, 12.0, 50.0],
+        'beta': [0.5, 0.9, 1.2, 1.2, 2.0, 1.6, 0.1],
+        'payout_ratio': [40.0, 50.0, 20.0, 30.0, 90.0, 70.0, 10.0],
+        'margem_seguranca_percent': [200.0, 100.0, 50.0, 60.0, np.nan, -10.0, 0.0],
+    })
+    dy = pd.DataFrame({'ticker': tickers, 'DY5anos': [12.0, 8.0, 6.0, 4.0, 2.0, np.nan, 9.0]})
+    scores_df = pd.DataFrame({'ticker': tickers, 'score_total': scores})
+    rj_df = pd.DataFrame(rj, columns=['setor', 'data_saida_rj'])
+    return indicadores, dy, scores_df, rj_df, acoes
+
+
+@pytest.mark.parametrize('scores, contagem', [
+    # Todo subsetor com empresas boas e ruins: contagens inteiras
+    ([400, 50, 350, 80, 500, 20, 0], 'int64'),
+    # Subsetor C sem empresas boas: contagens float, como no merge + fillna original
+    ([400, 50, 350, 80, 200, 20, 0], 'float64'),
+])
+def test_mesma_tabela_que_a_implementacao_original(setor, legado, scores, contagem):
+    entradas = _entradas(scores, [(' A ', None), ('A', None), ('B ', '2024-01-01'), ('C', None), ('Z', None)])
+    esperado = legado.avaliar_setores_original(*entradas).reset_index(drop=True)
+    obtido = setor.avaliar_setores(*entradas).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(obtido, esperado, check_exact=True)
+    assert obtido['empresas_boas_contagem'].dtype == contagem
+    # Só as RJ ainda abertas contam, com o nome do setor sem espaços
+    ocorrencias = dict(zip(obtido['subsetor_b3'], obtido['ocorrencias_rj']))
+    assert ocorrencias == {'A': 2, 'B': 0, 'C': 1}
+    penalidades = dict(zip(obtido['subsetor_b3'], obtido['penalidade_rj']))
+    assert penalidades == {'A': -80.0, 'B': 0.0, 'C': -40.0}
+
+
+def test_sem_rj_aberta(setor, legado):
+    entradas = _entradas([400, 50, 350, 80, 200, 20, 0], [('A', '2023-05-01')])
+    esperado = legado.avaliar_setores_original(*entradas).reset_index(drop=True)
+    obtido = setor.avaliar_setores(*entradas).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(obtido, esperado, check_exact=True)
+    assert (obtido['penalidade_rj'] == 0).all()
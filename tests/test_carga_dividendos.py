@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Testes offline da carga particionada de 'todos_dividendos' (duckdb/carga/02-carga_incremental.py)."""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+CARGA_DIR = Path(__file__).resolve().parents[1] / 'duckdb' / 'carga'
+sys.path.insert(0, str(CARGA_DIR))
+
+from particoes import ler_particoes  # noqa: E402
+
+
+def _carga():
+    spec = importlib.util.spec_from_file_location('carga_incremental', CARGA_DIR / '02-carga_incremental.py')
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    return modulo
+
+
+def _dividendos(linhas):
+    return pd.DataFrame(linhas, columns=['ticker', 'data', 'valor']).astype({'data': 'datetime64[ns]'})
+
+
+def _trusted(con, trusted):
+    consulta = f"SELECT ticker, strftime(data, '%Y-%m-%d') AS data, valor, ano FROM {ler_particoes(trusted / 'todos_dividendos')}"
+    return con.execute(consulta + " ORDER BY data").fetchall()
+
+
+def _carregar(carga, con, land, trusted):
+    carga.carregar_particionada(con, 'todos_dividendos', str(land / 'todos_dividendos.parquet'), str(land),
+                                str(trusted), '2026-01-01 00:00:00', 2026)
+
+
+def test_recarga_completa_reescreve_todas_as_particoes(tmp_path):
+    carga, con = _carga(), duckdb.connect()
+    land, trusted = tmp_path / 'land_dw', tmp_path / 'trusted_dw'
+    land.mkdir()
+    trusted.mkdir()
+
+    _dividendos([('AAAA3', '2023-05-02', 1.0), ('AAAA3', '2024-05-02', 1.0), ('AAAA3', '2026-05-02', 1.0)]) \
+        .to_parquet(land / 'todos_dividendos.parquet')
+    _carregar(carga, con, land, trusted)
+
+    # Recarga completa: 2023 corrigido, 2024 removido na fonte
+    _dividendos([('AAAA3', '2023-05-02', 2.0), ('AAAA3', '2026-05-02', 1.0)]) \
+        .to_parquet(land / 'todos_dividendos.parquet')
+    (land / carga.MARCADOR_RECARGA_DIVIDENDOS).write_text('{}', encoding='utf-8')
+    _carregar(carga, con, land, trusted)
+
+    assert _trusted(con, trusted) == [('AAAA3', '2023-05-02', 2.0, 2023), ('AAAA3', '2026-05-02', 1.0, 2026)]
+    assert sorted(p.name for p in (trusted / 'todos_dividendos').iterdir()) == ['ano=2023', 'ano=2026']
+    assert not (land / carga.MARCADOR_RECARGA_DIVIDENDOS).exists()
+    assert sorted(p.name for p in trusted.iterdir()) == ['todos_dividendos']
+
+
+def test_sem_marcador_reescreve_apenas_o_ano_corrente(tmp_path):
+    carga, con = _carga(), duckdb.connect()
+    land, trusted = tmp_path / 'land_dw', tmp_path / 'trusted_dw'
+    land.mkdir()
+    trusted.mkdir()
+
+    _dividendos([('AAAA3', '2023-05-02', 1.0), ('AAAA3', '2026-05-02', 1.0)]).to_parquet(land / 'todos_dividendos.parquet')
+    _carregar(carga, con, land, trusted)
+    _dividendos([('AAAA3', '2023-05-02', 2.0), ('AAAA3', '2026-05-02', 3.0)]).to_parquet(land / 'todos_dividendos.parquet')
+    _carregar(carga, con, land, trusted)
+
+    assert _trusted(con, trusted) == [('AAAA3', '2023-05-02', 1.0, 2023), ('AAAA3', '2026-05-02', 3.0, 2026)]
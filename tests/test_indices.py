@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""Testes offline da coleta de índices de `12-indices.py`."""
+
+import pandas as pd
+import pytest
+
+from conftest import carregar_etapa
+from providers import StaticQuoteProvider
+
+
+@pytest.fixture(scope='module')
+def etapa():
+    return carregar_etapa('12-indices.py')
+
+
+def test_download_vazio_nao_gera_tabela(etapa, land_dw, capsys):
+    indices = {'BOVA11.SA': 'iShares Ibovespa', 'SMAL11.SA': 'Small Caps'}
+
+    assert etapa.baixar_historicos(list(indices), StaticQuoteProvider())['Date'].dtype == 'datetime64[ns]'
+    assert etapa.coletar_indices(indices, StaticQuoteProvider()).empty
+
+    etapa.get_and_save_indices(indices, provider=StaticQuoteProvider())
+    saida = capsys.readouterr().out
+    assert "Nenhum dado retornado para os índices." in saida
+    assert "Erro inesperado" not in saida
+    assert not (land_dw / 'indices.parquet').exists()
+
+
+def test_fechamento_anual_por_indice(etapa, land_dw):
+    hoje = pd.Timestamp.today().normalize()
+    datas = pd.bdate_range(hoje - pd.DateOffset(years=2), hoje, tz='America/Sao_Paulo', name='Date')
+    hist = pd.DataFrame({'Close': range(1, len(datas) + 1), 'Volume': 100}, index=datas, dtype=float)
+    indices = {'BOVA11.SA': 'iShares Ibovespa', 'SMAL11.SA': 'Small Caps'}
+
+    tabela = etapa.coletar_indices(indices, StaticQuoteProvider(historicos={'BOVA11.SA': hist}))
+
+    assert tabela.columns.tolist() == ['year', 'index', 'close', 'rsi', 'macd', 'volume']
+    assert set(tabela['index']) == {'iShares Ibovespa'}
+    ultimo_por_ano = hist.groupby(hist.index.year)['Close'].last()
+    assert tabela.set_index('year')['close'].to_dict() == ultimo_por_ano.round(2).to_dict()
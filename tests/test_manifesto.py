@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""Testes da impressão de entradas do manifesto (data_engineer/manifesto.py)."""
+
+from manifesto import Manifesto, modulos_locais
+
+
+def test_modulos_locais_segue_imports_indiretos_e_ciclos(tmp_path):
+    (tmp_path / '10-etapa.py').write_text("import pandas as pd\nfrom regras import pontuar\n", encoding='utf-8')
+    (tmp_path / 'regras.py').write_text("import auxiliar\n", encoding='utf-8')
+    (tmp_path / 'auxiliar.py').write_text("from regras import pontuar\nimport os\n", encoding='utf-8')
+    (tmp_path / 'sem_uso.py').write_text("", encoding='utf-8')
+
+    assert [m.name for m in modulos_locais(tmp_path / '10-etapa.py')] == ['auxiliar.py', 'regras.py']
+
+
+def test_impressao_muda_com_modulo_indireto(tmp_path):
+    script = tmp_path / '10-etapa.py'
+    script.write_text("import regras\n", encoding='utf-8')
+    (tmp_path / 'regras.py').write_text("import auxiliar\n", encoding='utf-8')
+    auxiliar = tmp_path / 'auxiliar.py'
+    auxiliar.write_text("PESO = 1\n", encoding='utf-8')
+
+    antes = Manifesto.impressao(script, {})
+    auxiliar.write_text("PESO = 2\n", encoding='utf-8')
+    assert Manifesto.impressao(script, {}) != antes
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Testes de `processar_fechamentos` (05-preco_acoes.py) contra o loop por ticker
+original (mantido em dev/benchmarks/bench_precos_anuais.py).
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import carregar_benchmark, carregar_etapa
+
+# Sábado: o último pregão é a sexta-feira anterior
+HOJE = date(2026, 10, 17)
+
+
+@pytest.fixture(scope='module')
+def precos():
+    return carregar_etapa('05-preco_acoes.py')
+
+
+@pytest.fixture(scope='module')
+def legado():
+    return carregar_benchmark('bench_precos_anuais.py')
+
+
+def _fechamentos() -> pd.DataFrame:
+    """
+    Pregões de 2019 até ontem, sem 15 a 18/09/2026 e sem 17/04/2026 (as datas
+    de 1M e 6M atrás). AAAA3 tem lacunas, BBBB4 não negociou em 2022 e CCCC3
+    estreou em 2025; DDDD3 não tem nenhum pregão.
+    """
+    datas = pd.bdate_range('2019-01-02', '2026-10-16', name='Date')
+    feriados = pd.to_datetime(['2026-09-15', '2026-09-16', '2026-09-17', '2026-09-18', '2026-04-17'])
+    datas = datas.difference(feriados)
+    base = np.arange(len(datas), dtype=float)
+    df = pd.DataFrame({
+        'AAAA3.SA': 10 + base / 100,
+        'BBBB4.SA': 50 + base / 10,
+        'CCCC3.SA': 5 + base / 1000,
+        'DDDD3.SA': np.nan,
+    }, index=datas)
+    # Último pregão antes de 17/04 sem fechamento: o as-of volta até o anterior válido
+    df.loc['2026-04-16', 'AAAA3.SA'] = np.nan
+    df.loc['2026-10-16', 'AAAA3.SA'] = np.nan
+    df.loc[str(2022), 'BBBB4.SA'] = np.nan
+    df.loc[:'2024-12-31', 'CCCC3.SA'] = np.nan
+    return df
+
+
+def test_mesmas_tabelas_que_o_loop_por_ticker(precos, legado, capsys):
+    df, tickers = _fechamentos(), ['AAAA3', 'BBBB4', 'CCCC3', 'DDDD3', 'EEEE3']
+
+    completo, resumido = precos.processar_fechamentos(df, tickers, HOJE)
+    completo_loop, resumido_loop = legado.processar_fechamentos_loop(df, tickers, HOJE)
+
+    pd.testing.assert_frame_equal(completo, completo_loop)
+    pd.testing.assert_frame_equal(resumido, resumido_loop)
+    saida = capsys.readouterr().out
+    assert 'Nenhum dado para DDDD3' in saida and 'Nenhum dado para EEEE3' in saida
+
+
+def test_asof_em_datas_sem_pregao(precos):
+    df = _fechamentos()
+    _, resumido = precos.processar_fechamentos(df, ['AAAA3', 'BBBB4', 'CCCC3'], HOJE)
+    resumido = resumido.set_index('ticker')
+
+    # 1M atrás (17/09, feriado): último pregão anterior é 14/09; 6M (17/04): 15/04 para AAAA3, 16/04 para os demais
+    assert resumido.loc['AAAA3', 'fechamento_1m_atras'] == df.loc['2026-09-14', 'AAAA3.SA']
+    assert resumido.loc['AAAA3', 'fechamento_6m_atras'] == df.loc['2026-04-15', 'AAAA3.SA']
+    assert resumido.loc['BBBB4', 'fechamento_6m_atras'] == df.loc['2026-04-16', 'BBBB4.SA']
+    # Fechamento atual: último valor válido (AAAA3 sem fechamento em 16/10)
+    assert resumido.loc['AAAA3', 'fechamento_atual'] == df.loc['2026-10-15', 'AAAA3.SA']
+    assert resumido.loc['CCCC3', 'fechamento_atual'] == df.loc['2026-10-16', 'CCCC3.SA']
+
+
+def test_anos_sem_pregao_ficam_vazios(precos):
+    df = _fechamentos()
+    completo, _ = precos.processar_fechamentos(df, ['BBBB4', 'CCCC3'], HOJE)
+    anuais = completo.set_index(['ticker', 'ano'])['fechamento']
+
+    assert completo['ano'].tolist() == [2026, 2025, 2024, 2023, 2022, 2021, 2020, 2019] * 2
+    assert np.isnan(anuais['BBBB4', 2022])
+    assert anuais['BBBB4', 2023] == df.loc['2023-12-29', 'BBBB4.SA']
+    assert anuais['CCCC3', 2025] == df.loc['2025-12-31', 'CCCC3.SA']
+    assert anuais['CCCC3'].loc[2019:2024].isna().all()
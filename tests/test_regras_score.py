@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Equivalência de `regras_score.calcular_scores` com o cálculo linha a linha
+original de `10-score.py` (mantido em dev/benchmarks/bench_score.py).
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import carregar_benchmark
+from regras_score import calcular_scores
+
+
+@pytest.fixture(scope='module')
+def legado():
+    """Funções escalares originais e base sintética (NaN e valores nas bordas das faixas)."""
+    return carregar_benchmark('bench_score.py')
+
+
+def _linha(**valores) -> dict:
+    base = dict.fromkeys([
+        'dy12m', 'dy5anos', 'payout_ratio', 'roe', 'p_l', 'p_vp', 'divida_total', 'market_cap', 'divida_ebitda',
+        'current_ratio', 'crescimento_preco_5a', 'sentimento_gauge', 'preco_atual', 'lpa', 'vpa', 'beta',
+        'liquidez_media_diaria', 'fcf_yield',
+    ], np.nan)
+    base.update(status_ciclo=None, subsetor_b3=None)
+    return {**base, **valores}
+
+
+def test_scores_identicos_ao_calculo_linha_a_linha(legado):
+    df = legado.gerar_base_sintetica(2_000, semente=7)
+    esperado = legado.finalizar(legado.calcular_scores_loop(df)).reset_index(drop=True)
+    obtido = legado.finalizar(calcular_scores(df)).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(obtido[esperado.columns], esperado, check_exact=True)
+    assert (obtido['score_codigos'].map(len) == obtido['score_detalhes'].map(len)).all()
+
+
+    # Sem a fórmula do sentimento (pontos fracionários), a soma dos detalhes reproduz o score total
+    inteiros = df.assign(sentimento_gauge=np.nan)
+    detalhes = calcular_scores(inteiros)['score_detalhes']
+    pontos = detalhes.map(lambda d: sum(int(p) for p in re.findall(r'\*\*([+-]\d+)\*\*', ''.join(d))))
+    assert pontos.clip(lower=0).tolist() == legado.calcular_scores_loop(inteiros)['score_total'].tolist()
+
+
+def test_codigos_e_detalhes(legado):
+    df = pd.DataFrame([
+        _linha(ticker='BBAS3', subsetor_b3='Financeiro', dy12m=6.1, dy5anos=9.0, payout_ratio=40, roe=16.0,
+               p_l=5.0, p_vp=0.8, divida_total=1e9, market_cap=60e9, current_ratio=0.5, status_ciclo='Compra'),
+        _linha(ticker='WEGE3', subsetor_b3='Máquinas e Equipamentos', dy12m=2.0, dy5anos=1.0, payout_ratio=90,
+               p_l=30.0, p_vp=5.0, divida_total=1e9, market_cap=100e9, divida_ebitda=0.5, sentimento_gauge=50,
+               preco_atual=40.0, lpa=2.0, vpa=8.0, beta=1.6),
+        _linha(ticker='VAZI3'),
+    ])
+    obtido = calcular_scores(df)
+
+    assert obtido['score_total'].tolist() == legado.calcular_scores_loop(df)['score_total'].tolist() == [510, 0, 0]
+    assert obtido['score_codigos'].tolist() == [
+        ['dy12m:(5, inf)', 'dy5anos:(8, inf)', 'payout_ratio:[30, 60]', 'roe_financeiro:(15, inf)', 'p_l:(0, 12)',
+         'p_vp:(0, 1.00)', 'status_ciclo:Compra', 'market_cap:(50000000000, inf)'],
+        ['dy5anos:(-inf, 1]', 'payout_ratio:(80, inf)', 'p_l:(25, inf)', 'p_vp:(4.00, inf)',
+         'divida_market_cap:(-inf, 0.3)', 'divida_ebitda:(0, 1)', 'sentimento_gauge', 'margem_graham:(-inf, 0]',
+         'beta:(1.5, inf)', 'market_cap:(50000000000, inf)'],
+        [],
+    ]
+    assert obtido['score_detalhes'].tolist() == [
+        ['DY 12m (6.1%) > 5%: **+60**', 'DY Média 5 Anos (9.0%) > 8%: **+100**', 'Payout (40%) entre 30% e 60%: **+30**',
+         'ROE (Financeiro) (16.0%) > 15%: **+80**', 'P/L (5.00) < 12: **+45**', 'P/VP (0.80) < 1: **+90**',
+         'Ciclo de Mercado (Compra): **+70**', 'Market Cap (60.0 bi) > 50 bi: **+35**'],
+        ['DY Média 5 Anos (1.0%) <= 1%: **-30**', 'Payout (90%) > 80%: **-15**', 'P/L (30.00) > 25: **-15**',
+         'P/VP (5.00) > 4: **-30**', 'Dívida/Market Cap (0.01) < 0.3: **+45**', 'Dívida/EBITDA (0.50) < 1: **+45**',
+         'Sentimento (50/100): **+10.0**', 'Margem Graham (-52.6%) <= 0%: **-70**', 'Beta (1.60) > 1.5: **-35**',
+         'Market Cap (100.0 bi) > 50 bi: **+35**'],
+        [],
+    ]